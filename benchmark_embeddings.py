@@ -0,0 +1,170 @@
+"""
+Recall@k benchmark of embedding profiles on a stored session.
+
+Every chunk in the session's chunk store is embedded once at full dimension.
+Reduced profiles are derived by truncating and renormalizing those vectors,
+which is what the API's `dimensions` parameter does for text-embedding-3
+models, so no profile costs extra API calls. Each profile is loaded into a
+local vector index with its quantization and searched with the same queries.
+Recall@k is measured against exact full-dimension float search.
+
+Embeddings are cached in the processed_data folder, so later runs with other
+profiles or k are free.
+
+Example:
+    python benchmark_embeddings.py --session <uuid> --profiles 3072:none,1024:int8,512:binary
+"""
+
+import os
+import re
+import time
+import random
+import argparse
+import tempfile
+from typing import List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from chunk_store import ChunkStore, chunk_store_path
+from embedding_profile import embed_texts, FULL_DIMENSIONS, QUANTIZATIONS
+from tokenization import count_tokens, iter_token_batches
+from vector_store import LocalVectorStore, encode_vectors
+
+# Load environment variables
+load_dotenv()
+
+CACHE_FILENAME = "benchmark_embeddings.npz"
+DEFAULT_PROFILES = "3072:none,3072:int8,3072:binary,1536:none,1024:none,1024:int8,512:none,256:none"
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+def parse_profiles(spec: str) -> List[Tuple[int, str]]:
+    """Parse a comma-separated list of dimensions:quantization profiles."""
+    profiles = []
+    for item in spec.split(','):
+        dimensions, _, quantization = item.strip().partition(':')
+        quantization = quantization or "none"
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization in profile {item}: {quantization}")
+        if not 0 < int(dimensions) <= FULL_DIMENSIONS:
+            raise ValueError(f"Dimensions in profile {item} must be between 1 and {FULL_DIMENSIONS}")
+        profiles.append((int(dimensions), quantization))
+    return profiles
+
+def sample_queries(texts: List[str], count: int, seed: int = 0) -> List[str]:
+    """Use the longest sentence of randomly chosen chunks as queries."""
+    rng = random.Random(seed)
+    chosen = rng.sample(texts, min(count, len(texts)))
+    return [max(SENTENCE_PATTERN.split(text), key=len).strip() for text in chosen]
+
+def embed_all(client, texts: List[str]) -> np.ndarray:
+    """Embed texts at full dimension in token-budgeted batches."""
+    embeddings = []
+    for batch in iter_token_batches(texts, count_tokens):
+        embeddings.extend(embed_texts(client, batch, FULL_DIMENSIONS))
+        print(f"Embedded {len(embeddings)}/{len(texts)} texts")
+    return np.asarray(embeddings, dtype=np.float32)
+
+def load_embeddings(processed_dir: str, ids: List[str], texts: List[str], queries: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Get full-dimension chunk and query embeddings, from the cache when it matches."""
+    cache_path = os.path.join(processed_dir, CACHE_FILENAME)
+    if os.path.exists(cache_path):
+        cache = np.load(cache_path, allow_pickle=False)
+        if list(cache['ids']) == ids and list(cache['queries']) == queries:
+            print(f"Using cached embeddings from {cache_path}")
+            return cache['chunks'], cache['query_vectors']
+
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    client = OpenAI(api_key=openai_api_key)
+
+    chunks = embed_all(client, texts)
+    query_vectors = embed_all(client, queries)
+    np.savez(cache_path, ids=np.array(ids), queries=np.array(queries), chunks=chunks, query_vectors=query_vectors)
+    return chunks, query_vectors
+
+def reduce_dimensions(matrix: np.ndarray, dimensions: int) -> np.ndarray:
+    """Shorten full-dimension embeddings as the `dimensions` parameter does: truncate, then renormalize."""
+    reduced = matrix[:, :dimensions]
+    norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+    return reduced / np.where(norms == 0, 1, norms)
+
+def exact_top_k(chunks: np.ndarray, queries: np.ndarray, k: int) -> List[List[int]]:
+    """Find the exact top-k chunks of each query by cosine similarity."""
+    similarities = reduce_dimensions(queries, queries.shape[1]) @ reduce_dimensions(chunks, chunks.shape[1]).T
+    return [list(np.argsort(-row)[:k]) for row in similarities]
+
+def benchmark_profile(ids: List[str], chunks: np.ndarray, queries: np.ndarray, truth: List[List[int]],
+                      dimensions: int, quantization: str, k: int) -> dict:
+    """Index a profile's vectors in a temporary local index and measure recall@k, latency and size."""
+    chunk_vectors = reduce_dimensions(chunks, dimensions)
+    query_vectors = reduce_dimensions(queries, dimensions)
+    with tempfile.TemporaryDirectory() as directory:
+        store = LocalVectorStore("benchmark", directory, quantization)
+        vectors = [{'id': vid, 'values': vector, 'metadata': {}} for vid, vector in zip(ids, chunk_vectors)]
+        for start in range(0, len(vectors), 1000):
+            store.upsert(vectors[start:start + 1000], "benchmark")
+
+        # The first query loads the namespace into memory
+        store.query("benchmark", query_vectors[0], k)
+        recalls = []
+        started = time.perf_counter()
+        for query, expected in zip(query_vectors, truth):
+            found = {match['id'] for match in store.query("benchmark", query, k)['matches']}
+            recalls.append(len(found & {ids[position] for position in expected}) / len(expected))
+        elapsed = time.perf_counter() - started
+        store.close()
+
+    return {
+        'profile': f"{dimensions}:{quantization}",
+        'recall': float(np.mean(recalls)),
+        'latency_ms': elapsed / len(query_vectors) * 1000,
+        'bytes_per_vector': len(encode_vectors(chunk_vectors[:1], quantization)[0]),
+    }
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Recall@k benchmark of embedding profiles on a stored session")
+    parser.add_argument('--session', type=str, help='Session UUID, read from downloads/<uuid>/processed_data')
+    parser.add_argument('--processed-dir', type=str, help='processed_data folder of the session (instead of --session)')
+    parser.add_argument('--profiles', type=str, default=DEFAULT_PROFILES,
+                        help='Comma-separated dimensions:quantization profiles (quantization: none, int8, binary)')
+    parser.add_argument('--queries', type=str, help='File with one query per line; sampled from the chunks otherwise')
+    parser.add_argument('--num-queries', type=int, default=50, help='Queries to sample when no file is given')
+    parser.add_argument('--top-k', type=int, default=10, help='k for recall@k')
+    args = parser.parse_args()
+
+    if not args.processed_dir and not args.session:
+        parser.error("Provide --session or --processed-dir")
+    processed_dir = args.processed_dir or os.path.join("downloads", args.session, "processed_data")
+    store_path = chunk_store_path(processed_dir)
+    if not os.path.exists(store_path):
+        print(f"Error: No chunk store found at {store_path}. Index the session first.")
+        return
+
+    profiles = parse_profiles(args.profiles)
+    with ChunkStore(store_path, readonly=True) as chunk_store:
+        ids = chunk_store.vector_ids()
+        stored = chunk_store.get(ids)
+    texts = [stored[vid]['text'] for vid in ids]
+    if args.queries:
+        with open(args.queries, 'r', encoding='utf-8') as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = sample_queries(texts, args.num_queries)
+    print(f"Benchmarking {len(profiles)} profiles on {len(ids)} chunks with {len(queries)} queries, k={args.top_k}")
+
+    chunks, query_vectors = load_embeddings(processed_dir, ids, texts, queries)
+    truth = exact_top_k(chunks, query_vectors, args.top_k)
+
+    print(f"\n{'Profile':<16}{'Recall@' + str(args.top_k):>12}{'Query ms':>12}{'Bytes/vector':>14}")
+    print("-" * 54)
+    for dimensions, quantization in profiles:
+        result = benchmark_profile(ids, chunks, query_vectors, truth, dimensions, quantization, args.top_k)
+        print(f"{result['profile']:<16}{result['recall']:>12.3f}{result['latency_ms']:>12.2f}{result['bytes_per_vector']:>14}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Local BM25 inverted index over a session's chunks, for keyword retrieval.
+
+Dense embeddings blur exact technical terms, acronyms and author names. The
+chunks indexed for a session are also tokenized into an inverted index in
+its processed_data folder, so retrieval can rank chunks by BM25 and fuse
+that ranking with the dense one by reciprocal rank fusion. Each chunk keeps
+the metadata its vector carries, so the same filters apply to keyword results.
+"""
+
+import os
+import re
+import json
+import math
+import sqlite3
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from chunk_store import vector_id, split_metadata
+from vector_store import matches_filter
+
+BM25_INDEX_FILENAME = "bm25.sqlite"
+
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Rank offset for reciprocal rank fusion of keyword and dense rankings
+RRF_K = 60
+
+# Seconds a writer waits for another process's write to finish
+BUSY_TIMEOUT = 30
+
+# Words, numbers and hyphenated or dotted terms such as gpt-4, bert-base or 3.5
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+
+# Words too common to be worth a postings list
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have if in into is it its of on or that the their
+there these this those to was were which with
+""".split())
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    vector_id TEXT PRIMARY KEY,
+    local_id TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_local_id ON chunks (local_id);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    vector_id TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, vector_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_vector_id ON postings (vector_id);
+"""
+
+def bm25_index_path(folder: str) -> str:
+    """Get the path of the BM25 index in a processed_data folder."""
+    return os.path.join(str(folder), BM25_INDEX_FILENAME)
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase index terms, dropping stopwords."""
+    return [term for term in TOKEN_PATTERN.findall(text.lower()) if term not in STOPWORDS]
+
+class BM25Index:
+    """
+    SQLite-backed BM25 inverted index of chunks.
+    """
+
+    def __init__(self, path: str, readonly: bool = False):
+        """
+        Open a BM25 index, creating it unless opened read-only.
+
+        Args:
+            path (str): Path of the database file
+            readonly (bool): Open an existing index without write access
+        """
+        self.path = str(path)
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def add(self, chunks: Iterable[Dict[str, Any]], replace_documents: bool = True):
+        """
+        Add or replace chunks.
+
+        As in the chunk store, a document's first chunk replaces all of its
+        previously indexed chunks.
+
+        Args:
+            chunks (Iterable[Dict[str, Any]]): Chunks with 'text' and 'metadata'
+            replace_documents (bool): Let first chunks replace their documents' indexed chunks
+        """
+        rows = []
+        postings = []
+        restarted = set()
+        for chunk in chunks:
+            metadata = chunk['metadata']
+            vid = vector_id(metadata)
+            local_id = str(metadata['local_id'])
+            if replace_documents and metadata.get('chunk_id') == 0:
+                restarted.add(local_id)
+            terms = Counter(tokenize(chunk['text']))
+            rows.append((vid, local_id, sum(terms.values()), json.dumps(split_metadata(metadata)[0], ensure_ascii=False)))
+            postings.extend((term, vid, tf) for term, tf in terms.items())
+
+        with self._conn:
+            for local_id in restarted:
+                self._conn.execute(
+                    "DELETE FROM postings WHERE vector_id IN (SELECT vector_id FROM chunks WHERE local_id = ?)",
+                    (local_id,)
+                )
+                self._conn.execute("DELETE FROM chunks WHERE local_id = ?", (local_id,))
+            self._conn.executemany(
+                "DELETE FROM postings WHERE vector_id = ?", [(row[0],) for row in rows]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (vector_id, local_id, length, metadata) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.executemany("INSERT INTO postings (term, vector_id, tf) VALUES (?, ?, ?)", postings)
+
+    def search(self, query: str, top_k: int, filter: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Rank chunks by BM25 for a query.
+
+        Args:
+            query (str): Query text
+            top_k (int): Number of chunks to return
+            filter (Dict[str, Any], optional): Metadata filter, in the vector store's syntax
+
+        Returns:
+            List[Tuple[str, float, Dict[str, Any]]]: Vector ID, BM25 score and metadata of the best chunks
+        """
+        terms = set(tokenize(query))
+        count, total_length = self._conn.execute("SELECT COUNT(*), SUM(length) FROM chunks").fetchone()
+        if not terms or not count:
+            return []
+        average_length = (total_length or 0) / count or 1
+
+        scores: Dict[str, float] = {}
+        metadata: Dict[str, str] = {}
+        for term in terms:
+            rows = self._conn.execute(
+                "SELECT p.vector_id, p.tf, c.length, c.metadata FROM postings p "
+                "JOIN chunks c ON c.vector_id = p.vector_id WHERE p.term = ?",
+                (term,)
+            ).fetchall()
+            if not rows:
+                continue
+            idf = math.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+            for vid, tf, length, meta in rows:
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                scores[vid] = scores.get(vid, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+                metadata[vid] = meta
+
+        results = []
+        for vid, score in sorted(scores.items(), key=lambda item: -item[1]):
+            meta = json.loads(metadata[vid])
+            if matches_filter(meta, filter):
+                results.append((vid, score, meta))
+                if len(results) >= top_k:
+                    break
+        return results
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """
+    Fuse rankings of the same items by reciprocal rank fusion.
+
+    Each item scores the sum of 1 / (k + rank) over the rankings it appears in,
+    so items ranked well by several retrievers rise to the top without their
+    incomparable raw scores being mixed.
+
+    Args:
+        rankings (List[List[str]]): Item IDs of each ranking, best first
+        k (int): Rank offset damping the weight of the top ranks
+
+    Returns:
+        List[Tuple[str, float]]: Item IDs and fused scores, best first
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda entry: -entry[1])
@@ -0,0 +1,182 @@
+"""
+Local store of chunk texts and document metadata, keyed by vector ID.
+
+Vectors in the index carry only the fields queries filter on. The chunk text,
+its page range and the document-level fields (citation, reasoning, source,
+page count) are kept once in a SQLite database in the session's
+processed_data folder, and looked up by vector ID after a query. Document
+fields are stored once per document rather than copied into every chunk.
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+from typing import List, Dict, Any, Iterable, Tuple
+
+CHUNK_STORE_FILENAME = "chunks.sqlite"
+
+# Chunk metadata kept on the vectors, for filtering
+VECTOR_FIELDS = ('local_id', 'chunk_id', 'total_chunks', 'section', 'score')
+
+# Metadata shared by every chunk of a document, stored once per document
+DOCUMENT_FIELDS = ('total_pages', 'fetched_source', 'citation', 'reasoning', 'score')
+
+# Bytes of the database file mapped into memory for reads
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Seconds a writer waits for another process's write to finish
+BUSY_TIMEOUT = 30
+
+COMPRESSION_LEVEL = 6
+
+# Variables per query, below SQLite's limit
+MAX_QUERY_IDS = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    local_id TEXT PRIMARY KEY,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    vector_id TEXT PRIMARY KEY,
+    local_id TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    text BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_local_id ON chunks (local_id);
+"""
+
+def chunk_store_path(folder: str) -> str:
+    """Get the path of the chunk store in a processed_data folder."""
+    return os.path.join(str(folder), CHUNK_STORE_FILENAME)
+
+def vector_id(metadata: Dict[str, Any]) -> str:
+    """Get the ID of a chunk's vector from its metadata."""
+    return f"{metadata['local_id']}_{metadata['chunk_id']}"
+
+def split_metadata(metadata: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Split a chunk's metadata into what goes on the vector, on the document and on the chunk.
+
+    Args:
+        metadata (Dict[str, Any]): Chunk metadata from chunking
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]: Vector, document and chunk metadata
+    """
+    vector_metadata = {key: metadata[key] for key in VECTOR_FIELDS if key in metadata}
+    document_metadata = {key: metadata[key] for key in DOCUMENT_FIELDS if key in metadata}
+    chunk_metadata = {key: value for key, value in metadata.items()
+                      if key not in DOCUMENT_FIELDS and key != 'local_id'}
+    return vector_metadata, document_metadata, chunk_metadata
+
+class ChunkStore:
+    """
+    SQLite store of chunk texts and document metadata, looked up by vector ID.
+    """
+
+    def __init__(self, path: str, readonly: bool = False):
+        """
+        Open a chunk store, creating it unless opened read-only.
+
+        Args:
+            path (str): Path of the database file
+            readonly (bool): Open an existing store without write access
+        """
+        self.path = str(path)
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def put(self, chunks: Iterable[Dict[str, Any]], replace_documents: bool = True):
+        """
+        Add or replace chunks, and the metadata of their documents.
+
+        A document's first chunk replaces all of its previously stored chunks,
+        so re-indexing a document that now splits into fewer chunks leaves
+        none behind.
+
+        Args:
+            chunks (Iterable[Dict[str, Any]]): Chunks with 'text' and 'metadata'
+            replace_documents (bool): Let first chunks replace their documents' stored chunks;
+                off when re-adding chunks out of order, e.g. retrying failed ones
+        """
+        documents = {}
+        rows = []
+        restarted = set()
+        for chunk in chunks:
+            metadata = chunk['metadata']
+            _, document_metadata, chunk_metadata = split_metadata(metadata)
+            local_id = str(metadata['local_id'])
+            documents[local_id] = document_metadata
+            if replace_documents and metadata.get('chunk_id') == 0:
+                restarted.add(local_id)
+            rows.append((vector_id(metadata), local_id, json.dumps(chunk_metadata, ensure_ascii=False),
+                         zlib.compress(chunk['text'].encode('utf-8'), COMPRESSION_LEVEL)))
+
+        with self._conn:
+            self._conn.executemany("DELETE FROM chunks WHERE local_id = ?", [(local_id,) for local_id in restarted])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (local_id, metadata) VALUES (?, ?)",
+                [(local_id, json.dumps(metadata, ensure_ascii=False)) for local_id, metadata in documents.items()]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (vector_id, local_id, metadata, text) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def vector_ids(self) -> List[str]:
+        """List the IDs of the stored chunks, sorted."""
+        return [vid for (vid,) in self._conn.execute("SELECT vector_id FROM chunks ORDER BY vector_id")]
+
+    def get(self, vector_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up chunks by vector ID.
+
+        Args:
+            vector_ids (List[str]): IDs of the vectors returned by a query
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Chunks found, by vector ID, with 'text' and 'metadata'
+                combining the document's and the chunk's fields
+        """
+        found = {}
+        vector_ids = list(dict.fromkeys(vector_ids))
+        for start in range(0, len(vector_ids), MAX_QUERY_IDS):
+            batch = vector_ids[start:start + MAX_QUERY_IDS]
+            rows = self._conn.execute(
+                "SELECT c.vector_id, c.local_id, c.metadata, c.text, d.metadata FROM chunks c "
+                "LEFT JOIN documents d ON d.local_id = c.local_id "
+                f"WHERE c.vector_id IN ({', '.join('?' * len(batch))})",
+                batch
+            )
+            for vid, local_id, chunk_metadata, text, document_metadata in rows:
+                found[vid] = {
+                    'text': zlib.decompress(text).decode('utf-8'),
+                    'metadata': {
+                        **(json.loads(document_metadata) if document_metadata else {}),
+                        **json.loads(chunk_metadata),
+                        'local_id': local_id
+                    }
+                }
+        return found
@@ -0,0 +1,261 @@
+"""
+Chunking of processed documents for embedding, run across worker processes.
+
+Each document is split in a worker process and its chunks stream back in
+document order, so indexing can embed the first batches while later documents
+are still being split. Only a small window of documents is in flight at a time,
+so memory stays bounded however large the session is.
+
+Chunk sizes are in tokens of the embedding model's encoding, and each chunk
+records its token count so embedding requests can be packed to a token budget.
+"""
+
+import bisect
+import multiprocessing
+from collections import deque
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from document_store import PAGES_DELIMITER
+from section_detector import section_at
+from pdf_worker_pool import PDFWorkerPool
+from tokenization import count_tokens, iter_token_batches, EMBEDDING_BATCH_TOKENS, EMBEDDING_BATCH_ITEMS
+
+# Tokens per chunk and shared by consecutive chunks (about 600 and 200 characters of prose)
+CHUNK_SIZE = 150
+CHUNK_OVERLAP = 50
+
+# Documents in flight per worker process
+WINDOW_PER_WORKER = 2
+
+# Fewer documents than this are chunked in the calling process
+MIN_PARALLEL_DOCUMENTS = 8
+
+# Seconds to wait for a worker to chunk a document before chunking it in this process instead
+CHUNK_TIMEOUT = 60
+
+# Splitters are reused across documents within a process
+_splitters: Dict[Tuple[int, int], RecursiveCharacterTextSplitter] = {}
+
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Get this process's text splitter for a chunk size and overlap."""
+    key = (chunk_size, chunk_overlap)
+    if key not in _splitters:
+        _splitters[key] = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=count_tokens,
+            is_separator_regex=False,
+        )
+    return _splitters[key]
+
+def chunk_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the metadata every chunk of a document carries.
+
+    Args:
+        metadata (Dict[str, Any]): The processed document's metadata
+
+    Returns:
+        Dict[str, Any]: Flat metadata with source, local ID, evaluation score, citation and reasoning
+    """
+    # Extract metadata fields including evaluation data
+    paper_metadata = metadata.get('paper_metadata', {})
+    evaluation_data = paper_metadata.get('evaluation', {})
+
+    # Ensure authors is a list of strings
+    authors = paper_metadata.get('authors', [])
+    if not isinstance(authors, list):
+        authors = []
+    authors = [str(author) for author in authors if author is not None]
+
+    # Ensure score is a number or convert to 0 if not present/invalid
+    score = evaluation_data.get('score')
+    if not isinstance(score, (int, float)) or score is None:
+        score = 0
+
+    # Get citation from evaluation data
+    citation = evaluation_data.get('citation', '')
+    if not citation or citation == 'None':
+        # Try to generate a citation if not present
+        title = paper_metadata.get('title', '')
+        year = paper_metadata.get('published', paper_metadata.get('year', ''))
+        journal = paper_metadata.get('journal', '')
+
+        if title and authors:
+            author_str = authors[0] if authors else 'Unknown'
+            if len(authors) > 1:
+                author_str += ' et al.'
+            citation = f"{author_str} ({year}). {title}"
+            if journal:
+                citation += f". {journal}"
+
+    return {
+        'total_pages': int(metadata.get('total_pages', 0)),
+        'fetched_source': str(metadata.get('fetched_source', '')),
+        'local_id': str(metadata.get('local_id', '')),
+        'score': score,
+        'citation': str(citation),
+        'reasoning': str(evaluation_data.get('reasoning', ''))
+    }
+
+def chunk_document(document: Dict[str, Any], chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> List[Dict[str, Any]]:
+    """
+    Split one processed document into chunks with page and section metadata.
+
+    Chunks are located in the page content with a cursor that only moves
+    forward, so each lookup scans from the previous chunk rather than from the
+    start of the document, and repeated passages map to the right pages.
+
+    Args:
+        document (Dict[str, Any]): Processed document with 'page_content' and 'metadata'
+        chunk_size (int): Maximum tokens per chunk
+        chunk_overlap (int): Tokens shared by consecutive chunks
+
+    Returns:
+        List[Dict[str, Any]]: Chunks with 'text' and 'metadata'
+    """
+    page_content = document.get('page_content', '')
+    metadata = document.get('metadata', {})
+    if not page_content:
+        return []
+
+    texts = _get_splitter(chunk_size, chunk_overlap).split_text(page_content)
+    filtered_metadata = chunk_metadata(metadata)
+    sections = metadata.get('sections', [])
+
+    # End offset of each page, including its delimiter
+    page_ends = []
+    position = 0
+    for page in page_content.split(PAGES_DELIMITER):
+        position += len(page) + len(PAGES_DELIMITER)
+        page_ends.append(position)
+
+    chunks = []
+    cursor = 0
+    for i, text in enumerate(texts):
+        chunk_start = page_content.find(text, cursor)
+        if chunk_start < 0:
+            chunk_start = page_content.find(text)
+        if chunk_start >= 0:
+            cursor = chunk_start + 1
+        chunk_end = chunk_start + len(text)
+
+        # Pages the chunk starts and ends on
+        if chunk_start >= 0:
+            page_start = min(bisect.bisect_right(page_ends, chunk_start), len(page_ends) - 1) + 1
+            page_end = min(bisect.bisect_left(page_ends, chunk_end), len(page_ends) - 1) + 1
+        else:
+            page_start = page_end = 1
+
+        chunks.append({
+            'text': text,
+            'metadata': {
+                **filtered_metadata,
+                'chunk_id': i,
+                'total_chunks': len(texts),
+                'page_start': page_start,
+                'page_end': page_end,
+                'section': section_at(sections, chunk_start),
+                'tokens': count_tokens(text)
+            }
+        })
+
+    return chunks
+
+def iter_document_chunks(
+    documents: Iterable[Dict[str, Any]],
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    pool: Optional[PDFWorkerPool] = None,
+    processes: Optional[int] = None
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Chunk documents in worker processes, yielding each document's chunks in document order.
+
+    If a worker does not return a document's chunks within CHUNK_TIMEOUT, that
+    document and the rest are chunked in the calling process instead.
+
+    Args:
+        documents (Iterable[Dict[str, Any]]): Processed documents; consumed lazily
+        chunk_size (int): Maximum tokens per chunk
+        chunk_overlap (int): Tokens shared by consecutive chunks
+        pool (PDFWorkerPool, optional): Persistent worker pool to reuse; a temporary one is used otherwise
+        processes (int, optional): Size of the temporary pool, defaults to the number of CPU cores
+
+    Returns:
+        Iterator[List[Dict[str, Any]]]: Chunks of each document
+    """
+    # Small batches are not worth the inter-process round trips
+    if processes == 1 or (isinstance(documents, (list, tuple)) and len(documents) < MIN_PARALLEL_DOCUMENTS):
+        for document in documents:
+            yield chunk_document(document, chunk_size, chunk_overlap)
+        return
+
+    own_pool = pool is None
+    if own_pool:
+        pool = PDFWorkerPool(processes, max_idle=0)
+    pending = deque()
+    try:
+        # Leased workers of its own, so chunking never queues behind or disturbs a PDF run
+        with pool.lease() as workers:
+            window = workers.size * WINDOW_PER_WORKER
+            inline = False
+
+            def collect():
+                nonlocal inline
+                document, task_id, async_result = pending.popleft()
+                try:
+                    return async_result.get(CHUNK_TIMEOUT)
+                except multiprocessing.TimeoutError:
+                    # A worker that died or hangs never returns; stop relying on the workers
+                    local_id = document.get('metadata', {}).get('local_id')
+                    print(f"Chunking {local_id} in a worker timed out, chunking the remaining documents inline")
+                    workers.abandon(task_id)
+                    inline = True
+                    return chunk_document(document, chunk_size, chunk_overlap)
+
+            for document in documents:
+                if inline:
+                    # Documents already handed to workers come first, to keep document order
+                    while pending:
+                        yield collect()
+                    yield chunk_document(document, chunk_size, chunk_overlap)
+                    continue
+                pending.append((document, *workers.apply_async(chunk_document, (document, chunk_size, chunk_overlap))))
+                if len(pending) >= window:
+                    yield collect()
+            while pending:
+                yield collect()
+    finally:
+        if own_pool:
+            pool.close()
+
+def iter_chunk_batches(
+    documents: Iterable[Dict[str, Any]],
+    max_tokens: int = EMBEDDING_BATCH_TOKENS,
+    max_items: int = EMBEDDING_BATCH_ITEMS,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    pool: Optional[PDFWorkerPool] = None
+) -> Iterator[Tuple[List[Dict[str, Any]], int]]:
+    """
+    Stream chunks in batches packed up to a token and item budget for embedding.
+
+    Args:
+        documents (Iterable[Dict[str, Any]]): Processed documents
+        max_tokens (int): Maximum tokens per batch
+        max_items (int): Maximum chunks per batch
+        chunk_size (int): Maximum tokens per chunk
+        chunk_overlap (int): Tokens shared by consecutive chunks
+        pool (PDFWorkerPool, optional): Persistent worker pool to reuse
+
+    Returns:
+        Iterator[Tuple[List[Dict[str, Any]], int]]: Each batch and the number of documents chunked so far
+    """
+    def numbered_chunks():
+        for documents_done, document_chunks in enumerate(iter_document_chunks(documents, chunk_size, chunk_overlap, pool), 1):
+            for chunk in document_chunks:
+                yield chunk, documents_done
+
+    for batch in iter_token_batches(numbered_chunks(), lambda item: item[0]['metadata']['tokens'], max_tokens, max_items):
+        yield [chunk for chunk, _ in batch], batch[-1][1]
@@ -0,0 +1,236 @@
+"""
+Session-level store of processed documents, replacing one indented JSON file per paper.
+
+Documents live in a single SQLite database in the session's processed_data
+folder. Metadata is kept apart from the page texts, which are stored one row
+per page and zlib-compressed, so listing documents or reading a few pages does
+not parse or decompress whole papers. The database runs in WAL mode, so PDF
+workers can write while the app reads, and is memory-mapped for reads.
+
+Sessions processed before the store existed still have processed_<id>.json
+files; the loading helpers fall back to them. Documents the processing
+manifest marks as rejected (unusable PDFs) are never loaded.
+"""
+
+import os
+import json
+import glob
+import zlib
+import sqlite3
+import time
+from typing import List, Dict, Any, Optional, Iterator
+from processing_manifest import ProcessingManifest
+
+STORE_FILENAME = "documents.sqlite"
+
+# Separator between pages in a document's page_content
+PAGES_DELIMITER = "\n<<12344567890>>\n"
+
+# Bytes of the database file mapped into memory for reads
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Seconds a writer waits for another process's write to finish
+BUSY_TIMEOUT = 30
+
+COMPRESSION_LEVEL = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    local_id TEXT PRIMARY KEY,
+    page_count INTEGER NOT NULL,
+    chars INTEGER NOT NULL,
+    metadata TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    local_id TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    text BLOB NOT NULL,
+    PRIMARY KEY (local_id, page)
+) WITHOUT ROWID;
+"""
+
+def store_path(folder: str) -> str:
+    """Get the path of the document store in a processed_data folder."""
+    return os.path.join(str(folder), STORE_FILENAME)
+
+class DocumentStore:
+    """
+    SQLite store of processed documents with per-page random access.
+    """
+
+    def __init__(self, folder: str):
+        """
+        Open (creating if needed) the store in a processed_data folder.
+
+        Args:
+            folder (str): Folder holding the store
+        """
+        os.makedirs(str(folder), exist_ok=True)
+        self.path = store_path(folder)
+        self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def __contains__(self, local_id: str) -> bool:
+        row = self._conn.execute("SELECT 1 FROM documents WHERE local_id = ?", (local_id,)).fetchone()
+        return row is not None
+
+    def put(self, local_id: str, page_texts: List[str], metadata: Dict[str, Any]):
+        """
+        Add or replace a document.
+
+        Args:
+            local_id (str): Document ID
+            page_texts (List[str]): Text of each page
+            metadata (Dict[str, Any]): Document metadata
+        """
+        chars = sum(len(text) for text in page_texts) + len(PAGES_DELIMITER) * max(0, len(page_texts) - 1)
+        pages = [(local_id, number, zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL))
+                 for number, text in enumerate(page_texts)]
+        with self._conn:
+            self._conn.execute("DELETE FROM pages WHERE local_id = ?", (local_id,))
+            self._conn.executemany("INSERT INTO pages (local_id, page, text) VALUES (?, ?, ?)", pages)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (local_id, page_count, chars, metadata, updated) VALUES (?, ?, ?, ?, ?)",
+                (local_id, len(page_texts), chars, json.dumps(metadata, ensure_ascii=False), time.time())
+            )
+
+    def delete(self, local_id: str):
+        """Remove a document."""
+        with self._conn:
+            self._conn.execute("DELETE FROM pages WHERE local_id = ?", (local_id,))
+            self._conn.execute("DELETE FROM documents WHERE local_id = ?", (local_id,))
+
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """
+        List the stored documents without reading their text.
+
+        Returns:
+            List[Dict[str, Any]]: 'local_id', 'page_count' and 'chars' of each document
+        """
+        rows = self._conn.execute("SELECT local_id, page_count, chars FROM documents ORDER BY local_id")
+        return [{'local_id': local_id, 'page_count': page_count, 'chars': chars} for local_id, page_count, chars in rows]
+
+    def get_metadata(self, local_id: str) -> Optional[Dict[str, Any]]:
+        """Get a document's metadata, or None if it is not stored."""
+        row = self._conn.execute("SELECT metadata FROM documents WHERE local_id = ?", (local_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_pages(self, local_id: str, start: int = 0, end: Optional[int] = None) -> List[str]:
+        """
+        Read a range of a document's pages.
+
+        Args:
+            local_id (str): Document ID
+            start (int): First page number (0-based)
+            end (int, optional): Page number to stop before, defaults to the last page
+
+        Returns:
+            List[str]: Page texts, in order
+        """
+        query = "SELECT text FROM pages WHERE local_id = ? AND page >= ?"
+        params = [local_id, start]
+        if end is not None:
+            query += " AND page < ?"
+            params.append(end)
+        rows = self._conn.execute(query + " ORDER BY page", params)
+        return [zlib.decompress(text).decode('utf-8') for (text,) in rows]
+
+    def get_document(self, local_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a whole document in the processed JSON layout.
+
+        Args:
+            local_id (str): Document ID
+
+        Returns:
+            Optional[Dict[str, Any]]: Document with 'page_content' and 'metadata', or None if it is not stored
+        """
+        metadata = self.get_metadata(local_id)
+        if metadata is None:
+            return None
+        return {'page_content': PAGES_DELIMITER.join(self.get_pages(local_id)), 'metadata': metadata}
+
+    def iter_documents(self) -> Iterator[Dict[str, Any]]:
+        """Yield every document in the processed JSON layout, one at a time."""
+        for entry in self.list_documents():
+            document = self.get_document(entry['local_id'])
+            if document is not None:
+                yield document
+
+def _legacy_files(folder: str) -> Dict[str, str]:
+    """Map local IDs to the processed_<id>.json files written before the store existed."""
+    files = glob.glob(os.path.join(str(folder), "processed_*.json"))
+    rejected = ProcessingManifest(str(folder), None).rejected_ids()
+    legacy = {os.path.basename(path)[len("processed_"):-len(".json")]: path for path in files}
+    return {local_id: path for local_id, path in legacy.items() if local_id not in rejected}
+
+def processed_document_ids(folder: str) -> List[str]:
+    """
+    List the IDs of the processed documents in a folder, from the store and any legacy JSON files.
+
+    Args:
+        folder (str): processed_data folder
+
+    Returns:
+        List[str]: Sorted local IDs
+    """
+    if not os.path.isdir(str(folder)):
+        return []
+    local_ids = set(_legacy_files(folder))
+    if os.path.exists(store_path(folder)):
+        with DocumentStore(folder) as store:
+            local_ids.update(entry['local_id'] for entry in store.list_documents())
+    return sorted(local_ids)
+
+def iter_processed_documents(folder: str, metadata_only: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the processed documents in a folder, reading the store first and legacy JSON files second.
+
+    A document in both is read from the store.
+
+    Args:
+        folder (str): processed_data folder
+        metadata_only (bool): Skip the page text; documents then have only 'metadata'
+
+    Returns:
+        Iterator[Dict[str, Any]]: Documents in the processed JSON layout
+    """
+    seen = set()
+    if os.path.exists(store_path(folder)):
+        with DocumentStore(folder) as store:
+            for entry in store.list_documents():
+                seen.add(entry['local_id'])
+                if metadata_only:
+                    yield {'metadata': store.get_metadata(entry['local_id'])}
+                else:
+                    yield store.get_document(entry['local_id'])
+
+    for local_id, path in sorted(_legacy_files(folder).items()):
+        if local_id in seen:
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading {path}: {e}")
+            continue
+        if metadata_only:
+            document = {'metadata': document.get('metadata', {})}
+        yield document
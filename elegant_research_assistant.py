@@ -22,7 +22,6 @@ load_dotenv()
 
 # Third-party imports
 import pinecone
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.schema import HumanMessage
 from openai import OpenAI
@@ -35,11 +34,20 @@ if current_dir not in sys.path:
 # Import project modules
 from research_paper_downloader.fetch_and_download_flow import process_query
 from pdf_processor_pymupdf import process_pdfs, print_summary
+from pdf_worker_pool import PDFWorkerPool
+from document_store import iter_processed_documents, processed_document_ids
+from near_duplicates import collapse_near_duplicates
+from document_chunking import iter_document_chunks
+from indexing_pipeline import index_documents, retry_dead_letters
+from chunk_store import ChunkStore, chunk_store_path
+from bm25_index import BM25Index, bm25_index_path
+from indexing_checkpoint import IndexingCheckpoint
+from vector_store import get_vector_store, VECTOR_STORE_BACKEND
+from tokenization import EMBEDDING_BATCH_TOKENS, EMBEDDING_BATCH_ITEMS
 
 # Constants
-CHUNK_SIZE = 600
-CHUNK_OVERLAP = 200
-BATCH_SIZE = 100
+CHUNK_SIZE = 150  # tokens
+CHUNK_OVERLAP = 50  # tokens
 EMBEDDING_MODEL = "text-embedding-3-large"
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
@@ -283,6 +291,17 @@ def setup_streamlit_config():
     os.environ['STREAMLIT_BROWSER_GATHER_USAGE_STATS'] = 'false'
     return available_port
 
+@st.cache_resource
+def get_pdf_worker_pool() -> PDFWorkerPool:
+    """Persistent PDF worker pool shared by all runs of this app process; workers start on first use."""
+    return PDFWorkerPool()
+
+def render_pdf_worker_stats():
+    """Show the PDF worker pool's size and queue depth in the sidebar."""
+    stats = get_pdf_worker_pool().stats()
+    state = "warm" if stats['started'] else "not started"
+    st.caption(f"PDF workers: {stats['size']} ({state}) · queue: {stats['queue_depth']} · processed: {stats['completed']}")
+
 def update_process_status(process_name, status, message):
     """Update the process status in the session state."""
     if process_name in st.session_state.process_status:
@@ -317,14 +336,7 @@ def check_pinecone_namespace(namespace: str) -> Dict[str, Any]:
         return result
     
     try:
-        # Initialize Pinecone
-        pinecone_api_key = os.getenv("PINECONE_API_KEY")
-        if not pinecone_api_key:
-            result["error"] = "PINECONE_API_KEY not found in environment variables"
-            return result
-            
-        pc = pinecone.Pinecone(api_key=pinecone_api_key)
-        index = pc.Index("deepresearchreviewbot")
+        index = get_vector_store()
         
         # Get index stats
         stats = index.describe_index_stats()
@@ -414,125 +426,18 @@ def generate_query_suggestions(query: str) -> List[str]:
         ] 
 
 def load_processed_data(processed_data_folder: str) -> List[Dict[str, Any]]:
-    """Load all processed PDF data from a folder."""
-    processed_files = glob.glob(os.path.join(processed_data_folder, "processed_*.json"))
+    """Load all processed PDF data from a folder's document store, falling back to processed_*.json files."""
+    documents = list(iter_processed_documents(processed_data_folder))
     
-    if not processed_files:
+    if not documents:
         raise ValueError(f"No processed PDF data found in {processed_data_folder}")
     
-    documents = []
-    for file_path in processed_files:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                documents.append(data)
-        except Exception as e:
-            print(f"Error loading {file_path}: {e}")
-    
     return documents
 
 def chunk_documents(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Split documents into chunks for embedding and indexing."""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        length_function=len,
-        is_separator_regex=False,
-    )
-    
-    chunks = []
-    for doc in documents:
-        page_content = doc.get('page_content', '')
-        metadata = doc.get('metadata', {})
-        
-        if not page_content:
-            continue
-        
-        texts = text_splitter.split_text(page_content)
-        
-        # Extract metadata fields including evaluation data
-        paper_metadata = metadata.get('paper_metadata', {})
-        evaluation_data = paper_metadata.get('evaluation', {})
-        
-        # Ensure authors is a list of strings
-        authors = paper_metadata.get('authors', [])
-        if not isinstance(authors, list):
-            authors = []
-        authors = [str(author) for author in authors if author is not None]
-        
-        # Ensure score is a number or convert to 0 if not present/invalid
-        score = evaluation_data.get('score')
-        if not isinstance(score, (int, float)) or score is None:
-            score = 0
-        
-        # Get citation from evaluation data
-        citation = evaluation_data.get('citation', '')
-        if not citation or citation == 'None':
-            # Try to generate a citation if not present
-            title = paper_metadata.get('title', '')
-            year = paper_metadata.get('published', paper_metadata.get('year', ''))
-            journal = paper_metadata.get('journal', '')
-            
-            if title and authors:
-                author_str = authors[0] if authors else 'Unknown'
-                if len(authors) > 1:
-                    author_str += ' et al.'
-                citation = f"{author_str} ({year}). {title}"
-                if journal:
-                    citation += f". {journal}"
-        
-        filtered_metadata = {
-            'total_pages': int(metadata.get('total_pages', 0)),
-            'fetched_source': str(metadata.get('fetched_source', '')),
-            'local_id': str(metadata.get('local_id', '')),
-            'score': score,
-            'citation': str(citation),
-            'reasoning': str(evaluation_data.get('reasoning', ''))
-        }
-        
-        # Split content by page delimiter to get page boundaries
-        pages = page_content.split('\n<<12344567890>>\n')
-        page_boundaries = []
-        current_pos = 0
-        
-        # Calculate the character position of each page boundary
-        for page in pages:
-            page_len = len(page) + len('\n<<12344567890>>\n')  # Include delimiter length
-            page_boundaries.append((current_pos, current_pos + page_len))
-            current_pos += page_len
-        
-        for i, text in enumerate(texts):
-            # Find the start position of this chunk in the original content
-            chunk_start = page_content.find(text)
-            chunk_end = chunk_start + len(text)
-            
-            # Find which pages this chunk spans
-            page_start = 1
-            page_end = 1
-            
-            for page_num, (page_start_pos, page_end_pos) in enumerate(page_boundaries, 1):
-                if chunk_start < page_end_pos:
-                    page_start = page_num
-                    break
-            
-            for page_num, (page_start_pos, page_end_pos) in enumerate(page_boundaries, 1):
-                if chunk_end <= page_end_pos:
-                    page_end = page_num
-                    break
-            
-            chunk = {
-                'text': text,
-                'metadata': {
-                    **filtered_metadata,
-                    'chunk_id': i,
-                    'total_chunks': len(texts),
-                    'page_start': page_start,
-                    'page_end': page_end
-                }
-            }
-            chunks.append(chunk)
-    
-    return chunks
+    return [chunk for document_chunks in iter_document_chunks(documents, CHUNK_SIZE, CHUNK_OVERLAP)
+            for chunk in document_chunks]
 
 def index_documents_in_pinecone(processed_dir, namespace, sidebar_status_container=None):
     """
@@ -554,84 +459,58 @@ def index_documents_in_pinecone(processed_dir, namespace, sidebar_status_contain
         return True
     
     try:
-        # Import necessary functions
-        from final_script import load_processed_data, chunk_documents
-        import time
-        
-        # Initialize Pinecone and OpenAI
-        pinecone_api_key = os.getenv("PINECONE_API_KEY")
+        # Initialize the vector store and OpenAI
         openai_api_key = os.getenv("OPENAI_API_KEY")
         
-        if not pinecone_api_key or not openai_api_key:
-            error_msg = "PINECONE_API_KEY or OPENAI_API_KEY not found in environment variables"
+        if not openai_api_key:
+            error_msg = "OPENAI_API_KEY not found in environment variables"
             print(error_msg)
             if sidebar_status_container:
                 sidebar_status_container.error(error_msg)
             return False
             
-        pc = pinecone.Pinecone(api_key=pinecone_api_key)
         client = OpenAI(api_key=openai_api_key)
-        index = pc.Index("deepresearchreviewbot")
+        index = get_vector_store()
         
         # Load and chunk documents
         if sidebar_status_container:
             sidebar_status_container.info("Loading and chunking documents...")
         
         documents = load_processed_data(processed_dir)
-        chunks = chunk_documents(documents)
         
-        # Process in batches
-        BATCH_SIZE = 100
-        total_chunks = len(chunks)
+        # The same paper from two sources (or as preprint and published version) is embedded once
+        documents, duplicates = collapse_near_duplicates(documents)
+        if duplicates:
+            print(f"Skipping near-duplicate documents: {duplicates}")
+            if sidebar_status_container:
+                sidebar_status_container.info(f"Skipping {len(duplicates)} near-duplicate documents")
         
+        # Chunks stream from the worker pool straight into embedding batches
         if sidebar_status_container:
-            sidebar_status_container.info(f"Indexing {total_chunks} chunks in batches of {BATCH_SIZE}...")
+            sidebar_status_container.info(f"Indexing {len(documents)} documents in batches of up to {EMBEDDING_BATCH_TOKENS} tokens...")
         
-        for i in range(0, total_chunks, BATCH_SIZE):
-            batch = chunks[i:i+BATCH_SIZE]
-            
-            # Get embeddings for the batch
-            texts = [chunk['text'] for chunk in batch]
-            try:
-                response = client.embeddings.create(
-                    model="text-embedding-3-large",
-                    input=texts
-                )
-                embeddings = [embedding.embedding for embedding in response.data]
-            except Exception as e:
-                error_msg = f"Error getting embeddings from OpenAI: {str(e)}"
-                print(error_msg)
-                if sidebar_status_container:
-                    sidebar_status_container.error(error_msg)
-                return False
-            
-            # Prepare vectors for upsert
-            vectors = []
-            for idx, (chunk, embedding) in enumerate(zip(batch, embeddings)):
-                vectors.append({
-                    'id': f"{chunk['metadata']['local_id']}_{chunk['metadata']['chunk_id']}",
-                    'values': embedding,
-                    'metadata': {
-                        **chunk['metadata'],
-                        'text': chunk['text']
-                    }
-                })
-            
-            # Upsert to Pinecone
-            index.upsert(
-                vectors=vectors,
-                namespace=namespace
-            )
-            
-            # Update progress
-            progress = min(100, int((i + len(batch)) / total_chunks * 100))
+        def report_progress(indexed, documents_done):
+            progress = min(100, int(documents_done / len(documents) * 100))
             if sidebar_status_container:
-                sidebar_status_container.info(f"Indexing progress: {progress}% ({i + len(batch)}/{total_chunks} chunks)")
-            
-            time.sleep(0.5)  # Rate limiting
-        
+                sidebar_status_container.info(f"Indexing progress: {progress}% ({documents_done}/{len(documents)} documents, {indexed} chunks)")
+        
+        # Vectors hold only filterable fields; texts and document metadata go to the local chunk store,
+        # and chunks are also indexed for keyword search. An interrupted run resumes from its checkpoint.
+        checkpoint = IndexingCheckpoint(processed_dir, namespace)
+        with ChunkStore(chunk_store_path(processed_dir)) as chunk_store, BM25Index(bm25_index_path(processed_dir)) as bm25_index:
+            result = index_documents(documents, index, client, namespace, chunk_store, bm25_index,
+                                     chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+                                     max_batch_tokens=EMBEDDING_BATCH_TOKENS, max_batch_items=EMBEDDING_BATCH_ITEMS,
+                                     pool=get_pdf_worker_pool(), on_progress=report_progress,
+                                     checkpoint=checkpoint, resume=True)
+        
+        if result.failed:
+            print(f"{result.failed} chunks failed to index and were written to {result.dead_letter_path}")
+            if sidebar_status_container:
+                sidebar_status_container.warning(f"{result.failed} chunks failed to index and were skipped")
         if sidebar_status_container:
-            sidebar_status_container.success(f"Successfully indexed {total_chunks} chunks in Pinecone namespace: {namespace}")
+            resumed = f" (resumed after batch {result.resumed_from})" if result.resumed_from else ""
+            sidebar_status_container.success(f"Successfully indexed {result.indexed} chunks in Pinecone namespace: {namespace}{resumed}")
         
         return True
     except Exception as e:
@@ -642,6 +521,45 @@ def index_documents_in_pinecone(processed_dir, namespace, sidebar_status_contain
         traceback.print_exc()
         return False
 
+def retry_failed_chunks(processed_dir, namespace, sidebar_status_container=None):
+    """
+    Index the chunks a previous indexing run failed on.
+    
+    Args:
+        processed_dir (str): Directory containing processed documents
+        namespace (str): Namespace to use in Pinecone
+        sidebar_status_container: Optional Streamlit container for status updates
+        
+    Returns:
+        bool: True if every failed chunk is now indexed, False otherwise
+    """
+    try:
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+        if not openai_api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        
+        client = OpenAI(api_key=openai_api_key)
+        index = get_vector_store()
+        
+        checkpoint = IndexingCheckpoint(processed_dir, namespace)
+        with ChunkStore(chunk_store_path(processed_dir)) as chunk_store, BM25Index(bm25_index_path(processed_dir)) as bm25_index:
+            result = retry_dead_letters(index, client, namespace, chunk_store, checkpoint, bm25_index,
+                                        max_batch_tokens=EMBEDDING_BATCH_TOKENS, max_batch_items=EMBEDDING_BATCH_ITEMS)
+        
+        if sidebar_status_container:
+            if result.failed:
+                sidebar_status_container.warning(f"Recovered {result.indexed} chunks; {result.failed} failed again")
+            else:
+                sidebar_status_container.success(f"Recovered all {result.indexed} failed chunks")
+        return not result.failed
+    except Exception as e:
+        error_msg = f"Error retrying failed chunks: {str(e)}"
+        print(error_msg)
+        if sidebar_status_container:
+            sidebar_status_container.error(error_msg)
+        traceback.print_exc()
+        return False
+
 async def process_query(query, sidebar_status_container, research_level=40):
     """
     Process a query to search for papers and download them.
@@ -729,8 +647,8 @@ async def process_query(query, sidebar_status_container, research_level=40):
             pdf_folder=papers_dir,
             output_folder=processed_dir,
             search_results_file=search_results_file,
-            processes=3,
-            remove_stopwords=False
+            remove_stopwords=False,
+            pool=get_pdf_worker_pool()
         )
         
         # Update status
@@ -902,6 +820,11 @@ def handle_session_retrieval(uuid_input, sidebar_status_container):
                 sidebar_status_container.warning(f"Could not verify Pinecone indexing status: {namespace_status['error']}")
                 st.session_state.pinecone_indexed = False
                 st.session_state.pinecone_namespace = uuid_input
+            elif IndexingCheckpoint(processed_dir, uuid_input).interrupted:
+                # Some vectors are there, but not all of them
+                st.session_state.pinecone_indexed = False
+                st.session_state.pinecone_namespace = uuid_input
+                sidebar_status_container.warning("Indexing was interrupted before it finished. Use Resume Indexing to index the rest.")
             elif namespace_status["exists"]:
                 if namespace_status["vector_count"] > 0:
                     st.session_state.pinecone_indexed = True
@@ -1102,24 +1025,22 @@ def generate_simple_review(processed_dir, topic, output_path, sidebar_status_con
         sidebar_status_container.error(f"Processed directory not found: {processed_dir}")
         raise FileNotFoundError(f"Processed directory not found: {processed_dir}")
     
-    # Get all JSON files in the processed directory
-    json_files = [f for f in os.listdir(processed_dir) if f.endswith('.json')]
+    # List the processed documents in the session's document store (and any older JSON files)
+    document_ids = processed_document_ids(processed_dir)
     
-    if not json_files:
+    if not document_ids:
         sidebar_status_container.error("No processed documents found.")
         raise FileNotFoundError("No processed documents found.")
     
-    sidebar_status_container.info(f"Found {len(json_files)} processed documents.")
+    sidebar_status_container.info(f"Found {len(document_ids)} processed documents.")
     
-    # Load all documents
+    # The review only uses paper metadata, so the page text is never read
     documents = []
-    for json_file in json_files:
-        try:
-            with open(os.path.join(processed_dir, json_file), 'r', encoding='utf-8') as f:
-                doc = json.load(f)
-                documents.append(doc)
-        except Exception as e:
-            sidebar_status_container.warning(f"Error loading document {json_file}: {str(e)}")
+    try:
+        for doc in iter_processed_documents(processed_dir, metadata_only=True):
+            documents.append(doc)
+    except Exception as e:
+        sidebar_status_container.warning(f"Error loading documents: {str(e)}")
     
     if not documents:
         sidebar_status_container.error("No documents could be loaded.")
@@ -1127,16 +1048,16 @@ def generate_simple_review(processed_dir, topic, output_path, sidebar_status_con
     
     sidebar_status_container.info(f"Successfully loaded {len(documents)} documents.")
     
-    # Extract metadata and content from documents
+    # Extract metadata from documents
     paper_data = []
     for doc in documents:
+        paper_metadata = doc.get('metadata', {}).get('paper_metadata') or {}
         paper_info = {
-            'title': doc.get('title', 'Unknown Title'),
-            'authors': doc.get('authors', []),
-            'year': doc.get('year', 'Unknown Year'),
-            'abstract': doc.get('abstract', ''),
-            'summary': doc.get('summary', ''),
-            'content': doc.get('content', '')
+            'title': paper_metadata.get('title') or 'Unknown Title',
+            'authors': [str(author) for author in paper_metadata.get('authors') or [] if author is not None],
+            'year': paper_metadata.get('year') or paper_metadata.get('published') or 'Unknown Year',
+            'abstract': paper_metadata.get('abstract') or '',
+            'summary': paper_metadata.get('summary') or ''
         }
         paper_data.append(paper_info)
     
@@ -1244,8 +1165,14 @@ def test_pinecone_api_key(api_key):
         return False
 
 def initialize_pinecone():
-    """Initialize Pinecone with API key if available."""
+    """Initialize Pinecone with API key if available, or the local vector index if VECTOR_STORE_BACKEND=local."""
     try:
+        if VECTOR_STORE_BACKEND == "local":
+            get_vector_store()
+            st.session_state.pinecone_initialized = True
+            print("Local vector index initialized successfully.")
+            return
+        
         # Try to get a working Pinecone API key
         api_key = get_working_pinecone_api_key()
         
@@ -1310,6 +1237,22 @@ def render_sidebar():
                     st.rerun()
                 else:
                     st.sidebar.warning("Please enter a topic for the review paper.")
+            
+            # Indexing that was interrupted, or left chunks behind, can be finished from here
+            if st.session_state.pinecone_initialized:
+                checkpoint = IndexingCheckpoint(st.session_state.processed_dir, st.session_state.chat_id)
+                if checkpoint.interrupted:
+                    st.caption(f"Indexing was interrupted after {checkpoint.chunks_indexed} chunks.")
+                    if st.button("▶️ Resume Indexing", key="sidebar_resume_indexing"):
+                        if index_documents_in_pinecone(st.session_state.processed_dir, st.session_state.chat_id, st.sidebar):
+                            st.session_state.pinecone_indexed = True
+                            st.session_state.pinecone_namespace = st.session_state.chat_id
+                
+                failed_chunks = checkpoint.dead_letter_count()
+                if failed_chunks:
+                    st.caption(f"{failed_chunks} chunks failed to index.")
+                    if st.button(f"🔁 Retry {failed_chunks} Failed Chunks", key="sidebar_retry_failed_chunks"):
+                        retry_failed_chunks(st.session_state.processed_dir, st.session_state.chat_id, st.sidebar)
         
         st.divider()
         
@@ -1332,6 +1275,8 @@ def render_sidebar():
                 elif status == 'error':
                     st.error(f"❌ {process.capitalize()}: {message}")
         
+        render_pdf_worker_stats()
+        
         # Add some space
         st.divider()
         
@@ -1462,7 +1407,8 @@ def generate_review(topic: str, namespace: str, output_dir: str, verbose: bool =
             "--topic", topic,
             "--namespace", namespace,
             "--output", os.path.abspath(output_path),  # Use absolute path for output
-            "--index-name", "deepresearchreviewbot"
+            "--index-name", "deepresearchreviewbot",
+            "--chunk-store", os.path.abspath(chunk_store_path(os.path.join(output_dir, "processed_data")))
         ]
         
         # Set up environment with UTF-8 encoding for Windows
@@ -0,0 +1,61 @@
+"""
+Embedding profile shared by indexing and querying.
+
+text-embedding-3-large returns 3072-d vectors, but accepts a `dimensions`
+parameter that shortens them with little loss of retrieval quality. The
+profile sets the dimensions (EMBEDDING_DIMENSIONS) and, for the local vector
+index, how vectors are quantized in storage (EMBEDDING_QUANTIZATION: none,
+int8 or binary). Documents and queries must be embedded with the same
+profile, and a Pinecone index holds one dimension only, so reduced profiles
+use their own index, named after the dimensions.
+
+Run benchmark_embeddings.py on a session to compare profiles.
+"""
+
+import os
+from typing import List, Optional
+
+EMBEDDING_MODEL = "text-embedding-3-large"
+FULL_DIMENSIONS = 3072
+
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", FULL_DIMENSIONS))
+
+QUANTIZATIONS = ("none", "int8", "binary")
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "none").lower()
+
+def profile_index_name(index_name: str, dimensions: int = EMBEDDING_DIMENSIONS) -> str:
+    """
+    Get the name of the index holding vectors of a profile's dimensions.
+
+    Args:
+        index_name (str): Index name of the full-dimension profile
+        dimensions (int): Profile dimensions
+
+    Returns:
+        str: The index name, suffixed with the dimensions unless they are the full ones
+    """
+    if dimensions == FULL_DIMENSIONS:
+        return index_name
+    return f"{index_name}-{dimensions}"
+
+def embed_texts(client, texts: List[str], dimensions: Optional[int] = None) -> List[List[float]]:
+    """
+    Embed a batch of texts with the embedding profile.
+
+    Args:
+        client: OpenAI client
+        texts (List[str]): Texts to embed
+        dimensions (int, optional): Vector dimensions, defaults to EMBEDDING_DIMENSIONS
+
+    Returns:
+        List[List[float]]: One embedding per text
+    """
+    dimensions = dimensions or EMBEDDING_DIMENSIONS
+    request = {'model': EMBEDDING_MODEL, 'input': texts}
+    if dimensions != FULL_DIMENSIONS:
+        request['dimensions'] = dimensions
+    try:
+        response = client.embeddings.create(**request)
+        return [embedding.embedding for embedding in response.data]
+    except Exception as e:
+        raise Exception(f"Error getting embeddings from OpenAI: {str(e)}")
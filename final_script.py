@@ -15,9 +15,7 @@ import random
 import uuid
 import argparse
 import json
-from typing import Dict, Any, List
-import pinecone
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import Dict, Any, List, Optional
 from tqdm import tqdm
 import glob
 import time
@@ -31,11 +29,21 @@ if current_dir not in sys.path:
 
 from research_paper_downloader.fetch_and_download_flow import process_query
 from pdf_processor_pymupdf import process_pdfs, print_summary
+from pdf_worker_pool import PDFWorkerPool
+from document_store import iter_processed_documents, processed_document_ids
+from near_duplicates import collapse_near_duplicates
+from document_chunking import iter_document_chunks
+from indexing_pipeline import index_documents, retry_dead_letters
+from chunk_store import ChunkStore, chunk_store_path
+from bm25_index import BM25Index, bm25_index_path
+from indexing_checkpoint import IndexingCheckpoint
+from vector_store import get_vector_store, VECTOR_STORE_BACKEND
+from embedding_profile import embed_texts
+from tokenization import EMBEDDING_BATCH_TOKENS, EMBEDDING_BATCH_ITEMS
 
 # Constants for Pinecone integration
-CHUNK_SIZE = 600
-CHUNK_OVERLAP = 200
-BATCH_SIZE = 100
+CHUNK_SIZE = 150  # tokens
+CHUNK_OVERLAP = 50  # tokens
 EMBEDDING_MODEL = "text-embedding-3-large"
 
 class StreamToExpander:
@@ -56,226 +64,111 @@ class StreamToExpander:
         pass
 
 def load_processed_data(processed_data_folder: str) -> List[Dict[str, Any]]:
-    """Load all processed PDF data from a folder."""
-    processed_files = glob.glob(os.path.join(processed_data_folder, "processed_*.json"))
+    """Load all processed PDF data from a folder's document store, falling back to processed_*.json files."""
+    documents = list(iter_processed_documents(processed_data_folder))
     
-    if not processed_files:
+    if not documents:
         raise ValueError(f"No processed PDF data found in {processed_data_folder}")
     
-    documents = []
-    for file_path in processed_files:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                documents.append(data)
-        except Exception as e:
-            print(f"Error loading {file_path}: {e}")
-    
     return documents
 
 def chunk_documents(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Split documents into chunks for embedding and indexing."""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        length_function=len,
-        is_separator_regex=False,
-    )
-    
-    chunks = []
-    for doc in documents:
-        page_content = doc.get('page_content', '')
-        metadata = doc.get('metadata', {})
-        
-        if not page_content:
-            continue
-        
-        texts = text_splitter.split_text(page_content)
-        
-        # Extract metadata fields including evaluation data
-        paper_metadata = metadata.get('paper_metadata', {})
-        evaluation_data = paper_metadata.get('evaluation', {})
-        
-        # Ensure authors is a list of strings
-        authors = paper_metadata.get('authors', [])
-        if not isinstance(authors, list):
-            authors = []
-        authors = [str(author) for author in authors if author is not None]
-        
-        # Ensure score is a number or convert to 0 if not present/invalid
-        score = evaluation_data.get('score')
-        if not isinstance(score, (int, float)) or score is None:
-            score = 0
-        
-        # Get citation from evaluation data
-        citation = evaluation_data.get('citation', '')
-        if not citation or citation == 'None':
-            # Try to generate a citation if not present
-            title = paper_metadata.get('title', '')
-            year = paper_metadata.get('published', paper_metadata.get('year', ''))
-            journal = paper_metadata.get('journal', '')
-            
-            if title and authors:
-                author_str = authors[0] if authors else 'Unknown'
-                if len(authors) > 1:
-                    author_str += ' et al.'
-                citation = f"{author_str} ({year}). {title}"
-                if journal:
-                    citation += f". {journal}"
-        
-        filtered_metadata = {
-            'total_pages': int(metadata.get('total_pages', 0)),
-            'fetched_source': str(metadata.get('fetched_source', '')),
-            'local_id': str(metadata.get('local_id', '')),
-            # 'title': str(paper_metadata.get('title', '')),
-            # 'authors': authors,
-            # Add evaluation metadata with proper type handling
-            'score': score,
-            'citation': str(citation),
-            'reasoning': str(evaluation_data.get('reasoning', ''))
-        }
-        
-        # Split content by page delimiter to get page boundaries
-        pages = page_content.split('\n<<12344567890>>\n')
-        page_boundaries = []
-        current_pos = 0
-        
-        # Calculate the character position of each page boundary
-        for page in pages:
-            page_len = len(page) + len('\n<<12344567890>>\n')  # Include delimiter length
-            page_boundaries.append((current_pos, current_pos + page_len))
-            current_pos += page_len
-        
-        for i, text in enumerate(texts):
-            # Find the start position of this chunk in the original content
-            chunk_start = page_content.find(text)
-            chunk_end = chunk_start + len(text)
-            
-            # Find which pages this chunk spans
-            page_start = 1
-            page_end = 1
-            
-            for page_num, (page_start_pos, page_end_pos) in enumerate(page_boundaries, 1):
-                if chunk_start < page_end_pos:
-                    page_start = page_num
-                    break
-            
-            for page_num, (page_start_pos, page_end_pos) in enumerate(page_boundaries, 1):
-                if chunk_end <= page_end_pos:
-                    page_end = page_num
-                    break
-            
-            chunk = {
-                'text': text,
-                'metadata': {
-                    **filtered_metadata,
-                    'chunk_id': i,
-                    'total_chunks': len(texts),
-                    'page_start': page_start,
-                    'page_end': page_end
-                }
-            }
-            chunks.append(chunk)
-    
-    return chunks
+    return [chunk for document_chunks in iter_document_chunks(documents, CHUNK_SIZE, CHUNK_OVERLAP)
+            for chunk in document_chunks]
 
-def index_documents_in_pinecone(processed_data_folder: str, namespace: str) -> None:
-    """Index processed documents in Pinecone using the chat UUID as namespace."""
-    # Initialize Pinecone and OpenAI
-    pinecone_api_key = os.getenv("PINECONE_API_KEY")
+def index_documents_in_pinecone(processed_data_folder: str, namespace: str, pool: Optional[PDFWorkerPool] = None,
+                                resume: bool = True) -> None:
+    """Index processed documents in Pinecone using the chat UUID as namespace, chunking in the given worker pool if any
+    and resuming an interrupted run unless resume is False."""
+    # Initialize the vector store and OpenAI
     openai_api_key = os.getenv("OPENAI_API_KEY")
     
-    if not pinecone_api_key or not openai_api_key:
-        raise ValueError("PINECONE_API_KEY or OPENAI_API_KEY not found in environment variables")
+    if not openai_api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-    pc = pinecone.Pinecone(api_key=pinecone_api_key)
     client = OpenAI(api_key=openai_api_key)
-    index = pc.Index("deepresearchreviewbot")
+    index = get_vector_store()
     
     # Load and chunk documents
     documents = load_processed_data(processed_data_folder)
-    chunks = chunk_documents(documents)
     
-    # Process in batches
-    total_chunks = len(chunks)
-    for i in range(0, total_chunks, BATCH_SIZE):
-        batch = chunks[i:i+BATCH_SIZE]
-        
-        # Get embeddings for the batch
-        texts = [chunk['text'] for chunk in batch]
-        try:
-            response = client.embeddings.create(
-                model="text-embedding-3-large",
-                input=texts
-            )
-            embeddings = [embedding.embedding for embedding in response.data]
-        except Exception as e:
-            raise Exception(f"Error getting embeddings from OpenAI: {str(e)}")
-        
-        # Prepare vectors for upsert
-        vectors = []
-        for idx, (chunk, embedding) in enumerate(zip(batch, embeddings)):
-            vectors.append({
-                'id': f"{chunk['metadata']['local_id']}_{chunk['metadata']['chunk_id']}",
-                'values': embedding,
-                'metadata': {
-                    **chunk['metadata'],
-                    'text': chunk['text']
-                }
-            })
-        
-        # Upsert to Pinecone
-        index.upsert(
-            vectors=vectors,
-            namespace=namespace
-        )
+    # The same paper from two sources (or as preprint and published version) is embedded once
+    documents, duplicates = collapse_near_duplicates(documents)
+    for duplicate_id, original_id in duplicates.items():
+        print(f"Skipping {duplicate_id}: near-duplicate of {original_id}")
+    
+    # Chunks stream from the worker pool straight into embedding batches
+    # Vectors hold only filterable fields; texts and document metadata go to the local chunk store,
+    # and chunks are also indexed for keyword search. Progress is checkpointed after every batch.
+    checkpoint = IndexingCheckpoint(processed_data_folder, namespace)
+    with ChunkStore(chunk_store_path(processed_data_folder)) as chunk_store, BM25Index(bm25_index_path(processed_data_folder)) as bm25_index:
+        result = index_documents(documents, index, client, namespace, chunk_store, bm25_index,
+                                 chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+                                 max_batch_tokens=EMBEDDING_BATCH_TOKENS, max_batch_items=EMBEDDING_BATCH_ITEMS,
+                                 pool=pool, checkpoint=checkpoint, resume=resume)
+    print(f"Indexed {result.indexed} chunks from {len(documents)} documents in namespace {namespace}")
+    if result.failed:
+        print(f"{result.failed} chunks failed to index and were written to {result.dead_letter_path}")
+
+def retry_failed_chunks(processed_data_folder: str, namespace: str) -> int:
+    """Index the chunks a previous indexing run dead-lettered, returning how many still fail."""
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    
+    if not openai_api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-        time.sleep(0.5)  # Rate limiting
+    client = OpenAI(api_key=openai_api_key)
+    index = get_vector_store()
+    
+    checkpoint = IndexingCheckpoint(processed_data_folder, namespace)
+    with ChunkStore(chunk_store_path(processed_data_folder)) as chunk_store, BM25Index(bm25_index_path(processed_data_folder)) as bm25_index:
+        result = retry_dead_letters(index, client, namespace, chunk_store, checkpoint, bm25_index,
+                                    max_batch_tokens=EMBEDDING_BATCH_TOKENS, max_batch_items=EMBEDDING_BATCH_ITEMS)
+    print(f"Recovered {result.indexed} failed chunks in namespace {namespace}, {result.failed} still failing")
+    return result.failed
 
 def query_pinecone(query: str, namespace: str, top_k: int = 5) -> Dict[str, Any]:
     """Query Pinecone index using the specified namespace."""
-    # Initialize Pinecone and OpenAI
-    pinecone_api_key = os.getenv("PINECONE_API_KEY")
+    # Initialize the vector store and OpenAI
     openai_api_key = os.getenv("OPENAI_API_KEY")
     
-    if not pinecone_api_key or not openai_api_key:
-        raise ValueError("PINECONE_API_KEY or OPENAI_API_KEY not found in environment variables")
+    if not openai_api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-    pc = pinecone.Pinecone(api_key=pinecone_api_key)
     client = OpenAI(api_key=openai_api_key)
-    index = pc.Index("deepresearchreviewbot")
+    index = get_vector_store()
     
-    # Get query embedding
-    try:
-        response = client.embeddings.create(
-            model="text-embedding-3-large",
-            input=[query]
-        )
-        query_embedding = response.data[0].embedding
-    except Exception as e:
-        raise Exception(f"Error getting embedding from OpenAI: {str(e)}")
+    # Get query embedding, with the same profile the documents were embedded with
+    query_embedding = embed_texts(client, [query])[0]
     
     # Query the index
     response = index.query(
         namespace=namespace,
         vector=query_embedding,
         top_k=top_k,
-        include_values=True,
         include_metadata=True
     )
     
     return response
 
-def format_pinecone_results(results: Dict[str, Any]) -> str:
-    """Format Pinecone query results for display."""
+def format_pinecone_results(results: Dict[str, Any], processed_data_folder: Optional[str] = None) -> str:
+    """Format Pinecone query results for display, reading chunk texts and document metadata from the session's chunk store."""
     if not results or not results.get('matches'):
         return "No results found."
     
+    stored = {}
+    if processed_data_folder and os.path.exists(chunk_store_path(processed_data_folder)):
+        with ChunkStore(chunk_store_path(processed_data_folder), readonly=True) as chunk_store:
+            stored = chunk_store.get([match['id'] for match in results['matches']])
+    
     formatted = []
     for i, match in enumerate(results['matches'], 1):
         score = match['score']
-        metadata = match['metadata']
-        text = match.get('text', '')  # Get the actual text content
+        chunk = stored.get(match['id'], {})
+        # Namespaces indexed before the chunk store kept everything on the vector
+        metadata = {**match['metadata'], **chunk.get('metadata', {})}
+        text = chunk.get('text', metadata.get('text', ''))
         
         result = f"Result {i+1} (Score: {score:.4f}):\n"
         result += f"Document ID: {metadata.get('local_id', 'Unknown')}\n"
@@ -313,14 +206,7 @@ def check_pinecone_namespace(namespace: str) -> Dict[str, Any]:
     }
     
     try:
-        # Initialize Pinecone
-        pinecone_api_key = os.getenv("PINECONE_API_KEY")
-        if not pinecone_api_key:
-            result["error"] = "PINECONE_API_KEY not found in environment variables"
-            return result
-            
-        pc = pinecone.Pinecone(api_key=pinecone_api_key)
-        index = pc.Index("deepresearchreviewbot")
+        index = get_vector_store()
         
         # Get index stats
         stats = index.describe_index_stats()
@@ -366,6 +252,17 @@ def init_session_state():
     if 'current_query' not in st.session_state:
         st.session_state.current_query = None
 
+@st.cache_resource
+def get_pdf_worker_pool() -> PDFWorkerPool:
+    """Persistent PDF worker pool shared by all runs of this app process; workers start on first use."""
+    return PDFWorkerPool()
+
+def render_pdf_worker_stats():
+    """Show the PDF worker pool's size and queue depth in the sidebar."""
+    stats = get_pdf_worker_pool().stats()
+    state = "warm" if stats['started'] else "not started"
+    st.caption(f"PDF workers: {stats['size']} ({state}) · queue: {stats['queue_depth']} · processed: {stats['completed']}")
+
 def find_available_port(start=8501, end=8599):
     """Find an available port for the Streamlit server."""
     for port in range(start, end + 1):
@@ -409,6 +306,9 @@ def render_sidebar():
         
         if retry_failed:
             max_retries = st.slider("Max retry attempts", 1, 5, 3)
+        
+        st.divider()
+        render_pdf_worker_stats()
             
     return {
         'from_date': from_date,
@@ -498,7 +398,7 @@ def display_session_info(session_dir):
     processed_dir = os.path.join(session_dir, "processed_data")
     
     paper_count = len([f for f in os.listdir(papers_dir) if f.endswith('.pdf')]) if os.path.exists(papers_dir) else 0
-    processed_count = len([f for f in os.listdir(processed_dir) if f.endswith('.json')]) if os.path.exists(processed_dir) else 0
+    processed_count = len(processed_document_ids(processed_dir))
     review_papers = [f for f in os.listdir(session_dir) if f.endswith('.md')] if os.path.exists(session_dir) else []
     review_paper_count = len(review_papers)
     
@@ -737,8 +637,8 @@ def process_downloaded_papers(result):
         pdf_folder=output_dir,
         output_folder=processed_dir,
         search_results_file=search_results_file,
-        processes=3,
-        remove_stopwords=remove_stopwords
+        remove_stopwords=remove_stopwords,
+        pool=get_pdf_worker_pool()
     )
     
     if not processing_results:
@@ -751,7 +651,7 @@ def process_downloaded_papers(result):
     with proc_col1:
         st.metric("PDFs Processed", summary['total_pdfs'])
     with proc_col2:
-        st.metric("Total Documents", summary['total_pages'])
+        st.metric("Total Pages", summary['total_pages'])
     with proc_col3:
         st.metric("Processing Time", f"{summary['total_time']:.1f}s")
     with proc_col4:
@@ -768,7 +668,7 @@ def process_downloaded_papers(result):
             processed_files_data.append({
                 "Filename": os.path.basename(result.filename),
                 "Local ID": local_id,
-                "Document Size": f"{len(result.data[0].page_content) if result.data else 0:,} chars",
+                "Document Size": f"{result.chars:,} chars",
                 "Processing Time": f"{result.load_time:.2f}s"
             })
             
@@ -788,6 +688,10 @@ def handle_command_line_args():
     parser.add_argument("--keep-original", action="store_false", dest="remove_stopwords",
                         help="Keep original metadata without removing stopwords")
     parser.add_argument("--index", action="store_true", help="Index processed papers in Pinecone")
+    parser.add_argument("--no-resume", action="store_false", dest="resume",
+                        help="Index from the start instead of resuming an interrupted run")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Index only the chunks the last indexing run failed on")
     parser.add_argument("--generate-review", action="store_true", help="Generate a review paper")
     parser.add_argument("--topic", help="Topic for the review paper")
     parser.add_argument("--check-index", action="store_true", help="Check if documents are indexed in Pinecone")
@@ -809,7 +713,7 @@ def handle_command_line_args():
     processed_dir = os.path.join(session_dir, "processed_data")
     
     paper_count = len([f for f in os.listdir(papers_dir) if f.endswith('.pdf')]) if os.path.exists(papers_dir) else 0
-    processed_count = len([f for f in os.listdir(processed_dir) if f.endswith('.json')]) if os.path.exists(processed_dir) else 0
+    processed_count = len(processed_document_ids(processed_dir))
     
     print(f"Found {paper_count} papers and {processed_count} processed files.")
     
@@ -818,6 +722,9 @@ def handle_command_line_args():
         namespace_status = check_pinecone_namespace(args.uuid)
         if namespace_status["error"]:
             print(f"Error checking Pinecone namespace: {namespace_status['error']}")
+        elif IndexingCheckpoint(processed_dir, args.uuid).interrupted:
+            print("Indexing was interrupted. Resume it with --index.")
+            is_indexed = False
         elif namespace_status["exists"]:
             if namespace_status["vector_count"] > 0:
                 print(f"Documents are already indexed in Pinecone. Found {namespace_status['vector_count']} vectors.")
@@ -857,11 +764,17 @@ def handle_command_line_args():
     if args.index and processed_count > 0:
         print(f"Indexing processed papers in Pinecone for UUID: {args.uuid}")
         try:
-            index_documents_in_pinecone(processed_dir, args.uuid)
+            index_documents_in_pinecone(processed_dir, args.uuid, resume=args.resume)
             print("Indexing completed successfully!")
         except Exception as e:
             print(f"Error indexing documents: {str(e)}")
     
+    if args.retry_failed:
+        try:
+            retry_failed_chunks(processed_dir, args.uuid)
+        except Exception as e:
+            print(f"Error retrying failed chunks: {str(e)}")
+    
     # Generate review paper if requested
     if args.generate_review:
         if not args.topic:
@@ -901,7 +814,8 @@ def handle_command_line_args():
                 "--topic", args.topic,
                 "--namespace", args.uuid,
                 "--output", os.path.abspath(output_path),  # Use absolute path for output
-                "--index-name", "deepresearchreviewbot"
+                "--index-name", "deepresearchreviewbot",
+                "--chunk-store", os.path.abspath(chunk_store_path(os.path.join(session_dir, "processed_data")))
             ]
             
             # Set up environment with UTF-8 encoding for Windows
@@ -981,18 +895,19 @@ def main():
     init_session_state()
     available_port = setup_streamlit_config()
     
-    # Initialize Pinecone
-    pinecone_api_key = os.getenv("PINECONE_API_KEY")
-    if not pinecone_api_key:
+    # Initialize the vector store (Pinecone unless VECTOR_STORE_BACKEND=local)
+    if VECTOR_STORE_BACKEND == "pinecone" and not os.getenv("PINECONE_API_KEY"):
         st.error("PINECONE_API_KEY not found in environment variables. Please check your .env file.")
         return
         
     try:
-        pc = pinecone.Pinecone(api_key=pinecone_api_key)
         # Just test connection by getting the index
-        index = pc.Index("deepresearchreviewbot")
+        get_vector_store()
         st.session_state.pinecone_initialized = True
-        st.success("Successfully connected to Pinecone!")
+        if VECTOR_STORE_BACKEND == "local":
+            st.success("Using the local vector index.")
+        else:
+            st.success("Successfully connected to Pinecone!")
     except Exception as e:
         st.error(f"Failed to initialize Pinecone: {str(e)}")
         st.session_state.pinecone_initialized = False
@@ -1050,6 +965,11 @@ def main():
                     namespace_status = check_pinecone_namespace(st.session_state.chat_id)
                     if namespace_status["error"]:
                         st.error(f"Error checking Pinecone namespace: {namespace_status['error']}")
+                    elif IndexingCheckpoint(st.session_state.processed_dir, st.session_state.chat_id).interrupted:
+                        # Some vectors are there, but not all of them
+                        st.session_state.pinecone_indexed = False
+                        st.session_state.pinecone_namespace = st.session_state.chat_id
+                        st.warning("Indexing was interrupted before it finished. Resume it to index the rest.")
                     elif namespace_status["exists"]:
                         if namespace_status["vector_count"] > 0:
                             st.session_state.pinecone_indexed = True
@@ -1064,14 +984,17 @@ def main():
                         st.session_state.pinecone_namespace = st.session_state.chat_id
                         st.warning("No documents found in Pinecone. Indexing required.")
             
+            checkpoint = IndexingCheckpoint(st.session_state.processed_dir, st.session_state.chat_id)
             with col2:
                 if not st.session_state.pinecone_indexed:
-                    if st.button("Index Now"):
+                    if checkpoint.interrupted:
+                        st.caption(f"Interrupted after {checkpoint.chunks_indexed} chunks; indexing resumes from there.")
+                    if st.button("Resume Indexing" if checkpoint.interrupted else "Index Now"):
                         try:
                             with st.spinner("Indexing documents in Pinecone..."):
                                 # Use chat_id as namespace
                                 namespace = st.session_state.chat_id
-                                index_documents_in_pinecone(st.session_state.processed_dir, namespace)
+                                index_documents_in_pinecone(st.session_state.processed_dir, namespace, get_pdf_worker_pool())
                                 st.session_state.pinecone_indexed = True
                                 st.session_state.pinecone_namespace = namespace
                                 st.success(f"Successfully indexed documents in Pinecone namespace: {namespace}")
@@ -1079,6 +1002,20 @@ def main():
                             st.error(f"Error indexing documents in Pinecone: {str(e)}")
                 else:
                     st.success("Documents are indexed and ready to search!")
+                
+                failed_chunks = checkpoint.dead_letter_count()
+                if failed_chunks:
+                    st.warning(f"{failed_chunks} chunks failed to index.")
+                    if st.button(f"Retry {failed_chunks} Failed Chunks"):
+                        try:
+                            with st.spinner("Indexing failed chunks..."):
+                                still_failed = retry_failed_chunks(st.session_state.processed_dir, st.session_state.chat_id)
+                            if still_failed:
+                                st.warning(f"{still_failed} chunks failed again.")
+                            else:
+                                st.success("All failed chunks are now indexed.")
+                        except Exception as e:
+                            st.error(f"Error retrying failed chunks: {str(e)}")
             
             st.divider()
         
@@ -1101,7 +1038,7 @@ def main():
                         )
                         
                         st.markdown("### Search Results")
-                        st.markdown(format_pinecone_results(results))
+                        st.markdown(format_pinecone_results(results, st.session_state.get('processed_dir')))
                     except Exception as e:
                         st.error(f"Error searching documents: {str(e)}")
         else:
@@ -1237,7 +1174,8 @@ def generate_review_paper(topic: str, namespace: str, output_container=None):
             "--topic", topic,
             "--namespace", namespace,
             "--output", os.path.abspath(output_path),  # Use absolute path for output
-            "--index-name", "deepresearchreviewbot"
+            "--index-name", "deepresearchreviewbot",
+            "--chunk-store", os.path.abspath(chunk_store_path(os.path.join(output_dir, "processed_data")))
         ]
         
         # Set up environment with UTF-8 encoding for Windows
@@ -0,0 +1,198 @@
+"""
+Checkpoints and dead-letter log for indexing a session into a namespace.
+
+Documents are chunked and packed into embedding batches deterministically, so
+the same documents and settings always produce the same sequence of batches.
+After each batch is embedded and upserted, the number of batches committed is
+written to a checkpoint in the session's processed_data folder. An
+interrupted run can then resume after the last committed batch instead of
+starting over. The checkpoint records a signature of the settings and the
+documents, and is ignored if either changed.
+
+Chunks whose batch still fails after retries are appended to a dead-letter
+log, with their text, so one bad batch does not stop the run. The log can be
+retried on its own later; a new run moves the previous log aside rather than
+deleting it.
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import List, Dict, Any, Optional, Tuple
+
+CHECKPOINT_PREFIX = "indexing_checkpoint"
+DEAD_LETTER_PREFIX = "indexing_dead_letter"
+
+def indexing_signature(documents: List[Dict[str, Any]], **settings) -> str:
+    """
+    Fingerprint the documents and settings that determine the sequence of batches.
+
+    Args:
+        documents (List[Dict[str, Any]]): Documents to index, in order
+        **settings: Chunking, batching and embedding settings
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode('utf-8'))
+    for document in documents:
+        metadata = document.get('metadata', {})
+        digest.update(f"{metadata.get('local_id', '')}:{len(document.get('page_content', ''))}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+class IndexingCheckpoint:
+    """
+    Progress of indexing a session into one namespace, persisted after every batch.
+    """
+
+    def __init__(self, folder: str, namespace: str):
+        """
+        Load the checkpoint and dead-letter log for a namespace.
+
+        Args:
+            folder (str): processed_data folder of the session
+            namespace (str): Namespace being indexed
+        """
+        self.path = os.path.join(str(folder), f"{CHECKPOINT_PREFIX}_{namespace}.json")
+        self.dead_letter_path = os.path.join(str(folder), f"{DEAD_LETTER_PREFIX}_{namespace}.jsonl")
+        self.state: Dict[str, Any] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable indexing checkpoint {self.path}: {e}")
+
+    def resumable(self, signature: str) -> bool:
+        """Check whether an interrupted run with the same signature can be resumed."""
+        return (self.state.get('signature') == signature
+                and not self.state.get('complete', False)
+                and self.state.get('batches_done', 0) > 0)
+
+    @property
+    def batches_done(self) -> int:
+        return self.state.get('batches_done', 0)
+
+    @property
+    def chunks_indexed(self) -> int:
+        return self.state.get('chunks_indexed', 0)
+
+    @property
+    def chunks_failed(self) -> int:
+        return self.state.get('chunks_failed', 0)
+
+    @property
+    def last_vector_id(self) -> Optional[str]:
+        return self.state.get('last_vector_id')
+
+    @property
+    def interrupted(self) -> bool:
+        """Whether a run stopped after committing some batches, and can be resumed."""
+        return not self.state.get('complete', True) and self.batches_done > 0
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """
+        Read the chunks in the dead-letter log.
+
+        Returns:
+            List[Dict[str, Any]]: Chunks with 'text' and 'metadata', each once, in the order they failed
+        """
+        chunks = {}
+        if os.path.exists(self.dead_letter_path):
+            with open(self.dead_letter_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        chunks[(entry['local_id'], entry['chunk_id'])] = {'text': entry['text'], 'metadata': entry['metadata']}
+        return list(chunks.values())
+
+    def dead_letter_count(self) -> int:
+        """Count the chunks in the dead-letter log."""
+        return len(self.dead_letters())
+
+    def start(self, signature: str):
+        """Start a new run, discarding the previous checkpoint and dead-letter log."""
+        self.state = {'signature': signature, 'batches_done': 0, 'chunks_indexed': 0, 'chunks_failed': 0,
+                      'last_vector_id': None, 'complete': False, 'started': time.time()}
+        # The previous run's failed chunks are kept under a timestamped name, not deleted
+        if os.path.exists(self.dead_letter_path):
+            if os.path.getsize(self.dead_letter_path):
+                stem, extension = os.path.splitext(self.dead_letter_path)
+                os.replace(self.dead_letter_path, f"{stem}_{time.strftime('%Y%m%d-%H%M%S')}{extension}")
+            else:
+                os.remove(self.dead_letter_path)
+        self._save()
+
+    def commit(self, batches_done: int, chunks_indexed: int, chunks_failed: int, last_vector_id: Optional[str]):
+        """
+        Record that the batches up to a point are done, indexed or dead-lettered.
+
+        Args:
+            batches_done (int): Batches processed so far
+            chunks_indexed (int): Chunks indexed so far
+            chunks_failed (int): Chunks dead-lettered so far
+            last_vector_id (str, optional): ID of the last chunk of the last batch
+        """
+        self.state.update({'batches_done': batches_done, 'chunks_indexed': chunks_indexed,
+                           'chunks_failed': chunks_failed, 'last_vector_id': last_vector_id,
+                           'updated': time.time()})
+        self._save()
+
+    def finish(self):
+        """Mark the run complete, so the next run starts afresh."""
+        self.state['complete'] = True
+        self._save()
+
+    def dead_letter(self, batch_number: int, chunks: List[Dict[str, Any]], error: str):
+        """
+        Append the chunks of a failed batch to the dead-letter log.
+
+        Args:
+            batch_number (int): Number of the failed batch (0-based)
+            chunks (List[Dict[str, Any]]): Chunks of the batch
+            error (str): Last error
+        """
+        with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+            for entry in self._dead_letter_entries(batch_number, chunks, error):
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def finish_retry(self, recovered: int, still_failed: List[Tuple[int, List[Dict[str, Any]], str]]):
+        """
+        Record a retry of the dead-letter log, keeping only the chunks that failed again.
+
+        Args:
+            recovered (int): Chunks indexed by the retry
+            still_failed (List[Tuple[int, List[Dict[str, Any]], str]]): Batch number, chunks and error
+                of each batch that failed again
+        """
+        temp_path = self.dead_letter_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for batch_number, chunks, error in still_failed:
+                for entry in self._dead_letter_entries(batch_number, chunks, error):
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(temp_path, self.dead_letter_path)
+        self.state['chunks_indexed'] = self.chunks_indexed + recovered
+        self.state['chunks_failed'] = sum(len(chunks) for _, chunks, _ in still_failed)
+        self.state['updated'] = time.time()
+        self._save()
+
+    def _dead_letter_entries(self, batch_number: int, chunks: List[Dict[str, Any]], error: str) -> List[Dict[str, Any]]:
+        """Build the dead-letter log lines for the chunks of a failed batch."""
+        return [{
+            'batch': batch_number,
+            'local_id': chunk['metadata'].get('local_id'),
+            'chunk_id': chunk['metadata'].get('chunk_id'),
+            'error': error,
+            'failed': time.time(),
+            'text': chunk['text'],
+            'metadata': chunk['metadata']
+        } for chunk in chunks]
+
+    def _save(self):
+        """Write the checkpoint atomically, so an interruption never leaves it half-written."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,252 @@
+"""
+Embedding and upserting of processed documents into the vector index, shared by both apps.
+
+Chunks stream from the parallel chunking stage straight into embedding
+batches, so the first batches are embedded while later documents are still
+being chunked and the full list of chunks is never held in memory. Each
+request is packed up to a token and item budget rather than a fixed number of
+chunks, so requests are few, full and never over the API's token limit.
+
+Vectors carry only the fields queries filter on; chunk texts and document
+metadata go to the session's local chunk store, and the chunks are also added
+to the session's BM25 index for keyword retrieval.
+
+With a checkpoint, progress is committed after every batch and batches that
+still fail after retries are dead-lettered, so one bad batch does not lose
+the run and an interrupted run can resume (see indexing_checkpoint); the
+dead-lettered chunks can be retried on their own with retry_dead_letters.
+"""
+
+import time
+import random
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterable, Optional, Callable
+from document_chunking import iter_chunk_batches, CHUNK_SIZE, CHUNK_OVERLAP
+from pdf_worker_pool import PDFWorkerPool
+from tokenization import count_tokens, iter_token_batches, EMBEDDING_BATCH_TOKENS, EMBEDDING_BATCH_ITEMS
+from chunk_store import ChunkStore, vector_id, split_metadata
+from embedding_profile import embed_texts, EMBEDDING_MODEL, EMBEDDING_DIMENSIONS
+from bm25_index import BM25Index
+from indexing_checkpoint import IndexingCheckpoint, indexing_signature
+
+# Pause between batches, to stay under the embedding rate limit
+RATE_LIMIT_DELAY = 0.5
+
+# Attempts per batch, with exponential backoff and jitter between them
+RETRY_ATTEMPTS = 4
+RETRY_BASE_DELAY = 2.0
+
+# Failed batches in a row after which the run stops, rather than dead-lettering everything
+MAX_CONSECUTIVE_FAILURES = 3
+
+def chunk_vectors(batch: List[Dict[str, Any]], embeddings: List[List[float]]) -> List[Dict[str, Any]]:
+    """Build the vectors to upsert for a batch of chunks and their embeddings, with only their filterable metadata."""
+    vectors = []
+    for chunk, embedding in zip(batch, embeddings):
+        vectors.append({
+            'id': vector_id(chunk['metadata']),
+            'values': embedding,
+            'metadata': split_metadata(chunk['metadata'])[0]
+        })
+    return vectors
+
+@dataclass
+class IndexingResult:
+    """Outcome of indexing documents into a namespace."""
+    indexed: int = 0
+    failed: int = 0
+    batches: int = 0
+    resumed_from: int = 0
+    dead_letter_path: Optional[str] = None
+
+def _with_retries(action: Callable[[], Any], description: str) -> Any:
+    """Run an action, retrying with exponential backoff and jitter when it raises."""
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            return action()
+        except Exception as e:
+            if attempt == RETRY_ATTEMPTS - 1:
+                raise
+            delay = RETRY_BASE_DELAY * 2 ** attempt + random.uniform(0, RETRY_BASE_DELAY)
+            print(f"{description} failed ({str(e)}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def _index_batch(batch: List[Dict[str, Any]], batch_number: int, index, client, namespace: str,
+                 chunk_store: ChunkStore, bm25_index: Optional[BM25Index], replace_documents: bool = True):
+    """Embed a batch, store its chunks and upsert its vectors, retrying each call."""
+    embeddings = _with_retries(lambda: embed_texts(client, [chunk['text'] for chunk in batch]),
+                               f"Embedding batch {batch_number}")
+    # Stored before upserting, so every vector a query can return has its text
+    chunk_store.put(batch, replace_documents)
+    if bm25_index is not None:
+        bm25_index.add(batch, replace_documents)
+    vectors = chunk_vectors(batch, embeddings)
+    _with_retries(lambda: index.upsert(vectors=vectors, namespace=namespace),
+                  f"Upserting batch {batch_number}")
+
+def index_documents(
+    documents: Iterable[Dict[str, Any]],
+    index,
+    client,
+    namespace: str,
+    chunk_store: ChunkStore,
+    bm25_index: Optional[BM25Index] = None,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    max_batch_tokens: int = EMBEDDING_BATCH_TOKENS,
+    max_batch_items: int = EMBEDDING_BATCH_ITEMS,
+    pool: Optional[PDFWorkerPool] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    checkpoint: Optional[IndexingCheckpoint] = None,
+    resume: bool = False
+) -> IndexingResult:
+    """
+    Chunk, embed and upsert documents into a namespace of the vector index.
+
+    Each batch is retried with backoff. A batch that still fails is skipped,
+    and its chunks are written to the checkpoint's dead-letter log. After
+    MAX_CONSECUTIVE_FAILURES failed batches in a row (e.g. the API is down)
+    the run stops with an error instead; the failing batches are not
+    dead-lettered, so resuming retries them.
+
+    Args:
+        documents (Iterable[Dict[str, Any]]): Processed documents, in a stable order
+        index: Vector store (see vector_store.get_vector_store)
+        client: OpenAI client
+        namespace (str): Namespace to upsert into
+        chunk_store (ChunkStore): Store for the chunk texts and document metadata
+        bm25_index (BM25Index, optional): Keyword index to add the chunks to
+        chunk_size (int): Maximum tokens per chunk
+        chunk_overlap (int): Tokens shared by consecutive chunks
+        max_batch_tokens (int): Maximum tokens embedded per request
+        max_batch_items (int): Maximum chunks embedded and upserted per request
+        pool (PDFWorkerPool, optional): Persistent worker pool to chunk in
+        on_progress (Callable[[int, int], None], optional): Called after each batch with
+            the number of chunks indexed and of documents chunked so far
+        checkpoint (IndexingCheckpoint, optional): Checkpoint to record progress and failed chunks in
+        resume (bool): Continue an interrupted run with the same documents and settings
+            after its last committed batch, instead of starting over
+
+    Returns:
+        IndexingResult: Chunks indexed and dead-lettered, batches processed, and the batch resumed from
+    """
+    result = IndexingResult()
+    if checkpoint is not None:
+        documents = list(documents)
+        signature = indexing_signature(
+            documents, namespace=namespace, backend=type(index).__name__, model=EMBEDDING_MODEL,
+            dimensions=EMBEDDING_DIMENSIONS, chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+            max_batch_tokens=max_batch_tokens, max_batch_items=max_batch_items
+        )
+        result.dead_letter_path = checkpoint.dead_letter_path
+        if resume and checkpoint.resumable(signature):
+            result.resumed_from = checkpoint.batches_done
+            result.indexed = checkpoint.chunks_indexed
+            result.failed = checkpoint.chunks_failed
+            print(f"Resuming indexing of {namespace} after batch {result.resumed_from} "
+                  f"({result.indexed} chunks already indexed)")
+        else:
+            checkpoint.start(signature)
+
+    # Failed batches since the last success, dead-lettered once a later batch succeeds
+    failed_batches = []
+
+    def commit_failures():
+        for number, chunks, error in failed_batches:
+            result.failed += len(chunks)
+            if checkpoint is not None:
+                checkpoint.dead_letter(number, chunks, error)
+        failed_batches.clear()
+
+    for batch_number, (batch, documents_done) in enumerate(
+            iter_chunk_batches(documents, max_batch_tokens, max_batch_items, chunk_size, chunk_overlap, pool)):
+        last_id = vector_id(batch[-1]['metadata'])
+        if batch_number < result.resumed_from:
+            # Batches are deterministic; the last committed one must end where the checkpoint says
+            if batch_number == result.resumed_from - 1 and last_id != checkpoint.last_vector_id:
+                print(f"Checkpoint for {namespace} does not match the batches, indexing from the start")
+                return index_documents(documents, index, client, namespace, chunk_store, bm25_index,
+                                       chunk_size, chunk_overlap, max_batch_tokens, max_batch_items,
+                                       pool, on_progress, checkpoint, resume=False)
+            continue
+
+        try:
+            _index_batch(batch, batch_number, index, client, namespace, chunk_store, bm25_index)
+        except Exception as e:
+            print(f"Batch {batch_number} failed after {RETRY_ATTEMPTS} attempts: {str(e)}")
+            failed_batches.append((batch_number, batch, str(e)))
+            if len(failed_batches) >= MAX_CONSECUTIVE_FAILURES:
+                raise Exception(f"Indexing stopped after {len(failed_batches)} failed batches in a row: {str(e)}")
+            continue
+
+        commit_failures()
+        result.indexed += len(batch)
+        result.batches = batch_number + 1
+        if checkpoint is not None:
+            checkpoint.commit(result.batches, result.indexed, result.failed, last_id)
+        if on_progress:
+            on_progress(result.indexed, documents_done)
+
+        time.sleep(RATE_LIMIT_DELAY)  # Rate limiting
+
+    if failed_batches:
+        result.batches = failed_batches[-1][0] + 1
+        commit_failures()
+    if checkpoint is not None:
+        checkpoint.commit(max(result.batches, result.resumed_from), result.indexed, result.failed,
+                          checkpoint.last_vector_id)
+        checkpoint.finish()
+    return result
+
+def retry_dead_letters(
+    index,
+    client,
+    namespace: str,
+    chunk_store: ChunkStore,
+    checkpoint: IndexingCheckpoint,
+    bm25_index: Optional[BM25Index] = None,
+    max_batch_tokens: int = EMBEDDING_BATCH_TOKENS,
+    max_batch_items: int = EMBEDDING_BATCH_ITEMS
+) -> IndexingResult:
+    """
+    Index only the chunks in a checkpoint's dead-letter log; those that fail again stay in it.
+
+    The rest of the documents were indexed after these chunks failed, so the
+    retried chunks do not replace their documents' stored chunks.
+
+    Args:
+        index: Vector store (see vector_store.get_vector_store)
+        client: OpenAI client
+        namespace (str): Namespace to upsert into
+        chunk_store (ChunkStore): Store for the chunk texts and document metadata
+        checkpoint (IndexingCheckpoint): Checkpoint whose dead-letter log to retry
+        bm25_index (BM25Index, optional): Keyword index to add the chunks to
+        max_batch_tokens (int): Maximum tokens embedded per request
+        max_batch_items (int): Maximum chunks embedded and upserted per request
+
+    Returns:
+        IndexingResult: Chunks recovered and still failing
+    """
+    result = IndexingResult(dead_letter_path=checkpoint.dead_letter_path)
+    chunks = checkpoint.dead_letters()
+    if not chunks:
+        return result
+
+    print(f"Retrying {len(chunks)} failed chunks in namespace {namespace}")
+    still_failed = []
+    batches = iter_token_batches(chunks, lambda chunk: chunk['metadata'].get('tokens') or count_tokens(chunk['text']),
+                                 max_batch_tokens, max_batch_items)
+    for batch_number, batch in enumerate(batches):
+        try:
+            _index_batch(batch, batch_number, index, client, namespace, chunk_store, bm25_index,
+                         replace_documents=False)
+            result.indexed += len(batch)
+        except Exception as e:
+            print(f"Batch {batch_number} of failed chunks failed again: {str(e)}")
+            still_failed.append((batch_number, batch, str(e)))
+            result.failed += len(batch)
+        result.batches = batch_number + 1
+        time.sleep(RATE_LIMIT_DELAY)  # Rate limiting
+
+    checkpoint.finish_retry(result.indexed, still_failed)
+    return result
@@ -0,0 +1,173 @@
+"""
+Near-duplicate detection for processed documents.
+
+The same paper often arrives more than once: as preprint and published
+version, or from two sources under different local IDs. Each document gets a
+bottom-k MinHash signature of its word shingles, computed when the PDF is
+processed. Before chunking, documents whose estimated Jaccard similarity is
+above a threshold are collapsed to one copy, so a paper is embedded and
+retrieved once.
+"""
+
+import re
+import heapq
+import hashlib
+from typing import List, Dict, Any, Tuple, Optional
+from document_store import PAGES_DELIMITER
+
+# Words per shingle
+SHINGLE_SIZE = 5
+
+# Number of smallest shingle hashes kept as the signature
+SIGNATURE_SIZE = 128
+
+# Estimated Jaccard similarity above which two documents are the same paper
+DUPLICATE_THRESHOLD = 0.7
+
+WORD_PATTERN = re.compile(r"\w+")
+
+def _shingle_hash(shingle: str) -> int:
+    """Hash a shingle to a 64-bit integer."""
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def minhash_signature(text: str, size: int = SIGNATURE_SIZE) -> List[int]:
+    """
+    Compute a bottom-k MinHash signature of a text.
+
+    Args:
+        text (str): Document text
+        size (int): Number of hashes to keep
+
+    Returns:
+        List[int]: The smallest shingle hashes, in ascending order
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = {' '.join(words)} if words else set()
+    else:
+        shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return heapq.nsmallest(size, {_shingle_hash(shingle) for shingle in shingles})
+
+def estimate_similarity(first: List[int], second: List[int], size: int = SIGNATURE_SIZE) -> float:
+    """
+    Estimate the Jaccard similarity of two documents from their signatures.
+
+    Args:
+        first (List[int]): Signature of the first document
+        second (List[int]): Signature of the second document
+        size (int): Signature size the signatures were computed with
+
+    Returns:
+        float: Estimated similarity between 0.0 and 1.0
+    """
+    first_set, second_set = set(first), set(second)
+    union = heapq.nsmallest(size, first_set | second_set)
+    if not union:
+        return 0.0
+    return sum(1 for h in union if h in first_set and h in second_set) / len(union)
+
+class DuplicateIndex:
+    """
+    Inverted index from signature hashes to documents, for finding near-duplicates without comparing every pair.
+    """
+
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD, size: int = SIGNATURE_SIZE):
+        """
+        Initialize an empty index.
+
+        Args:
+            threshold (float): Estimated similarity above which documents are duplicates
+            size (int): Signature size
+        """
+        self.threshold = threshold
+        self.size = size
+        self._signatures: Dict[str, List[int]] = {}
+        self._postings: Dict[int, List[str]] = {}
+
+    def find(self, signature: List[int]) -> Optional[Tuple[str, float]]:
+        """
+        Find the indexed document most similar to a signature, if it is a near-duplicate.
+
+        Args:
+            signature (List[int]): Signature to look up
+
+        Returns:
+            Optional[Tuple[str, float]]: ID of the duplicate and the estimated similarity, or None
+        """
+        shared = {}
+        for h in signature:
+            for doc_id in self._postings.get(h, ()):
+                shared[doc_id] = shared.get(doc_id, 0) + 1
+
+        # Documents sharing few signature hashes cannot reach the threshold
+        min_shared = max(1, int(self.threshold * min(len(signature), self.size) / 2))
+        best = None
+        for doc_id, count in shared.items():
+            if count < min_shared:
+                continue
+            similarity = estimate_similarity(signature, self._signatures[doc_id], self.size)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (doc_id, similarity)
+        return best
+
+    def add(self, doc_id: str, signature: List[int]):
+        """Add a document's signature to the index."""
+        self._signatures[doc_id] = signature
+        for h in signature:
+            self._postings.setdefault(h, []).append(doc_id)
+
+def _document_signature(document: Dict[str, Any]) -> List[int]:
+    """Get a processed document's signature, computing it if the processor did not store one."""
+    signature = document.get('metadata', {}).get('minhash')
+    if signature is None:
+        # The page delimiter would otherwise be a shingle shared by every document
+        signature = minhash_signature(document.get('page_content', '').replace(PAGES_DELIMITER, '\n'))
+    return signature
+
+def _preference(document: Dict[str, Any]) -> Tuple[float, int]:
+    """Sort key choosing which copy of a duplicated paper to keep: best evaluated, then longest."""
+    paper_metadata = document.get('metadata', {}).get('paper_metadata') or {}
+    score = (paper_metadata.get('evaluation') or {}).get('score')
+    if not isinstance(score, (int, float)):
+        score = 0
+    return -score, -len(document.get('page_content', ''))
+
+def collapse_near_duplicates(documents: List[Dict[str, Any]], threshold: float = DUPLICATE_THRESHOLD) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Drop documents that are near-duplicates of another document in the list.
+
+    Of each group of duplicates, the copy with the best evaluation score (then
+    the longest text) is kept, and the IDs of the dropped copies are listed in
+    its metadata under 'duplicates'.
+
+    Args:
+        documents (List[Dict[str, Any]]): Processed documents
+        threshold (float): Estimated similarity above which documents are duplicates
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Dict[str, str]]: Kept documents in their original order,
+            and a map from each dropped document's ID to the ID of the copy kept
+    """
+    index = DuplicateIndex(threshold)
+    kept_ids = set()
+    duplicates = {}
+    by_id = {}
+
+    for position, document in sorted(enumerate(documents), key=lambda item: _preference(item[1])):
+        doc_id = str(document.get('metadata', {}).get('local_id', position))
+        by_id[doc_id] = document
+        signature = _document_signature(document)
+        match = index.find(signature)
+        if match:
+            duplicates[doc_id] = match[0]
+            continue
+        index.add(doc_id, signature)
+        kept_ids.add(doc_id)
+
+    for doc_id, original_id in duplicates.items():
+        original = by_id[original_id].setdefault('metadata', {})
+        original.setdefault('duplicates', []).append(doc_id)
+
+    kept = [document for position, document in enumerate(documents)
+            if str(document.get('metadata', {}).get('local_id', position)) in kept_ids]
+    return kept, duplicates
@@ -3,9 +3,9 @@ import os
 import multiprocessing
 from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from dataclasses import dataclass
-from langchain_community.document_loaders import PyMuPDFLoader
+from contextlib import contextmanager
 import json
 import argparse
 import glob
@@ -14,8 +14,17 @@ import fitz  # PyMuPDF
 import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
-from multiprocessing import Pool
+from collections import deque
 import traceback
+import mmap
+import hashlib
+from processing_manifest import ProcessingManifest, file_fingerprint
+from pdf_worker_pool import PDFWorkerPool
+from text_normalizer import normalize_pages, CHARS_PER_TOKEN
+from section_detector import page_headings, locate_sections
+from document_store import DocumentStore, PAGES_DELIMITER, processed_document_ids
+from pdf_triage import triage_document
+from near_duplicates import minhash_signature
 
 # Download NLTK resources if not already downloaded
 try:
@@ -25,12 +34,146 @@ except LookupError:
     nltk.download('punkt')
     nltk.download('stopwords')
 
+# Pages scanned for title, authors, abstract and DOI
+METADATA_PAGES = 3
+
+# Bump when the processed JSON output changes, so existing outputs are regenerated
+EXTRACTOR_VERSION = "5"
+
+# Seconds a single PDF may take before its worker is killed
+DEFAULT_FILE_TIMEOUT = 300
+
+# How often the watchdog checks running jobs, in seconds
+WATCHDOG_INTERVAL = 0.5
+
+# Seconds a job's result may lag behind its worker exiting before the worker is taken to have died
+WORKER_EXIT_GRACE = 5.0
+
+# PDFs with more pages than this are split into page ranges across workers
+LARGE_PDF_PAGES = 100
+PAGE_RANGE_SIZE = 50
+PARTS_DIR_NAME = ".parts"
+
+# Table extraction runs only on pages the pre-pass flags, within a per-document time budget (seconds)
+TABLE_TIME_BUDGET = 20.0
+MIN_RULE_LENGTH = 10
+GRID_CELL_GAP = 12
+GRID_MIN_ROWS = 3
+GRID_MIN_COLUMNS = 3
+
+@dataclass
+class ExtractedPDF:
+    """Everything extracted from one PDF in a single pass."""
+    page_texts: List[str]
+    metadata: Dict[str, Any]
+    extracted_metadata: Dict[str, Any]
+    
+    @property
+    def page_count(self) -> int:
+        return len(self.page_texts)
+    
+    @property
+    def page_content(self) -> str:
+        return PAGES_DELIMITER.join(self.page_texts)
+
 @dataclass
 class PDFLoadResult:
+    """Compact summary of one processed PDF; the text itself stays in the saved JSON."""
     filename: str
     load_time: float
     pages: int
-    data: List  # Add data field to store processed content
+    chars: int = 0
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+    fingerprint: Optional[Dict[str, Any]] = None
+    skipped: bool = False
+    chars_saved: int = 0
+    rejected: Optional[str] = None
+
+@dataclass
+class TableBudget:
+    """Time left for table extraction in one document."""
+    seconds: float
+    spent: float = 0.0
+    
+    @property
+    def exhausted(self) -> bool:
+        return self.spent >= self.seconds
+
+@dataclass
+class PageRangeJob:
+    """A slice of a large PDF, extracted by one worker into a part file."""
+    filename: str
+    start: int
+    end: int
+    part_path: str
+
+@dataclass
+class PageRangeResult:
+    """Outcome of a PageRangeJob; the page texts stay in the part file."""
+    filename: str
+    start: int
+    load_time: float
+    part_path: Optional[str] = None
+    error: Optional[str] = None
+
+def _metadata_from_text(text: str, doc_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Guess title, authors, abstract and DOI from the opening pages of a paper.
+    
+    Args:
+        text (str): Text of the first few pages
+        doc_info (Dict[str, Any], optional): PDF document info dictionary
+        
+    Returns:
+        Dict[str, Any]: Extracted metadata
+    """
+    metadata = {}
+    
+    # Try to extract title (usually the largest text on first page)
+    title_match = re.search(r'^(.+?)(?:\n|$)', text.strip())
+    if title_match:
+        metadata['title'] = title_match.group(1).strip()
+    
+    # Try to extract authors (often after title, before abstract)
+    # This is a simple heuristic and might need refinement
+    authors_pattern = r'(?:authors?|by)(?:\s*:|\s+)([^.]+?)(?:\n|$)'
+    authors_match = re.search(authors_pattern, text, re.IGNORECASE)
+    if authors_match:
+        authors_text = authors_match.group(1).strip()
+        # Split by common separators
+        authors = [a.strip() for a in re.split(r'[,;]|\sand\s', authors_text) if a.strip()]
+        if authors:
+            metadata['authors'] = authors
+    
+    # Try to extract abstract
+    abstract_pattern = r'(?:abstract|summary)(?:\s*:|\s*—|\s*-|\s+)([^.]+(?:\.[^.]+){1,10})'
+    abstract_match = re.search(abstract_pattern, text, re.IGNORECASE)
+    if abstract_match:
+        metadata['abstract'] = abstract_match.group(1).strip()
+    
+    # Try to extract DOI
+    doi_pattern = r'(?:doi|DOI)(?:\s*:|\s+)(10\.\d{4,}(?:\.\d+)*\/\S+)'
+    doi_match = re.search(doi_pattern, text)
+    if doi_match:
+        metadata['doi'] = doi_match.group(1).strip()
+    
+    # Extract document info metadata
+    if doc_info:
+        if 'title' in doc_info and doc_info['title'] and not metadata.get('title'):
+            metadata['title'] = doc_info['title']
+        if 'author' in doc_info and doc_info['author'] and not metadata.get('authors'):
+            # Split author string into list
+            authors = [a.strip() for a in doc_info['author'].split(';')]
+            if not authors:
+                authors = [doc_info['author']]
+            metadata['authors'] = authors
+        if 'subject' in doc_info and doc_info['subject']:
+            metadata['abstract'] = doc_info['subject']
+        if 'keywords' in doc_info and doc_info['keywords']:
+            metadata['keywords'] = [k.strip() for k in doc_info['keywords'].split(',')]
+    
+    return metadata
 
 def extract_metadata_from_pdf(pdf_path: str) -> Dict[str, Any]:
     """
@@ -50,52 +193,10 @@ def extract_metadata_from_pdf(pdf_path: str) -> Dict[str, Any]:
         
         # Extract text from first few pages (title, authors, abstract are usually here)
         text = ""
-        for i in range(min(3, len(doc))):
+        for i in range(min(METADATA_PAGES, len(doc))):
             text += doc[i].get_text()
         
-        # Try to extract title (usually the largest text on first page)
-        title_match = re.search(r'^(.+?)(?:\n|$)', text.strip())
-        if title_match:
-            metadata['title'] = title_match.group(1).strip()
-        
-        # Try to extract authors (often after title, before abstract)
-        # This is a simple heuristic and might need refinement
-        authors_pattern = r'(?:authors?|by)(?:\s*:|\s+)([^.]+?)(?:\n|$)'
-        authors_match = re.search(authors_pattern, text, re.IGNORECASE)
-        if authors_match:
-            authors_text = authors_match.group(1).strip()
-            # Split by common separators
-            authors = [a.strip() for a in re.split(r'[,;]|\sand\s', authors_text) if a.strip()]
-            if authors:
-                metadata['authors'] = authors
-        
-        # Try to extract abstract
-        abstract_pattern = r'(?:abstract|summary)(?:\s*:|\s*—|\s*-|\s+)([^.]+(?:\.[^.]+){1,10})'
-        abstract_match = re.search(abstract_pattern, text, re.IGNORECASE)
-        if abstract_match:
-            metadata['abstract'] = abstract_match.group(1).strip()
-        
-        # Try to extract DOI
-        doi_pattern = r'(?:doi|DOI)(?:\s*:|\s+)(10\.\d{4,}(?:\.\d+)*\/\S+)'
-        doi_match = re.search(doi_pattern, text)
-        if doi_match:
-            metadata['doi'] = doi_match.group(1).strip()
-        
-        # Extract document info metadata
-        doc_info = doc.metadata
-        if doc_info:
-            if 'title' in doc_info and doc_info['title'] and not metadata.get('title'):
-                metadata['title'] = doc_info['title']
-            if 'author' in doc_info and doc_info['author'] and not metadata.get('authors'):
-                # Split author string into list
-                authors = [a.strip() for a in doc_info['author'].split(';')]
-                if not authors:
-                    authors = [doc_info['author']]
-                metadata['authors'] = authors
-            if 'subject' in doc_info and doc_info['subject']:
-                metadata['abstract'] = doc_info['subject']
-            if 'keywords' in doc_info and doc_info['keywords']:
-                metadata['keywords'] = [k.strip() for k in doc_info['keywords'].split(',')]
+        metadata = _metadata_from_text(text, doc.metadata)
         
         # Close the document
         doc.close()
@@ -105,6 +206,304 @@ def extract_metadata_from_pdf(pdf_path: str) -> Dict[str, Any]:
     
     return metadata
 
+def _pdf_date_to_iso(value: str) -> str:
+    """Convert a PDF date string such as D:20240101120000+01'00' to ISO format."""
+    match = re.match(r"D:(\d{4})(\d{2})?(\d{2})?(\d{2})?(\d{2})?(\d{2})?", value or "")
+    if not match:
+        return value
+    year, month, day, hour, minute, second = (part or default for part, default in
+                                              zip(match.groups(), ("", "01", "01", "00", "00", "00")))
+    return f"{year}-{month}-{day}T{hour}:{minute}:{second}"
+
+def _document_info(doc, pdf_path: str) -> Dict[str, Any]:
+    """
+    Build the document metadata dictionary in the same shape PyMuPDFLoader produced.
+    
+    Args:
+        doc: Open fitz document
+        pdf_path (str): Path to the PDF file
+        
+    Returns:
+        Dict[str, Any]: Document metadata
+    """
+    metadata = {
+        'producer': 'PyMuPDF',
+        'creator': 'PyMuPDF',
+        'creationdate': '',
+        'source': pdf_path,
+        'file_path': pdf_path,
+        'total_pages': doc.page_count,
+    }
+    for key, value in (doc.metadata or {}).items():
+        if not isinstance(value, (str, int)):
+            continue
+        key = key.lower()
+        if key in ('creationdate', 'moddate'):
+            value = _pdf_date_to_iso(value)
+        if value or key not in metadata:
+            metadata[key] = value
+    return metadata
+
+def _ruling_lines(page) -> Tuple[int, int]:
+    """
+    Count the horizontal and vertical rules drawn on a page.
+    
+    Args:
+        page: fitz page
+        
+    Returns:
+        Tuple[int, int]: Number of horizontal and vertical rules
+    """
+    horizontal = vertical = 0
+    for drawing in page.get_drawings():
+        for item in drawing.get('items', []):
+            if item[0] == 'l':
+                p1, p2 = item[1], item[2]
+                if abs(p1.y - p2.y) < 1 and abs(p1.x - p2.x) >= MIN_RULE_LENGTH:
+                    horizontal += 1
+                elif abs(p1.x - p2.x) < 1 and abs(p1.y - p2.y) >= MIN_RULE_LENGTH:
+                    vertical += 1
+            elif item[0] == 're':
+                rect = item[1]
+                if rect.height < 2 and rect.width >= MIN_RULE_LENGTH:
+                    horizontal += 1
+                elif rect.width < 2 and rect.height >= MIN_RULE_LENGTH:
+                    vertical += 1
+                elif rect.width >= MIN_RULE_LENGTH and rect.height >= MIN_RULE_LENGTH:
+                    # Cell borders and shaded cells contribute all four edges
+                    horizontal += 2
+                    vertical += 2
+    return horizontal, vertical
+
+def _has_text_grid(page) -> bool:
+    """
+    Check whether a page has rows of text whose cells line up in columns.
+    
+    Args:
+        page: fitz page
+        
+    Returns:
+        bool: True if at least GRID_MIN_ROWS rows share GRID_MIN_COLUMNS cell positions
+    """
+    # Group words into visual rows by their vertical centre
+    rows = {}
+    for x0, y0, x1, y1, *_ in page.get_text("words"):
+        rows.setdefault(round((y0 + y1) / 6), []).append((x0, x1))
+    
+    # Count the left edges of cells (runs of words separated by wide gaps) across rows
+    column_rows = {}
+    for words in rows.values():
+        words.sort()
+        cell_starts = [words[0][0]]
+        for (_, previous_end), (start, _) in zip(words, words[1:]):
+            if start - previous_end > GRID_CELL_GAP:
+                cell_starts.append(start)
+        if len(cell_starts) >= GRID_MIN_COLUMNS:
+            for x in {round(x / 5) for x in cell_starts}:
+                column_rows[x] = column_rows.get(x, 0) + 1
+    
+    shared_columns = sum(1 for count in column_rows.values() if count >= GRID_MIN_ROWS)
+    return shared_columns >= GRID_MIN_COLUMNS
+
+def _likely_has_table(page) -> bool:
+    """
+    Cheap pre-pass deciding whether a page is worth running the table finder on.
+    
+    The table finder builds cells from drawn rules, so pages without any rules
+    are skipped outright. A full grid of rules is enough on its own; a partial
+    one (e.g. only horizontal rules) also needs text aligned in columns.
+    """
+    horizontal, vertical = _ruling_lines(page)
+    if horizontal >= 2 and vertical >= 2:
+        return True
+    if horizontal + vertical == 0:
+        return False
+    return _has_text_grid(page)
+
+def _append_tables(page, text: str, budget: Optional[TableBudget] = None) -> str:
+    """Append a page's tables as markdown to its extracted text, if the pre-pass finds any likely."""
+    if budget is not None and budget.exhausted:
+        return text
+    
+    started = time.perf_counter()
+    try:
+        if _likely_has_table(page):
+            tables = [table.to_markdown() for table in page.find_tables().tables]
+        else:
+            tables = []
+    except Exception:
+        tables = []
+    if budget is not None:
+        budget.spent += time.perf_counter() - started
+        if budget.exhausted:
+            print(f"Table extraction time budget ({budget.seconds:.0f}s) used up at page {page.number + 1}")
+    
+    if tables:
+        text = text + "\n" + "\n".join(tables)
+    return text
+
+@contextmanager
+def _open_pdf(pdf_path: str):
+    """
+    Open a PDF from a memory-mapped buffer, falling back to opening it by path.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        
+    Yields:
+        The open fitz document
+    """
+    with open(pdf_path, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(buffer)
+        except (ValueError, OSError):
+            buffer = view = None
+        
+        try:
+            try:
+                doc = fitz.open(stream=view, filetype="pdf") if view is not None else fitz.open(pdf_path)
+            except Exception:
+                # Older PyMuPDF versions only accept bytes streams
+                doc = fitz.open(pdf_path)
+            
+            try:
+                yield doc
+            finally:
+                doc.close()
+        finally:
+            if buffer is not None:
+                view.release()
+                buffer.close()
+
+def _extract_pages(doc, start: int, end: int, budget: Optional[TableBudget] = None) -> Tuple[List[str], str, List[List[Tuple[str, str]]]]:
+    """
+    Extract the text, tables and section headings of a range of pages.
+    
+    Args:
+        doc: Open fitz document
+        start (int): First page number (0-based)
+        end (int): Page number to stop before
+        budget (TableBudget, optional): Time allowed for table extraction in this range
+        
+    Returns:
+        Tuple[List[str], str, List[List[Tuple[str, str]]]]: Page texts with tables, the plain text of any of
+            the first METADATA_PAGES pages in the range, and the section headings found on each page
+    """
+    page_texts = []
+    metadata_text = ""
+    headings = []
+    for page_number in range(start, end):
+        page = doc[page_number]
+        text = page.get_text()
+        if page_number < METADATA_PAGES:
+            metadata_text += text
+        headings.append(page_headings(page, text))
+        page_texts.append(_append_tables(page, text, budget))
+    return page_texts, metadata_text, headings
+
+def _finish_pages(page_texts: List[str], headings: List[List[Tuple[str, str]]], metadata: Dict[str, Any]) -> List[str]:
+    """
+    Normalize a whole document's pages, locate its sections and fingerprint its text.
+    
+    Normalization stats, section offsets and the near-duplicate signature are recorded in the document's metadata.
+    
+    Args:
+        page_texts (List[str]): Extracted text of each page
+        headings (List[List[Tuple[str, str]]]): Section headings found on each page
+        metadata (Dict[str, Any]): Document metadata to update
+        
+    Returns:
+        List[str]: Normalized page texts
+    """
+    page_texts, stats = normalize_pages(page_texts)
+    metadata['normalization'] = stats.to_dict()
+    metadata['sections'] = locate_sections(page_texts, headings, PAGES_DELIMITER)
+    metadata['minhash'] = minhash_signature("\n".join(page_texts))
+    return page_texts
+
+def _chars_saved(extracted: ExtractedPDF) -> int:
+    """Characters normalization removed from a document."""
+    return extracted.metadata.get('normalization', {}).get('chars_saved', 0)
+
+def extract_pdf(pdf_path: str) -> ExtractedPDF:
+    """
+    Extract page texts, tables, document info and heuristic metadata, opening the file once.
+    
+    The file is memory-mapped where possible so PyMuPDF reads it without an extra copy.
+    Page texts are normalized and their section offsets recorded; metadata is detected
+    from the raw text of the first pages.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        
+    Returns:
+        ExtractedPDF: Extracted content and metadata
+    """
+    with _open_pdf(pdf_path) as doc:
+        return extract_document(doc, pdf_path)
+
+def extract_document(doc, pdf_path: str) -> ExtractedPDF:
+    """
+    Extract an already open PDF, as extract_pdf does.
+    
+    Args:
+        doc: Open fitz document
+        pdf_path (str): Path the document was opened from
+        
+    Returns:
+        ExtractedPDF: Extracted content and metadata
+    """
+    page_texts, metadata_text, headings = _extract_pages(doc, 0, doc.page_count, TableBudget(TABLE_TIME_BUDGET))
+    metadata = _document_info(doc, pdf_path)
+    extracted_metadata = _metadata_from_text(metadata_text, doc.metadata)
+    
+    return ExtractedPDF(_finish_pages(page_texts, headings, metadata), metadata, extracted_metadata)
+
+# smart_results.json path -> (mtime, index), so repeated lookups in one process parse the file once
+_metadata_index_cache: Dict[str, Any] = {}
+
+def load_paper_metadata_index(uuid_dir: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Load smart_results.json once and index its papers by local_id.
+    
+    Args:
+        uuid_dir (str): Path to the UUID directory (or a file inside it)
+        
+    Returns:
+        Optional[Dict[str, Dict[str, Any]]]: Paper records keyed by local_id, or None if there is no smart_results.json
+    """
+    # If uuid_dir is a file path, get its directory
+    if os.path.isfile(uuid_dir):
+        uuid_dir = os.path.dirname(uuid_dir)
+    
+    # Construct path to smart_results.json
+    smart_results_path = os.path.join(uuid_dir, "smart_search_results", "smart_results.json")
+    
+    # Check if file exists
+    if not os.path.exists(smart_results_path):
+        print(f"No smart_results.json found at {smart_results_path}")
+        return None
+    
+    # Reuse the index while the file is unchanged
+    mtime = os.path.getmtime(smart_results_path)
+    cached = _metadata_index_cache.get(smart_results_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    # Load and parse smart_results.json
+    with open(smart_results_path, 'r', encoding='utf-8') as f:
+        search_data = json.load(f)
+    
+    index = {}
+    for paper in search_data.get("papers", []):
+        local_id = paper.get('local_id')
+        if local_id and local_id not in index:
+            index[local_id] = paper
+    
+    _metadata_index_cache[smart_results_path] = (mtime, index)
+    return index
+
 def find_paper_metadata(local_id: str, uuid_dir: str) -> dict:
     """
     Find paper metadata from smart_results.json file.
@@ -117,35 +516,17 @@ def find_paper_metadata(local_id: str, uuid_dir: str) -> dict:
         dict: Complete paper metadata without modifications
     """
     try:
-        # Extract UUID from path if it's a full path
-        if os.path.exists(uuid_dir):
-            # If uuid_dir is a file path, get its directory
-            if os.path.isfile(uuid_dir):
-                uuid_dir = os.path.dirname(uuid_dir)
-        
-        # Construct path to smart_results.json
-        smart_results_path = os.path.join(uuid_dir, "smart_search_results", "smart_results.json")
-        
-        # Check if file exists
-        if not os.path.exists(smart_results_path):
-            print(f"No smart_results.json found at {smart_results_path}")
+        index = load_paper_metadata_index(uuid_dir)
+        if index is None:
             return None
-            
-        # Load and parse smart_results.json
-        with open(smart_results_path, 'r', encoding='utf-8') as f:
-            search_data = json.load(f)
-        
-        # Get papers list
-        papers = search_data.get("papers", [])
-        
-        # Find matching paper
-        for paper in papers:
-            if paper.get('local_id') == local_id:
-                print(f"Found metadata for paper {local_id}")
-                if 'evaluation' in paper:
-                    print(f"Evaluation data found: {paper['evaluation']}")
-                return paper
-                
+        
+        paper = index.get(local_id)
+        if paper:
+            print(f"Found metadata for paper {local_id}")
+            if 'evaluation' in paper:
+                print(f"Evaluation data found: {paper['evaluation']}")
+            return paper
+        
         print(f"No metadata found for paper {local_id}")
         return None
         
@@ -193,40 +574,29 @@ def convert_metadata_to_string(paper_metadata: Dict[str, Any]) -> str:
     
     return " ".join(filtered_text)
 
-def save_processed_data(filename: str, data: List, output_folder: Path, uuid_dir: Optional[str] = None, remove_stopwords: bool = False):
+def save_processed_data(filename: str, extracted: ExtractedPDF, output_folder: Path, paper_metadata: Optional[Dict[str, Any]] = None, remove_stopwords: bool = False):
     """
-    Save processed PDF data to a JSON file.
+    Save processed PDF data to the session's document store.
     
     Args:
         filename: Path to the PDF file
-        data: List of document objects from PyMuPDF
+        extracted: Content and metadata from extract_pdf
         output_folder: Folder to save processed data
-        uuid_dir: Path to the UUID directory containing smart_search_results
+        paper_metadata: This paper's record from smart_results.json, if any
         remove_stopwords: Not used anymore, kept for backward compatibility
     
     Returns:
-        Path to the saved JSON file
+        Path to the document store
     """
-    # Ensure output folder exists
-    os.makedirs(output_folder, exist_ok=True)
-    
-    # Create output filename
     base_filename = os.path.basename(filename)
     file_stem = os.path.splitext(base_filename)[0]
-    processed_name = f"processed_{file_stem}.json"
-    output_path = os.path.join(output_folder, processed_name)
     
     # Extract local_id from filename
     local_id = file_stem
     
-    # Try to find paper metadata from smart_results.json
-    paper_metadata = None
-    if uuid_dir:
-        paper_metadata = find_paper_metadata(local_id, uuid_dir)
-    
-    # If no paper metadata found, try to extract from PDF
+    # If no paper metadata found, fall back to what was extracted from the PDF
     if not paper_metadata:
-        extracted_metadata = extract_metadata_from_pdf(filename)
+        extracted_metadata = extracted.extracted_metadata
         if extracted_metadata:
             paper_metadata = {
                 'local_id': local_id,
@@ -236,11 +606,8 @@ def save_processed_data(filename: str, data: List, output_folder: Path, uuid_dir
                 'doi': extracted_metadata.get('doi')
             }
     
-    # Since we're processing as single, data will be a list with one item
-    doc = data[0]
-    
     # Start with the original metadata from PyMuPDF
-    metadata_dict = dict(doc.metadata) if hasattr(doc, 'metadata') else {}
+    metadata_dict = dict(extracted.metadata)
     
     # Add local_id
     metadata_dict['local_id'] = local_id
@@ -256,44 +623,237 @@ def save_processed_data(filename: str, data: List, output_folder: Path, uuid_dir
         else:
             print("Evaluation field not present in paper_metadata")
     
-    processed_data = {
-        'page_content': doc.page_content,
-        'metadata': metadata_dict
-    }
+    # Pages are stored separately so readers can load them without the rest of the document
+    with DocumentStore(output_folder) as store:
+        store.put(local_id, extracted.page_texts, metadata_dict)
+        output_path = store.path
     
-    # Save the processed data to a JSON file
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(processed_data, f, ensure_ascii=False, indent=2)
+    # The store replaces the JSON file older versions wrote
+    legacy_path = os.path.join(output_folder, f"processed_{file_stem}.json")
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
     
     return output_path
 
+def _record_hash(paper_metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Hash a paper's smart_results.json record so metadata changes trigger reprocessing."""
+    if not paper_metadata:
+        return None
+    return hashlib.sha256(json.dumps(paper_metadata, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
 def load_pdf(args):
-    """Load a single PDF file and return timing info"""
-    file, output_folder, uuid_dir, remove_stopwords = args
+    """Load a single PDF file, save it as JSON and return a compact summary"""
+    file, output_folder, paper_metadata, remove_stopwords = args
     start_time = time.time()
     try:
-        # Change mode to "single" instead of "page"
-        loader = PyMuPDFLoader(file, mode="single", extract_tables="markdown", pages_delimiter="\n<<12344567890>>\n")
-        data = loader.load()
+        # Fingerprint the input before reading it, so a file changed mid-run is redone next time
+        fingerprint = file_fingerprint(file)
+        
+        # Open the file once for triage, text, tables and metadata; a file that cannot be opened is an error
+        with _open_pdf(file) as doc:
+            # Scanned, garbled or non-English PDFs are not worth extracting
+            triage = triage_document(doc)
+            if not triage.usable:
+                return PDFLoadResult(file, time.time() - start_time, triage.page_count, fingerprint=fingerprint,
+                                     rejected=triage.reason)
+            extracted = extract_document(doc, file)
         end_time = time.time()
         load_time = end_time - start_time
-        pages = len(data)  # This will now be 1 since we're loading as single
         
-        # Get the filename from the file path
-        filename = os.path.basename(file)
+        pages = extracted.page_count
+        chars = sum(len(text) for text in extracted.page_texts) + len(PAGES_DELIMITER) * max(0, pages - 1)
         
         # Save processed data
-        save_processed_data(file, data, output_folder, uuid_dir, remove_stopwords)
+        output_path = save_processed_data(file, extracted, output_folder, paper_metadata, remove_stopwords)
         
-        print(f"{load_time:.2f} seconds to load {filename} ({pages} pages)")
-        return PDFLoadResult(file, load_time, pages, data)
+        # Only the summary goes back to the parent process
+        return PDFLoadResult(file, load_time, pages, chars, str(output_path), fingerprint=fingerprint,
+                             chars_saved=_chars_saved(extracted))
     except Exception as e:
         print(f"Error processing {os.path.basename(file)}: {str(e)}")
         traceback.print_exc()  # Print the full traceback for debugging
-        return PDFLoadResult(file, 0.0, 0, [])
+        return PDFLoadResult(file, 0.0, 0, error=str(e))
+
+def load_page_range(job: PageRangeJob) -> PageRangeResult:
+    """Extract one page range of a large PDF into a part file"""
+    start_time = time.time()
+    try:
+        with _open_pdf(job.filename) as doc:
+            end = min(job.end, doc.page_count)
+            # Each range gets its share of the document's table budget
+            budget = TableBudget(TABLE_TIME_BUDGET * (end - job.start) / max(doc.page_count, 1))
+            page_texts, metadata_text, headings = _extract_pages(doc, job.start, end, budget)
+            part = {'page_texts': page_texts, 'headings': headings}
+            # Document-level metadata comes with the first range
+            if job.start == 0:
+                part['metadata'] = _document_info(doc, job.filename)
+                part['extracted_metadata'] = _metadata_from_text(metadata_text, doc.metadata)
+        
+        with open(job.part_path, 'w', encoding='utf-8') as f:
+            json.dump(part, f, ensure_ascii=False)
+        
+        return PageRangeResult(job.filename, job.start, time.time() - start_time, job.part_path)
+    except Exception as e:
+        print(f"Error processing pages {job.start + 1}-{job.end} of {os.path.basename(job.filename)}: {str(e)}")
+        traceback.print_exc()
+        return PageRangeResult(job.filename, job.start, 0.0, error=str(e))
+
+def assemble_page_ranges(filename: str, part_paths: List[str], output_folder, paper_metadata: Optional[Dict[str, Any]] = None, remove_stopwords: bool = False) -> Tuple[ExtractedPDF, str]:
+    """
+    Join the part files of a split PDF, in page order, normalize it, locate its sections and save the processed JSON.
+    
+    Args:
+        filename: Path to the PDF file
+        part_paths: Part files ordered by their first page
+        output_folder: Folder to save processed data
+        paper_metadata: This paper's record from smart_results.json, if any
+        remove_stopwords: Passed through to save_processed_data
+        
+    Returns:
+        Tuple[ExtractedPDF, str]: The assembled document and the path of the saved JSON
+    """
+    page_texts = []
+    headings = []
+    metadata = {}
+    extracted_metadata = {}
+    for part_path in part_paths:
+        with open(part_path, 'r', encoding='utf-8') as f:
+            part = json.load(f)
+        page_texts.extend(part['page_texts'])
+        headings.extend([tuple(heading) for heading in page] for page in part['headings'])
+        metadata = part.get('metadata', metadata)
+        extracted_metadata = part.get('extracted_metadata', extracted_metadata)
+    
+    # Repeated headers and footers can only be found across the whole document
+    extracted = ExtractedPDF(_finish_pages(page_texts, headings, metadata), metadata, extracted_metadata)
+    output_path = save_processed_data(filename, extracted, output_folder, paper_metadata, remove_stopwords)
+    return extracted, output_path
+
+def _run_job(job):
+    """Run a whole-file or page-range job in a worker process."""
+    if isinstance(job, PageRangeJob):
+        return load_page_range(job)
+    return load_pdf(job)
+
+def _failed_result(job, load_time: float, error: str):
+    """Build the result for a job that did not return one."""
+    if isinstance(job, PageRangeJob):
+        return PageRangeResult(job.filename, job.start, load_time, error=error)
+    return PDFLoadResult(job[0], load_time, 0, error=error)
+
+def run_pdf_jobs(jobs: List[tuple], processes: Optional[int] = None, file_timeout: Optional[float] = DEFAULT_FILE_TIMEOUT, on_result=None, pool: Optional[PDFWorkerPool] = None) -> List[PDFLoadResult]:
+    """
+    Run load_pdf / load_page_range jobs in a worker pool, with a per-job timeout.
+    
+    The run leases workers of its own from the pool, and submits jobs through
+    a sliding window of one job per worker. Each job's clock starts when its
+    worker reports picking it up. A watchdog checks the running jobs; when one
+    runs past file_timeout, only the worker running it is killed (the pool
+    replaces it) and that PDF is reported as timed out. Other jobs, and other
+    runs sharing the pool, carry on.
+    
+    A worker that dies mid-job (e.g. a PyMuPDF crash) is replaced by the pool,
+    but the job's result never arrives. The watchdog checks that the worker
+    running each job is still alive and reports the job as failed once it has
+    been gone for WORKER_EXIT_GRACE, with or without a file_timeout. A worker
+    dying after taking a job but before reporting it as started cannot be
+    detected; only file_timeout catches that.
+    
+    Args:
+        jobs: Argument tuples for load_pdf, or PageRangeJob instances
+        processes: Number of worker processes for a temporary pool, defaults to the number of CPU cores;
+            ignored when a pool is given, whose size applies
+        file_timeout: Seconds allowed per PDF, or None for no limit
+        on_result: Optional callback invoked with each result as it finishes
+        pool: Persistent PDFWorkerPool to use instead of starting a temporary one
+        
+    Returns:
+        List: PDFLoadResult / PageRangeResult objects in completion order
+    """
+    owns_pool = pool is None
+    if owns_pool:
+        pool = PDFWorkerPool(processes=processes, max_idle=0)
+    pending = deque(jobs)
+    results = []
+    
+    def finish(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
+    
+    def job_name(job):
+        return os.path.basename(job.filename if isinstance(job, PageRangeJob) else job[0])
+    
+    try:
+        # Abandoning the run (an error, or a Streamlit rerun) kills only this lease's workers
+        with pool.lease() as workers:
+            running = []  # Oldest first
+            while pending or running:
+                # Keep one job per worker in flight
+                while pending and len(running) < workers.size:
+                    job = pending.popleft()
+                    task_id, async_result = workers.apply_async(_run_job, (job,))
+                    running.append({'job': job, 'task_id': task_id, 'result': async_result,
+                                    'submitted': time.monotonic(), 'started': None, 'pid': None})
+                
+                # Wait briefly on the oldest job, then check them all
+                running[0]['result'].wait(WATCHDOG_INTERVAL)
+                now = time.monotonic()
+                for task_id, pid in workers.started_tasks().items():
+                    for entry in running:
+                        if entry['task_id'] == task_id:
+                            entry['started'], entry['pid'] = now, pid
+                restart = False
+                for entry in list(running):
+                    job = entry['job']
+                    if entry['result'].ready():
+                        running.remove(entry)
+                        try:
+                            finish(entry['result'].get())
+                        except Exception as e:
+                            finish(_failed_result(job, now - (entry['started'] or entry['submitted']), str(e)))
+                    elif entry['pid'] is not None and not workers.worker_alive(entry['pid']):
+                        # A worker that exits normally delivers its result first, so allow it a moment
+                        entry.setdefault('died', now)
+                        if now - entry['died'] > WORKER_EXIT_GRACE:
+                            running.remove(entry)
+                            print(f"Watchdog: the worker processing {job_name(job)} died")
+                            workers.abandon(entry['task_id'])
+                            finish(_failed_result(job, now - entry['started'], "Worker process died"))
+                    elif not file_timeout:
+                        continue
+                    elif entry['started'] is not None and now - entry['started'] > file_timeout:
+                        running.remove(entry)
+                        print(f"Watchdog: {job_name(job)} exceeded {file_timeout} seconds, killing its worker")
+                        workers.kill_worker(entry['pid'], entry['task_id'])
+                        finish(_failed_result(job, now - entry['started'], f"Timed out after {file_timeout} seconds"))
+                    elif entry['started'] is None and now - entry['submitted'] > file_timeout:
+                        # No worker picked the job up, so there is no single worker to blame
+                        running.remove(entry)
+                        print(f"Watchdog: {job_name(job)} was not started within {file_timeout} seconds, restarting workers")
+                        finish(_failed_result(job, now - entry['submitted'], f"Not started within {file_timeout} seconds"))
+                        restart = True
+                
+                if restart:
+                    # Jobs interrupted by the restart go back to the front of the queue
+                    workers.restart()
+                    for entry in reversed(running):
+                        pending.appendleft(entry['job'])
+                    running = []
+    finally:
+        if owns_pool:
+            pool.close()
+    
+    return results
 
-def process_pdfs(pdf_folder, output_folder, search_results_file=None, processes=None, remove_stopwords=True):
-    """Process all PDFs in a folder and return timing info"""
+def process_pdfs(pdf_folder, output_folder, search_results_file=None, processes=None, remove_stopwords=True, force=False, file_timeout=DEFAULT_FILE_TIMEOUT, pool=None):
+    """
+    Process all PDFs in a folder and return timing info; unchanged PDFs are skipped unless force is set.
+    
+    Pass a persistent PDFWorkerPool as pool to reuse warm workers across calls;
+    otherwise a temporary pool of `processes` workers is started (`processes` is
+    ignored when a pool is given).
+    """
     start_time = time.time()
     
     # Get all PDF files in the folder
@@ -311,20 +871,157 @@ def process_pdfs(pdf_folder, output_folder, search_results_file=None, processes=
     # Always look for smart_results.json in the smart_search_results folder
     smart_results_file = os.path.join(uuid_dir, "smart_search_results", "smart_results.json")
     
+    # Parse smart_results.json once; each worker only receives its own paper's record
+    metadata_index = {}
     if os.path.exists(smart_results_file):
         print(f"Using smart search results file: {smart_results_file}")
-        search_results_file = uuid_dir  # Pass the UUID directory instead of the file path
+        try:
+            metadata_index = load_paper_metadata_index(uuid_dir) or {}
+        except Exception as e:
+            print(f"Error loading smart_results.json: {e}")
     else:
         print(f"Warning: No smart_results.json found at {smart_results_file}")
         print("Will attempt to extract metadata directly from PDFs.")
-        search_results_file = None
     
-    # Create arguments list for the worker function
-    args = [(str(file), output_folder, search_results_file, remove_stopwords) for file in pdf_files]
+    # Skip PDFs whose input, metadata record and extractor version are unchanged
+    manifest = ProcessingManifest(str(output_folder), EXTRACTOR_VERSION)
+    stored = set(processed_document_ids(str(output_folder)))
+    results = []
+    to_process = []
+    for file in pdf_files:
+        paper_metadata = metadata_index.get(file.stem)
+        if (not force and (file.stem in stored or manifest.rejected(str(file)))
+                and manifest.is_current(str(file), metadata_hash=_record_hash(paper_metadata))):
+            entry = manifest.get(str(file))
+            results.append(PDFLoadResult(str(file), 0.0, entry.get('pages', 0), entry.get('chars', 0),
+                                         entry['output_path'], skipped=True, chars_saved=entry.get('chars_saved', 0),
+                                         rejected=entry.get('rejected')))
+        else:
+            to_process.append(file)
+    
+    if results:
+        print(f"Skipping {len(results)} unchanged PDFs")
+    
+    # Large PDFs are split into page ranges so one long document does not set the batch time;
+    # their ranges are queued first, then the remaining files largest first
+    parts_dir = os.path.join(str(output_folder), PARTS_DIR_NAME)
+    split_files = {}
+    range_jobs = []
+    args = []
+    rejected = []
+    failed = []
+    for file in sorted(to_process, key=lambda f: f.stat().st_size, reverse=True):
+        # Whole-file jobs open and triage the file in the worker; large files are opened once
+        # here to count their pages and triage them before splitting
+        try:
+            with _open_pdf(str(file)) as doc:
+                page_count = doc.page_count
+                triage = triage_document(doc) if page_count > LARGE_PDF_PAGES else None
+        except Exception as e:
+            # Not a rejection: the file may be readable next run
+            failed.append(PDFLoadResult(str(file), 0.0, 0, error=f"Could not open PDF: {str(e)}"))
+            continue
+        if page_count > LARGE_PDF_PAGES:
+            if not triage.usable:
+                rejected.append(PDFLoadResult(str(file), 0.0, page_count, fingerprint=file_fingerprint(str(file)),
+                                              rejected=triage.reason))
+                continue
+            os.makedirs(parts_dir, exist_ok=True)
+            starts = list(range(0, page_count, PAGE_RANGE_SIZE))
+            split_files[str(file)] = {
+                'fingerprint': file_fingerprint(str(file)),
+                'ranges': len(starts),
+                'finished': 0,
+                'parts': {},
+                'load_time': 0.0,
+                'error': None
+            }
+            for start in starts:
+                part_path = os.path.join(parts_dir, f"{file.stem}_{start:06d}.json")
+                range_jobs.append(PageRangeJob(str(file), start, min(start + PAGE_RANGE_SIZE, page_count), part_path))
+        else:
+            # Create arguments list for the worker function
+            args.append((str(file), output_folder, metadata_index.get(file.stem), remove_stopwords))
+    
+    if split_files:
+        print(f"Splitting {len(split_files)} large PDFs into {len(range_jobs)} page ranges")
+    
+    # Results stream back as each file finishes, so progress can be reported
+    def record_result(result: PDFLoadResult):
+        results.append(result)
+        done = len(results) - skipped
+        filename = os.path.basename(result.filename)
+        if result.error:
+            print(f"[{done}/{len(to_process)}] Failed {filename}: {result.error}")
+            return
+        metadata_hash = _record_hash(metadata_index.get(Path(result.filename).stem))
+        if result.rejected:
+            print(f"[{done}/{len(to_process)}] Rejected {filename}: {result.rejected}")
+            manifest.record(result.filename, None, result.fingerprint, pages=result.pages,
+                            rejected=result.rejected, metadata_hash=metadata_hash)
+            # Drop output from earlier runs, so indexing skips the document
+            local_id = Path(result.filename).stem
+            with DocumentStore(output_folder) as store:
+                store.delete(local_id)
+            legacy_path = os.path.join(str(output_folder), f"processed_{local_id}.json")
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+            return
+        print(f"[{done}/{len(to_process)}] {result.load_time:.2f} seconds to load {filename} "
+              f"({result.pages} pages, {result.chars:,} chars, {result.chars_saved:,} stripped)")
+        manifest.record(result.filename, result.output_path, result.fingerprint,
+                        pages=result.pages, chars=result.chars, chars_saved=result.chars_saved,
+                        metadata_hash=metadata_hash)
+    
+    def handle_result(result):
+        if not isinstance(result, PageRangeResult):
+            record_result(result)
+            return
+        
+        # Wait until every range of the file is in, then reassemble in page order
+        split = split_files[result.filename]
+        split['load_time'] += result.load_time
+        if result.error:
+            split['error'] = split['error'] or result.error
+        else:
+            split['parts'][result.start] = result.part_path
+        split['finished'] += 1
+        if split['finished'] < split['ranges']:
+            return
+        
+        part_paths = [split['parts'][start] for start in sorted(split['parts'])]
+        try:
+            if split['error']:
+                record_result(PDFLoadResult(result.filename, split['load_time'], 0, error=split['error']))
+                return
+            try:
+                extracted, output_path = assemble_page_ranges(result.filename, part_paths, output_folder,
+                                                              metadata_index.get(Path(result.filename).stem),
+                                                              remove_stopwords)
+            except Exception as e:
+                record_result(PDFLoadResult(result.filename, split['load_time'], 0, error=str(e)))
+                return
+            chars = sum(len(text) for text in extracted.page_texts) + len(PAGES_DELIMITER) * max(0, extracted.page_count - 1)
+            record_result(PDFLoadResult(result.filename, split['load_time'], extracted.page_count, chars,
+                                        str(output_path), fingerprint=split['fingerprint'],
+                                        chars_saved=_chars_saved(extracted)))
+        finally:
+            for part_path in part_paths:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
     
-    # Use Pool instead of ProcessPoolExecutor for better multiprocessing support
-    with Pool(processes=processes) as pool:
-        results = pool.map(load_pdf, args)
+    skipped = len(results)
+    for result in rejected + failed:
+        record_result(result)
+    try:
+        jobs = range_jobs + args
+        if jobs:
+            run_pdf_jobs(jobs, processes=processes, file_timeout=file_timeout, on_result=handle_result, pool=pool)
+    finally:
+        # Keep progress even if the run is interrupted
+        manifest.save()
+        if os.path.isdir(parts_dir) and not os.listdir(parts_dir):
+            os.rmdir(parts_dir)
     
     end_time = time.time()
     total_time = end_time - start_time
@@ -344,10 +1041,21 @@ def print_summary(results: List[PDFLoadResult]):
     total_pages = sum(r.pages for r in results)
     avg_time = total_time / len(results)
     
+    skipped = sum(1 for r in results if r.skipped)
+    rejected = [r for r in results if r.rejected]
+    chars_saved = sum(r.chars_saved for r in results)
+    
     print("\nProcessing Summary:")
     print("-" * 50)
     print(f"Total PDFs processed: {len(results)}")
+    if skipped:
+        print(f"Unchanged PDFs skipped: {skipped}")
+    if rejected:
+        print(f"Unusable PDFs rejected: {len(rejected)}")
+        for result in rejected:
+            print(f"  {os.path.basename(result.filename)}: {result.rejected}")
     print(f"Total pages processed: {total_pages}")
+    print(f"Boilerplate stripped: {chars_saved:,} chars (~{chars_saved // CHARS_PER_TOKEN:,} tokens)")
     print(f"Total processing time: {total_time:.2f} seconds")
     print(f"Average time per PDF: {avg_time:.2f} seconds")
     
@@ -361,77 +1069,61 @@ def print_summary(results: List[PDFLoadResult]):
         'total_pdfs': len(results),
         'total_pages': total_pages,
         'total_time': total_time,
-        'avg_time': avg_time
+        'avg_time': avg_time,
+        'chars_saved': chars_saved,
+        'rejected': len(rejected)
     }
 
-def process_pdf(pdf_path: str, uuid: str):
-    """Process a single PDF file and save with metadata."""
-    try:
-        # Get local_id from filename
-        local_id = Path(pdf_path).stem
-        
-        # Load PDF content
-        loader = PyMuPDFLoader(pdf_path, mode="single", extract_tables="markdown", pages_delimiter="\n<<12344567890>>\n")
-        data = loader.load()
-        
-        # Get UUID directory
-        uuid_dir = os.path.join("downloads", uuid)
-        
-        # Get paper metadata
-        paper_metadata = find_paper_metadata(local_id, uuid_dir)
-        
-        # Create metadata dictionary from PyMuPDF metadata
-        metadata = dict(data[0].metadata) if hasattr(data[0], 'metadata') else {}
-        
-        # Add local_id at top level
-        metadata['local_id'] = local_id
-        
-        # Add paper_metadata as a separate field without modifications
-        if paper_metadata:
-            metadata['paper_metadata'] = paper_metadata
-            if 'evaluation' in paper_metadata:
-                print(f"Evaluation field present in paper_metadata: {paper_metadata['evaluation']}")
-        
-        # Create output data
-        processed_data = {
-            'page_content': data[0].page_content,
-            'metadata': metadata
-        }
-        
-        # Create output path
-        output_dir = Path("downloads") / uuid / "processed_data"
-        output_dir.mkdir(exist_ok=True)
-        output_path = output_dir / f"processed_{local_id}.json"
-        
-        # Save processed data
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(processed_data, f, ensure_ascii=False, indent=2)
-            
-        print(f"Successfully processed {local_id}")
-        
-    except Exception as e:
-        print(f"Error processing PDF {pdf_path}: {e}")
+def process_pdf(pdf_path: str, uuid: str, paper_metadata: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Process a single PDF file and save with metadata, returning the output path (None on error or if rejected)."""
+    # Get local_id from filename
+    local_id = Path(pdf_path).stem
+    
+    # Get paper metadata unless the caller already looked it up
+    if paper_metadata is None:
+        paper_metadata = find_paper_metadata(local_id, os.path.join("downloads", uuid))
+    
+    output_dir = Path("downloads") / uuid / "processed_data"
+    result = load_pdf((pdf_path, output_dir, paper_metadata, False))
+    if result.error:
+        return None
+    if result.rejected:
+        print(f"Rejected {local_id}: {result.rejected}")
+        return None
+    
+    print(f"Successfully processed {local_id}")
+    return result.output_path
 
-def process_pdfs_in_folder(uuid: str):
-    """Process all PDFs in the papers folder for a given UUID."""
+def process_pdfs_in_folder(uuid: str, force: bool = False, processes: Optional[int] = None, file_timeout: Optional[float] = DEFAULT_FILE_TIMEOUT):
+    """Process all PDFs in the papers folder for a given UUID, in parallel, skipping unchanged PDFs unless force is set."""
     # Get path to papers folder
     papers_dir = Path("downloads") / uuid / "papers"
     
     if not papers_dir.exists():
         print(f"Papers directory not found: {papers_dir}")
-        return
+        return []
     
-    # Process each PDF
-    for pdf_file in papers_dir.glob("*.pdf"):
-        process_pdf(str(pdf_file), uuid)
+    results = process_pdfs(
+        pdf_folder=str(papers_dir),
+        output_folder=str(Path("downloads") / uuid / "processed_data"),
+        processes=processes,
+        remove_stopwords=False,
+        force=force,
+        file_timeout=file_timeout
+    )
+    print_summary(results)
+    return results
 
 def main():
     """Main function to process PDFs from command line"""
     parser = argparse.ArgumentParser(description="Process PDFs and add metadata from smart_results.json")
     parser.add_argument("uuid", help="UUID of the search to process")
+    parser.add_argument("--force", action="store_true", help="Reprocess PDFs even if they are unchanged")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: all CPU cores)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_FILE_TIMEOUT, help="Seconds allowed per PDF before its worker is restarted")
     args = parser.parse_args()
     
-    process_pdfs_in_folder(args.uuid)
+    process_pdfs_in_folder(args.uuid, force=args.force, processes=args.workers, file_timeout=args.timeout)
 
 if __name__ == "__main__":
     # Required for Windows multiprocessing
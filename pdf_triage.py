@@ -0,0 +1,110 @@
+"""
+Fast triage of PDFs before full extraction.
+
+A few pages spread through the document are sampled to decide whether it is
+worth extracting at all. Scanned or image-only PDFs have little or no text
+layer, PDFs with broken font encodings yield replacement or private-use
+glyphs, and papers in other languages contain few English function words.
+Such documents are rejected before table finding, chunking and embedding.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+import fitz  # PyMuPDF
+
+# Pages sampled from each document
+TRIAGE_SAMPLE_PAGES = 5
+
+# Below this many characters per sampled page the document has no usable text layer
+MIN_CHARS_PER_PAGE = 200
+
+# Share of characters that must be ordinary printable glyphs
+MIN_VALID_GLYPH_RATIO = 0.9
+
+# Share of words that must be common English function words
+MIN_STOPWORD_RATIO = 0.08
+
+# Common English function words; running text has 30-50% of them, other languages very few
+ENGLISH_STOPWORDS = frozenset("""
+a about after all also an and any are as at be been but by can could did do does for from had has
+have he her his how if in into is it its may more most no not of on only or other our she should
+so such than that the their them then there these they this those through to under was we were
+what when where which while who will with would you
+""".split())
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+@dataclass
+class TriageResult:
+    """Outcome of triaging a PDF."""
+    usable: bool
+    reason: Optional[str] = None
+    page_count: int = 0
+    chars_per_page: float = 0.0
+    valid_glyph_ratio: float = 1.0
+    stopword_ratio: float = 0.0
+
+def _sample_pages(page_count: int) -> list:
+    """Pick up to TRIAGE_SAMPLE_PAGES page numbers spread evenly through a document."""
+    if page_count <= TRIAGE_SAMPLE_PAGES:
+        return list(range(page_count))
+    step = page_count / TRIAGE_SAMPLE_PAGES
+    return sorted({int(step * i + step / 2) for i in range(TRIAGE_SAMPLE_PAGES)})
+
+def _is_valid_glyph(char: str) -> bool:
+    """Check whether a character is an ordinary printable glyph or whitespace."""
+    if char.isspace():
+        return True
+    if char == '�':
+        return False
+    # Control, private-use, unassigned and surrogate characters come from broken font encodings
+    return not unicodedata.category(char).startswith('C')
+
+def triage_document(doc) -> TriageResult:
+    """
+    Sample an open document's text layer and decide whether it is worth extracting.
+
+    Args:
+        doc: Open fitz document
+
+    Returns:
+        TriageResult: Whether the document is usable and, if not, why
+    """
+    page_count = doc.page_count
+    if page_count == 0:
+        return TriageResult(False, "no pages")
+
+    pages = _sample_pages(page_count)
+    text = "".join(doc[page_number].get_text() for page_number in pages)
+    chars_per_page = len(text.strip()) / len(pages)
+    if chars_per_page < MIN_CHARS_PER_PAGE:
+        return TriageResult(False, "no text layer (scanned or image-only)", page_count, chars_per_page)
+
+    valid_glyph_ratio = sum(1 for char in text if _is_valid_glyph(char)) / len(text)
+    if valid_glyph_ratio < MIN_VALID_GLYPH_RATIO:
+        return TriageResult(False, "garbled text (broken font encoding)", page_count, chars_per_page,
+                            valid_glyph_ratio)
+
+    words = WORD_PATTERN.findall(text.lower())
+    stopword_ratio = sum(1 for word in words if word in ENGLISH_STOPWORDS) / max(len(words), 1)
+    if stopword_ratio < MIN_STOPWORD_RATIO:
+        return TriageResult(False, "not in English", page_count, chars_per_page, valid_glyph_ratio, stopword_ratio)
+
+    return TriageResult(True, None, page_count, chars_per_page, valid_glyph_ratio, stopword_ratio)
+
+def triage_pdf(pdf_path: str) -> TriageResult:
+    """
+    Triage a PDF file.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+
+    Returns:
+        TriageResult: Whether the document is usable and, if not, why; errors opening the
+            file are raised, as they may be transient and are not a reason to reject it
+    """
+    with fitz.open(pdf_path) as doc:
+        return triage_document(doc)
@@ -0,0 +1,314 @@
+"""
+Long-lived PDF worker processes, reused across processing runs.
+
+The same workers also split processed documents into chunks for indexing.
+
+Starting a multiprocessing pool and importing PyMuPDF in every worker costs
+more than extracting a handful of small PDFs. The app keeps one PDFWorkerPool
+for its lifetime; workers are started on first use, warmed by importing the
+processing module up front, and recycled after a number of tasks to contain
+PyMuPDF's memory growth.
+
+The PDFWorkerPool is shared by every session of the app, so each run leases
+a multiprocessing pool of its own: a warm one left by an earlier run if there
+is one, a new one otherwise. Killing a stuck worker or abandoning a run then
+never touches the tasks of another run. Workers report which task they start,
+so a run can time its tasks from when they actually start and find the worker
+running each one.
+"""
+
+import os
+import importlib
+import itertools
+import threading
+import multiprocessing
+from multiprocessing import Pool
+from typing import Optional, Dict, Any, Tuple, List
+
+# Workers are replaced after this many tasks
+DEFAULT_MAX_TASKS_PER_CHILD = 20
+
+# Warm pools kept for the next run when a run finishes
+DEFAULT_MAX_IDLE_POOLS = 1
+
+# Imported in each worker as it starts, so the first task does not pay for it
+WARM_MODULES = ("fitz", "pdf_processor_pymupdf", "document_chunking")
+
+# Queue a worker reports the tasks it starts on; set in each worker by the initializer
+_started_queue = None
+
+def _warm_worker(modules: Tuple[str, ...], started_queue):
+    """Pool initializer: import the heavy modules before any task arrives."""
+    global _started_queue
+    _started_queue = started_queue
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+def _run_task(task_id: int, func, args: tuple):
+    """Report the task as started by this worker, then run it."""
+    if _started_queue is not None:
+        _started_queue.put((task_id, os.getpid()))
+    return func(*args)
+
+class _Workers:
+    """A multiprocessing pool and the queue its workers report started tasks on."""
+
+    def __init__(self, size: int, maxtasksperchild: int):
+        # Written synchronously, so a report is not lost if the worker dies right after starting a task
+        self.started_queue = multiprocessing.SimpleQueue()
+        self.pool = Pool(
+            processes=size,
+            initializer=_warm_worker,
+            initargs=(WARM_MODULES, self.started_queue),
+            maxtasksperchild=maxtasksperchild
+        )
+
+    def processes(self) -> List[multiprocessing.Process]:
+        """
+        Snapshot the pool's current worker processes.
+
+        multiprocessing.Pool has no public API for its workers, so this reads
+        the undocumented CPython attribute Pool._pool. The pool's own handler
+        thread replaces exited workers in that list concurrently, hence the copy.
+        """
+        return list(self.pool._pool)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self.started_queue.close()
+
+    def terminate(self):
+        self.pool.terminate()
+        self.pool.join()
+        self.started_queue.close()
+
+class WorkerLease:
+    """
+    A run's exclusive use of a pool of workers, obtained from PDFWorkerPool.lease.
+    """
+
+    def __init__(self, owner: "PDFWorkerPool"):
+        self._owner = owner
+        self.size = owner.size
+        self._workers: Optional[_Workers] = None
+        self._task_ids = itertools.count()
+        self._in_flight = set()
+        # Set once a task is abandoned; the pool then waits on it forever, so it cannot be closed and reused
+        self._abandoned = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.release(healthy=exc_type is None)
+
+    @property
+    def in_flight(self) -> int:
+        """Tasks submitted and not yet finished or abandoned."""
+        return len(self._in_flight)
+
+    def _task_done(self, workers: _Workers, task_id: int):
+        """Callback run when a task finishes, successfully or not."""
+        with self._owner._lock:
+            if workers is self._workers and task_id in self._in_flight:
+                self._in_flight.discard(task_id)
+                self._owner._completed += 1
+
+    def apply_async(self, func, args: tuple = ()) -> Tuple[int, Any]:
+        """
+        Submit a task, starting the workers if needed.
+
+        Args:
+            func: Picklable function to run in a worker
+            args (tuple): Arguments for the function
+
+        Returns:
+            Tuple[int, multiprocessing.pool.AsyncResult]: Task ID and handle for the task's result
+        """
+        if self._workers is None:
+            self._workers = self._owner._take_workers()
+        workers = self._workers
+        task_id = next(self._task_ids)
+        with self._owner._lock:
+            self._in_flight.add(task_id)
+        done = lambda _: self._task_done(workers, task_id)
+        return task_id, workers.pool.apply_async(_run_task, (task_id, func, args), callback=done, error_callback=done)
+
+    def started_tasks(self) -> Dict[int, int]:
+        """
+        Collect the tasks workers reported as started since the last call.
+
+        Returns:
+            Dict[int, int]: Process ID of the worker running each newly started task
+        """
+        started = {}
+        if self._workers is not None:
+            while not self._workers.started_queue.empty():
+                task_id, pid = self._workers.started_queue.get()
+                started[task_id] = pid
+        return started
+
+    def worker_alive(self, pid: int) -> bool:
+        """Check whether a worker process of this lease is still running."""
+        if self._workers is None:
+            return False
+        return any(process.pid == pid and process.is_alive() for process in self._workers.processes())
+
+    def kill_worker(self, pid: int, task_id: int) -> bool:
+        """
+        Kill the worker running a stuck task; the pool replaces it and the task is abandoned.
+
+        Args:
+            pid (int): Process ID of the worker
+            task_id (int): Task it is running
+
+        Returns:
+            bool: Whether the worker was found and killed
+        """
+        self.abandon(task_id)
+        if self._workers is None:
+            return False
+        for process in self._workers.processes():
+            if process.pid == pid:
+                process.kill()
+                with self._owner._lock:
+                    self._owner._workers_killed += 1
+                return True
+        return False
+
+    def abandon(self, task_id: int):
+        """Stop waiting for a task whose result will never arrive."""
+        with self._owner._lock:
+            self._in_flight.discard(task_id)
+            self._abandoned = True
+
+    def restart(self):
+        """Kill this lease's workers and start fresh ones on next use; other runs are unaffected."""
+        workers, self._workers = self._workers, None
+        with self._owner._lock:
+            self._in_flight.clear()
+            self._abandoned = False
+            self._owner._restarts += 1
+        if workers is not None:
+            workers.terminate()
+
+    def release(self, healthy: bool = True):
+        """
+        Give the workers back to the PDFWorkerPool.
+
+        Args:
+            healthy (bool): Whether the run finished normally; otherwise, or when tasks
+                are still running or were abandoned, the workers are killed rather than reused
+        """
+        workers, self._workers = self._workers, None
+        with self._owner._lock:
+            reusable = healthy and not self._in_flight and not self._abandoned
+            self._in_flight.clear()
+        self._owner._return_lease(self, workers if reusable else None)
+        if workers is not None and not reusable:
+            workers.terminate()
+
+class PDFWorkerPool:
+    """
+    Warm worker pools leased to one run at a time, with queue statistics.
+    """
+
+    def __init__(self, processes: Optional[int] = None, maxtasksperchild: int = DEFAULT_MAX_TASKS_PER_CHILD,
+                 max_idle: int = DEFAULT_MAX_IDLE_POOLS):
+        """
+        Initialize the pool without starting any processes.
+
+        Args:
+            processes (int, optional): Number of worker processes per run, defaults to the number of CPU cores
+            maxtasksperchild (int): Tasks a worker runs before it is replaced
+            max_idle (int): Warm pools kept between runs
+        """
+        self.size = processes or os.cpu_count() or 1
+        self.maxtasksperchild = maxtasksperchild
+        self.max_idle = max_idle
+        self._idle: List[_Workers] = []
+        self._leases: List[WorkerLease] = []
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._restarts = 0
+        self._workers_killed = 0
+
+    @property
+    def started(self) -> bool:
+        """Whether any worker processes are running."""
+        return bool(self._idle) or any(lease._workers is not None for lease in self._leases)
+
+    def start(self):
+        """Start and warm a pool ahead of the first run."""
+        with self._lock:
+            if self._idle:
+                return
+        workers = _Workers(self.size, self.maxtasksperchild)
+        with self._lock:
+            self._idle.append(workers)
+
+    def lease(self) -> WorkerLease:
+        """
+        Lease workers for one run; use as a context manager.
+
+        Returns:
+            WorkerLease: Workers for this run only, started on its first task
+        """
+        lease = WorkerLease(self)
+        with self._lock:
+            self._leases.append(lease)
+        return lease
+
+    def _take_workers(self) -> _Workers:
+        """Hand out a warm idle pool, or start a new one."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return _Workers(self.size, self.maxtasksperchild)
+
+    def _return_lease(self, lease: WorkerLease, workers: Optional[_Workers]):
+        """Keep a released lease's workers warm for the next run, up to max_idle pools."""
+        surplus = None
+        with self._lock:
+            if lease in self._leases:
+                self._leases.remove(lease)
+            if workers is not None:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(workers)
+                else:
+                    surplus = workers
+        if surplus is not None:
+            surplus.close()
+
+    def close(self):
+        """Shut down the idle pools; leased ones are shut down when their run releases them."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.max_idle = 0
+        for workers in idle:
+            workers.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the pool's current size and load.
+
+        Returns:
+            Dict[str, Any]: Size, whether it is started, active runs, queue depth, completed tasks,
+                restarts and killed workers
+        """
+        with self._lock:
+            return {
+                'size': self.size,
+                'started': self.started,
+                'active_runs': len(self._leases),
+                'idle_pools': len(self._idle),
+                'queue_depth': sum(lease.in_flight for lease in self._leases),
+                'completed': self._completed,
+                'restarts': self._restarts,
+                'workers_killed': self._workers_killed,
+                'maxtasksperchild': self.maxtasksperchild
+            }
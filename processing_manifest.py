@@ -0,0 +1,135 @@
+"""
+Manifest of processed PDFs, used to skip inputs that have not changed since they were last processed.
+
+The manifest lives next to the processed documents and records, for each PDF,
+its size, modification time and SHA-256 hash together with the extractor
+version that produced the output.
+"""
+
+import os
+import json
+import hashlib
+from typing import Dict, Any, Optional, Set
+
+MANIFEST_FILENAME = "processing_manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def file_fingerprint(path: str) -> Dict[str, Any]:
+    """
+    Compute the size, modification time and SHA-256 hash of a file.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        Dict[str, Any]: Fingerprint with 'size', 'mtime' and 'sha256'
+    """
+    stat = os.stat(path)
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': sha256.hexdigest()
+    }
+
+class ProcessingManifest:
+    """
+    Record of which PDFs in a folder have been processed, and from what input.
+    """
+
+    def __init__(self, output_folder: str, extractor_version: str):
+        """
+        Load the manifest for an output folder.
+
+        Args:
+            output_folder (str): Folder holding the processed documents
+            extractor_version (str): Version of the extractor; entries from other versions are stale
+        """
+        self.path = os.path.join(output_folder, MANIFEST_FILENAME)
+        self.extractor_version = extractor_version
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('files', {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable processing manifest {self.path}: {e}")
+
+    def get(self, pdf_path: str) -> Optional[Dict[str, Any]]:
+        """Get the manifest entry for a PDF, if any."""
+        return self.entries.get(os.path.basename(pdf_path))
+
+    def is_current(self, pdf_path: str, **expected) -> bool:
+        """
+        Check whether a PDF's processed output is up to date.
+
+        Size and mtime are compared first; the content hash is only computed
+        when the size matches but the mtime has changed (e.g. after a copy).
+
+        Args:
+            pdf_path (str): Path to the PDF
+            **expected: Entry details that must match, such as a hash of the paper's metadata
+
+        Returns:
+            bool: True if the PDF can be skipped
+        """
+        entry = self.get(pdf_path)
+        if not entry or entry.get('extractor_version') != self.extractor_version:
+            return False
+        if any(entry.get(key) != value for key, value in expected.items()):
+            return False
+        # Rejected PDFs have no output; they stay rejected until the file changes
+        if not entry.get('rejected') and (not entry.get('output_path') or not os.path.exists(entry['output_path'])):
+            return False
+
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            return False
+        if stat.st_size != entry.get('size'):
+            return False
+        if stat.st_mtime == entry.get('mtime'):
+            return True
+
+        # Same size, new mtime: only the content hash can tell
+        fingerprint = file_fingerprint(pdf_path)
+        if fingerprint['sha256'] != entry.get('sha256'):
+            return False
+        entry['mtime'] = fingerprint['mtime']
+        return True
+
+    def rejected(self, pdf_path: str) -> Optional[str]:
+        """Get the reason a PDF was rejected as unusable, or None if it was not."""
+        return (self.get(pdf_path) or {}).get('rejected')
+
+    def record(self, pdf_path: str, output_path: Optional[str], fingerprint: Optional[Dict[str, Any]] = None, **details):
+        """
+        Record that a PDF has been processed.
+
+        Args:
+            pdf_path (str): Path to the PDF
+            output_path (str, optional): Path to the processed output (the document store), None for rejected PDFs
+            fingerprint (Dict[str, Any], optional): Precomputed file_fingerprint of the PDF
+            **details: Extra values to keep with the entry, such as page and character counts
+        """
+        entry = dict(fingerprint or file_fingerprint(pdf_path))
+        entry.update(details)
+        entry['output_path'] = str(output_path) if output_path else None
+        entry['extractor_version'] = self.extractor_version
+        self.entries[os.path.basename(pdf_path)] = entry
+
+    def rejected_ids(self) -> Set[str]:
+        """Get the local IDs (file stems) of PDFs rejected as unusable."""
+        return {os.path.splitext(name)[0] for name, entry in self.entries.items() if entry.get('rejected')}
+
+    def save(self):
+        """Write the manifest, replacing the previous file atomically."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': self.entries}, f, indent=2)
+        os.replace(temp_path, self.path)
@@ -7,11 +7,15 @@ import json
 import asyncio
 import logging
 import shutil
+import time
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from tqdm import tqdm
 import aiohttp
+from .src.config import USE_PROXIES
 from .src.utils.bs_downloader import BSDownloader
+from .src.utils.proxy_manager import create_proxy_manager
+from .src.utils.oa_prefetch import prefetch_open_access
 
 # Configure logging
 logging.basicConfig(
@@ -20,28 +24,89 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def open_access_likelihood(paper: Dict[str, Any]) -> int:
+    """
+    Estimate how likely a paper is to have a freely downloadable PDF.
+    
+    Args:
+        paper (Dict[str, Any]): Paper data from the search results.
+        
+    Returns:
+        int: Likelihood score, higher is better.
+    """
+    likelihood = 0
+    if paper.get('open_access_pdf') or paper.get('pdf_url'):
+        likelihood += 2
+    if paper.get('is_open_access') or paper.get('pmc_id'):
+        likelihood += 1
+    if 'arxiv' in (paper.get('doi') or '').lower() or 'arxiv' in (paper.get('url') or '').lower():
+        likelihood += 1
+    return likelihood
+
+def download_priority(paper: Dict[str, Any]) -> Tuple[float, int]:
+    """
+    Get the download queue priority for a paper; lower values are downloaded first.
+    
+    Papers are ordered by their smart evaluation score, then by open-access likelihood.
+    
+    Args:
+        paper (Dict[str, Any]): Paper data, optionally with an ``evaluation`` field.
+        
+    Returns:
+        Tuple[float, int]: Priority key for the download queue.
+    """
+    evaluation = paper.get('evaluation') or {}
+    try:
+        score = float(evaluation.get('score') or 0)
+    except (TypeError, ValueError):
+        score = 0.0
+    return (-score, -open_access_likelihood(paper))
+
 async def download_papers(
     input_file: str = None,
     output_dir: Optional[str] = None,
     max_papers: int = None,
     skip_existing: bool = True,
     max_concurrent: int = 5,
-    save_summary_to: Optional[str] = None
+    save_summary_to: Optional[str] = None,
+    use_proxies: bool = USE_PROXIES,
+    deadline: Optional[float] = None,
+    open_access_prefetch: bool = True,
+    open_access_lookup=None
 ) -> Dict[str, Any]:
     """
-    Download papers from a search results JSON file using BeautifulSoup.
+    Download papers from a search results JSON file.
+    
+    Papers are pulled from a priority queue ordered by evaluation score and
+    open-access likelihood, so the most valuable papers are fetched first.
     
     Args:
         input_file (str, optional): Path to the search results JSON file. If None, uses the most recent file.
         output_dir (str, optional): Directory to save downloaded papers. If None, creates a timestamped directory.
         max_papers (int, optional): Maximum number of papers to download. If None, downloads all papers.
+            In deadline mode this is the number of successful downloads to aim for.
         skip_existing (bool): Skip papers that already exist.
         max_concurrent (int): Maximum number of concurrent downloads.
         save_summary_to (str, optional): Path to save the download summary JSON. If None, saves in output_dir.
+        use_proxies (bool): Route downloads through the health-scored proxy pool (PROXY_LIST).
+        deadline (float, optional): Time budget in seconds for the whole call, counted from when it is
+            entered, so proxy validation and the open-access prefetch are cut short to fit in it. When set,
+            downloads stop once max_papers papers have been fetched or the budget runs out, and the rest
+            are marked not attempted.
+        open_access_prefetch (bool): Look up open-access PDF links for all candidates in bulk before downloading.
+        open_access_lookup (optional): Batch lookup client for the prefetch, e.g. LocalBatchLookup in tests.
         
     Returns:
         Dict[str, Any]: Summary of download results
     """
+    # The time budget covers the preparation steps as well as the downloads
+    started = time.monotonic()
+    
+    def remaining_budget() -> Optional[float]:
+        if not deadline:
+            return None
+        return max(0.0, deadline - (time.monotonic() - started))
+    
     # Use the most recent search results file if not specified
     if not input_file:
         search_results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_results")
@@ -82,115 +147,210 @@ async def download_papers(
     os.makedirs(output_dir, exist_ok=True)
     logger.info(f"Saving papers to: {output_dir}")
     
-    # Initialize downloader
-    downloader = BSDownloader()
+    # Initialize downloader, validating the proxy pool first if one is configured
+    proxy_manager = create_proxy_manager() if use_proxies else None
+    if proxy_manager:
+        try:
+            await asyncio.wait_for(proxy_manager.validate_all_proxies(), timeout=remaining_budget())
+        except asyncio.TimeoutError:
+            logger.warning("Deadline reached during proxy validation; unvalidated proxies are used as they are")
+        proxy_manager.start_revalidation()
+    downloader = BSDownloader(proxy_manager=proxy_manager)
+    
+    # Resolve open-access links for the whole candidate set in a few bulk requests
+    if open_access_prefetch:
+        try:
+            s2_records = await asyncio.wait_for(
+                prefetch_open_access(papers, client=open_access_lookup, proxy_manager=proxy_manager),
+                timeout=remaining_budget()
+            )
+            downloader.seed_semantic_scholar_records(s2_records)
+        except asyncio.TimeoutError:
+            logger.warning("Deadline reached during the open-access prefetch; downloads look links up themselves")
+    
+    # Highest-value papers first
+    papers = sorted(papers, key=download_priority)
     
-    # Limit number of papers if specified
-    if max_papers and max_papers < len(papers):
+    # Limit number of papers if specified; in deadline mode max_papers is a success target instead
+    target = None
+    if deadline:
+        target = max_papers
+        logger.info(f"Deadline mode: up to {target or len(papers)} papers within {deadline} seconds")
+    elif max_papers and max_papers < len(papers):
         logger.info(f"Limiting downloads to {max_papers} papers")
         papers = papers[:max_papers]
     
     # Download papers
     logger.info(f"Downloading {len(papers)} papers...")
     
-    # Create a semaphore to limit concurrent downloads
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
     # Create download summary with all original paper data
     download_summary = []
     
-    async def download_with_semaphore(paper: Dict[str, Any]) -> Dict[str, Any]:
-        """Download a single paper with semaphore control and return the result."""
-        async with semaphore:
-            try:
-                # Get paper identifier (DOI, local_id, or title)
-                paper_id = paper.get('local_id', paper.get('doi', paper.get('title', 'unknown')))
-                
-                # Create output filename based on local_id if available, otherwise use DOI or sanitized title
-                if paper.get('local_id'):
-                    filename = f"{paper['local_id']}.pdf"
-                elif paper.get('doi'):
-                    filename = f"{paper['doi'].replace('/', '_')}.pdf"
-                else:
-                    # Use sanitized title if no DOI or local_id
-                    title = paper.get('title', 'unknown')
-                    # Remove invalid characters from filename
-                    filename = "".join(c if c.isalnum() or c in " ._-" else "_" for c in title)
-                    filename = filename[:100] + ".pdf"  # Limit length
-                
-                output_path = os.path.join(output_dir, filename)
-                
-                # Create a copy of the paper data for the summary
-                result = paper.copy()
-                
-                # Add download-specific fields
-                result['download_status'] = 'skipped' if (skip_existing and os.path.exists(output_path)) else 'pending'
-                result['download_path'] = None
-                result['downloaded_from'] = None
-                
-                # Skip if file exists and skip_existing is True
-                if skip_existing and os.path.exists(output_path):
-                    logger.info(f"File already exists: {output_path}")
-                    result['download_path'] = output_path
-                    return result
-                
-                # Download based on source
-                source = paper.get('fetched_source', '')
-                success = False
-                download_source = None
-                
-                if source == 'semantic_scholar':
-                    success = await downloader.download_from_semantic_scholar(paper, output_path)
+    async def download_one(paper: Dict[str, Any]) -> Dict[str, Any]:
+        """Download a single paper and return the result."""
+        try:
+            # Get paper identifier (DOI, local_id, or title)
+            paper_id = paper.get('local_id', paper.get('doi', paper.get('title', 'unknown')))
+            
+            # Create output filename based on local_id if available, otherwise use DOI or sanitized title
+            if paper.get('local_id'):
+                filename = f"{paper['local_id']}.pdf"
+            elif paper.get('doi'):
+                filename = f"{paper['doi'].replace('/', '_')}.pdf"
+            else:
+                # Use sanitized title if no DOI or local_id
+                title = paper.get('title', 'unknown')
+                # Remove invalid characters from filename
+                filename = "".join(c if c.isalnum() or c in " ._-" else "_" for c in title)
+                filename = filename[:100] + ".pdf"  # Limit length
+            
+            output_path = os.path.join(output_dir, filename)
+            
+            # Create a copy of the paper data for the summary
+            result = paper.copy()
+            
+            # Add download-specific fields
+            result['download_status'] = 'skipped' if (skip_existing and os.path.exists(output_path)) else 'pending'
+            result['download_path'] = None
+            result['downloaded_from'] = None
+            
+            # Skip if file exists and skip_existing is True
+            if skip_existing and os.path.exists(output_path):
+                logger.info(f"File already exists: {output_path}")
+                result['download_path'] = output_path
+                return result
+            
+            # Download based on source
+            source = paper.get('fetched_source', '')
+            success = False
+            download_source = None
+            
+            if source == 'semantic_scholar':
+                success = await downloader.download_from_semantic_scholar(paper, output_path)
+                if success:
+                    download_source = 'semantic_scholar'
+            elif source == 'google_scholar':
+                success = await downloader.download_from_google_scholar(paper, output_path)
+                if success:
+                    download_source = 'google_scholar'
+            elif source == 'pubmed':
+                success = await downloader.download_from_pubmed(paper, output_path)
+                if success:
+                    download_source = 'pubmed'
+            elif source == 'crossref':
+                # Prefer an open-access PDF found by the prefetch, then try the DOI
+                if paper.get('open_access_pdf'):
+                    success = await downloader.download_from_url(paper['open_access_pdf'], output_path)
                     if success:
-                        download_source = 'semantic_scholar'
-                elif source == 'google_scholar':
-                    success = await downloader.download_from_google_scholar(paper, output_path)
+                        download_source = 'open_access_pdf'
+                if not success and paper.get('doi'):
+                    success = await downloader.download_from_doi(paper['doi'], output_path)
                     if success:
-                        download_source = 'google_scholar'
-                elif source == 'pubmed':
-                    success = await downloader.download_from_pubmed(paper, output_path)
+                        download_source = 'doi'
+            else:
+                # Try generic approach for unknown sources
+                if paper.get('doi'):
+                    success = await downloader.download_from_doi(paper['doi'], output_path)
                     if success:
-                        download_source = 'pubmed'
-                elif source == 'crossref':
-                    # For crossref, try DOI directly
-                    if paper.get('doi'):
-                        success = await downloader.download_from_doi(paper['doi'], output_path)
+                        download_source = 'doi'
+                elif paper.get('url'):
+                    pdf_url = await downloader.find_pdf_link_from_page(paper['url'])
+                    if pdf_url:
+                        success = await downloader.download_from_url(pdf_url, output_path)
                         if success:
-                            download_source = 'doi'
-                else:
-                    # Try generic approach for unknown sources
-                    if paper.get('doi'):
-                        success = await downloader.download_from_doi(paper['doi'], output_path)
-                        if success:
-                            download_source = 'doi'
-                    elif paper.get('url'):
-                        pdf_url = await downloader.find_pdf_link_from_page(paper['url'])
-                        if pdf_url:
-                            success = await downloader.download_from_url(pdf_url, output_path)
-                            if success:
-                                download_source = 'url'
-                
-                # Update result with download status
-                result['download_status'] = 'success' if success else 'failed'
-                result['download_path'] = output_path if success else None
-                result['downloaded_from'] = download_source
-                
-                return result
-            except Exception as e:
-                logger.error(f"Error downloading paper: {str(e)}")
-                # Create a copy of the paper data for the summary
+                            download_source = 'url'
+            
+            # Update result with download status
+            result['download_status'] = 'success' if success else 'failed'
+            result['download_path'] = output_path if success else None
+            result['downloaded_from'] = download_source
+            
+            return result
+        except Exception as e:
+            logger.error(f"Error downloading paper: {str(e)}")
+            # Create a copy of the paper data for the summary
+            result = paper.copy()
+            result['download_status'] = 'error'
+            result['download_path'] = None
+            result['downloaded_from'] = None
+            result['error_message'] = str(e)
+            return result
+    
+    # Queue every paper by priority; the queue position breaks ties so papers are never compared
+    queue = asyncio.PriorityQueue()
+    for position, paper in enumerate(papers):
+        queue.put_nowait((download_priority(paper), position, paper))
+    
+    results_by_position = {}
+    fetched = 0
+    in_flight = 0
+    target_reached = asyncio.Event()
+    # Signalled whenever a download finishes, so waiting workers recheck the target
+    download_finished = asyncio.Condition()
+    
+    def can_start() -> bool:
+        # With a target, never run more downloads than successes still needed, so the run cannot overshoot it
+        return target_reached.is_set() or not target or fetched + in_flight < target
+    
+    async def download_worker():
+        """Take papers off the queue until it is empty or the target is reached."""
+        nonlocal fetched, in_flight
+        while True:
+            async with download_finished:
+                await download_finished.wait_for(can_start)
+                if target_reached.is_set():
+                    return
+                try:
+                    _, position, paper = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                in_flight += 1
+            try:
+                result = await download_one(paper)
+            except asyncio.CancelledError:
                 result = paper.copy()
-                result['download_status'] = 'error'
+                result['download_status'] = 'cancelled'
                 result['download_path'] = None
                 result['downloaded_from'] = None
-                result['error_message'] = str(e)
-                return result
+                result['error_message'] = 'Deadline reached during download'
+                results_by_position[position] = result
+                raise
+            async with download_finished:
+                in_flight -= 1
+                results_by_position[position] = result
+                if result['download_status'] in ('success', 'skipped') and result['download_path']:
+                    fetched += 1
+                    if target and fetched >= target:
+                        target_reached.set()
+                download_finished.notify_all()
     
-    # Create tasks for all downloads
-    tasks = [download_with_semaphore(paper) for paper in papers]
+    # Run a fixed pool of workers over the queue
+    workers = [asyncio.create_task(download_worker()) for _ in range(max(1, min(max_concurrent, len(papers))))]
+    try:
+        if deadline:
+            done, pending = await asyncio.wait(workers, timeout=remaining_budget())
+            if pending:
+                logger.info(f"Deadline of {deadline} seconds reached with {len(pending)} downloads in progress")
+        else:
+            await asyncio.gather(*workers)
+    finally:
+        for worker in workers:
+            if not worker.done():
+                worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if proxy_manager:
+            proxy_manager.stop_revalidation()
     
-    # Wait for all downloads to complete
-    download_results = await asyncio.gather(*tasks)
+    # Papers left in the queue were never attempted
+    download_results = []
+    for position, paper in enumerate(papers):
+        result = results_by_position.get(position)
+        if result is None:
+            result = paper.copy()
+            result['download_status'] = 'not_attempted'
+            result['download_path'] = None
+            result['downloaded_from'] = None
+        download_results.append(result)
     
     # Add results to download summary
     download_summary = download_results
@@ -222,12 +382,15 @@ async def download_papers(
     
     # Count actual successful downloads
     actual_successful = sum(1 for result in verified_download_summary if result['download_status'] == 'success')
+    not_attempted = sum(1 for result in verified_download_summary if result['download_status'] == 'not_attempted')
     
     # Create summary metadata
     summary_metadata = {
         "total": len(papers),
         "successful": actual_successful,
-        "failed": len(papers) - actual_successful,
+        "failed": len(papers) - actual_successful - not_attempted,
+        "not_attempted": not_attempted,
+        "deadline": deadline,
         "output_dir": output_dir,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "input_file": input_file
@@ -256,6 +419,8 @@ async def download_papers(
     print(f"Total papers: {summary_metadata['total']}")
     print(f"Successfully downloaded: {summary_metadata['successful']}")
     print(f"Failed downloads: {summary_metadata['failed']}")
+    if not_attempted:
+        print(f"Not attempted (deadline or target reached): {not_attempted}")
     print(f"Output directory: {summary_metadata['output_dir']}")
     
     # Print details of successful and failed downloads
@@ -382,6 +382,7 @@ async def process_query(
     max_papers=5, 
     skip_existing=True,
     max_concurrent=3,
+    download_deadline=None,
     
     # Folder structure parameters
     chat_id=None,
@@ -421,6 +422,8 @@ async def process_query(
         max_papers (int): Maximum number of papers to download
         skip_existing (bool): Whether to skip existing files
         max_concurrent (int): Maximum number of concurrent downloads
+        download_deadline (float): Time budget in seconds for downloads; max_papers becomes the
+            number of successful downloads to aim for, taken best-first from the evaluated papers
         
         # Folder structure parameters
         chat_id (str): Custom chat ID (if None, one will be generated)
@@ -477,7 +480,7 @@ async def process_query(
     # 3. Generate search results filename
     search_results_path = os.path.join(folders["search_results_dir"], search_results_filename)
     
-    # 4. Perform search
+    # 4. Perform search; search_papers closes its searcher, stopping proxy revalidation
     papers = await search_papers(
         query=query,
         limit=limit,
@@ -523,8 +526,8 @@ async def process_query(
         if download_only_evaluated:
             papers_to_download = [p for p in evaluation_results["papers"] if p["evaluation"]["download"]]
             
-            # Limit to max_papers if specified
-            if max_papers and len(papers_to_download) > max_papers:
+            # Limit to max_papers if specified (deadline mode keeps the rest as fallbacks)
+            if max_papers and len(papers_to_download) > max_papers and not download_deadline:
                 # Sort by score (highest first)
                 papers_to_download = sorted(papers_to_download, 
                                           key=lambda p: p["evaluation"]["score"],
@@ -552,10 +555,11 @@ async def process_query(
     download_results = await download_papers(
         input_file=download_input_file,
         output_dir=folders["downloaded_pdfs_dir"],
-        max_papers=max_papers if not (evaluate_papers and download_only_evaluated) else None,  # Already limited above
+        max_papers=max_papers if not (evaluate_papers and download_only_evaluated) or download_deadline else None,  # Already limited above
         skip_existing=skip_existing,
         max_concurrent=max_concurrent,
-        save_summary_to=download_summary_path
+        save_summary_to=download_summary_path,
+        deadline=download_deadline
     )
     
     # 7. Print final summary if verbose
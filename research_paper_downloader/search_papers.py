@@ -72,17 +72,15 @@ async def search_papers(
         query = convert_to_keyword_query(query)
         print(f"Converted query: '{original_query}' -> '{query}'")
     
-    # Initialize downloader
-    searcher = ResearchPaperSearcher(use_proxies=False)
-    
-    # Search for papers
-    papers = await searcher.search_papers(
-        query=query,
-        limit=limit,
-        from_date=from_date,
-        until_date=until_date,
-        save_raw_responses=save_raw_responses
-    )
+    # Search for papers, stopping the searcher's proxy revalidation when done
+    async with ResearchPaperSearcher(use_proxies=False) as searcher:
+        papers = await searcher.search_papers(
+            query=query,
+            limit=limit,
+            from_date=from_date,
+            until_date=until_date,
+            save_raw_responses=save_raw_responses
+        )
     
     # Save results to file if requested
     if output_file:
@@ -60,6 +60,12 @@ DEFAULT_OUTPUT_DIR = "downloads"
 # Proxy Settings
 USE_PROXIES = False
 PROXY_TIMEOUT = 10
+PROXY_LIST = [p.strip() for p in os.getenv("PROXY_LIST", "").split(",") if p.strip()]
+PROXY_EWMA_ALPHA = 0.3            # Weight of the newest sample in latency/success averages
+PROXY_QUARANTINE_FAILURES = 3     # Consecutive failures before a proxy is quarantined
+PROXY_MIN_SUCCESS_RATE = 0.5      # Quarantine proxies whose success rate drops below this
+PROXY_MAX_LATENCY = 5.0           # Quarantine proxies slower than this (seconds, EWMA)
+PROXY_REVALIDATE_INTERVAL = 60    # Seconds between background checks of quarantined proxies
 
 class ProxyConfig:
     def __init__(self, proxy_str: str):
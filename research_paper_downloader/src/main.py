@@ -15,7 +15,7 @@ from .config import (
     SEMANTIC_SCHOLAR_API_KEY, DEFAULT_HEADERS, USE_PROXIES,
     DOWNLOAD_DIR, SEARCH_SOURCES, SERPER_API_KEY
 )
-from .utils.proxy_manager import ProxyManager
+from .utils.proxy_manager import create_proxy_manager
 from .utils.doi_validator import normalize_doi
 
 # Import searchers
@@ -44,19 +44,43 @@ def generate_paper_id(paper: Dict[str, Any]) -> str:
 class ResearchPaperSearcher:
     """
     Simplified class for searching research papers from various sources.
+    
+    Use as an async context manager, or call close() when done, so the
+    background proxy revalidation started by searches is stopped.
     """
     def __init__(self, use_proxies: bool = USE_PROXIES):
         """Initialize the research paper searcher."""
-        self.proxy_manager = ProxyManager() if use_proxies else None
+        self.proxy_manager = create_proxy_manager() if use_proxies else None
+        self._proxies_validated = False
         
         # Initialize searchers
         self.searchers = {
-            "crossref": CrossrefSearcher(email=CROSSREF_EMAIL),
-            "pubmed": PubMedSearcher(tool=PUBMED_TOOL, email=PUBMED_EMAIL),
-            "semantic_scholar": SemanticScholarSearcher(api_key=SEMANTIC_SCHOLAR_API_KEY),
-            "google_scholar": GoogleScholarSearcher(api_key=SERPER_API_KEY)
+            "crossref": CrossrefSearcher(email=CROSSREF_EMAIL, proxy_manager=self.proxy_manager),
+            "pubmed": PubMedSearcher(tool=PUBMED_TOOL, email=PUBMED_EMAIL, proxy_manager=self.proxy_manager),
+            "semantic_scholar": SemanticScholarSearcher(api_key=SEMANTIC_SCHOLAR_API_KEY, proxy_manager=self.proxy_manager),
+            "google_scholar": GoogleScholarSearcher(api_key=SERPER_API_KEY, proxy_manager=self.proxy_manager)
         }
 
+    async def _prepare_proxies(self):
+        """Validate the proxy pool once and keep quarantined proxies under revalidation."""
+        if not self.proxy_manager:
+            return
+        if not self._proxies_validated:
+            await self.proxy_manager.validate_all_proxies()
+            self._proxies_validated = True
+        self.proxy_manager.start_revalidation()
+
+    def close(self):
+        """Stop the background proxy revalidation started by searches."""
+        if self.proxy_manager:
+            self.proxy_manager.stop_revalidation()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
     async def search_papers(
         self,
         query: str,
@@ -66,6 +90,8 @@ class ResearchPaperSearcher:
         save_raw_responses: bool = False
     ) -> List[Dict[str, Any]]:
         """Search for papers using multiple sources."""
+        await self._prepare_proxies()
+        
         results = []
         seen_dois = set()
         seen_titles = set()
@@ -151,14 +177,13 @@ class ResearchPaperSearcher:
 
 # Example usage
 async def example():
-    searcher = ResearchPaperSearcher(use_proxies=False)
-    
     # Search for papers
-    papers = await searcher.search_papers(
-        query="machine learning",
-        limit=5,
-        from_date="2023-01-01"
-    )
+    async with ResearchPaperSearcher(use_proxies=False) as searcher:
+        papers = await searcher.search_papers(
+            query="machine learning",
+            limit=5,
+            from_date="2023-01-01"
+        )
     
     # Print results
     print(f"\nFound {len(papers)} papers:")
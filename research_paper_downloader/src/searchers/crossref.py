@@ -5,6 +5,7 @@ Crossref API interface for searching research papers.
 import aiohttp
 from typing import List, Dict, Any, Optional
 from ..config import CROSSREF_EMAIL, DEFAULT_SEARCH_LIMIT, SUPPORTED_PAPER_TYPES, DEFAULT_HEADERS
+from ..utils.proxy_manager import ProxyManager, leased_request
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,14 +13,16 @@ logger = logging.getLogger(__name__)
 class CrossrefSearcher:
     BASE_URL = "https://api.crossref.org/works"
 
-    def __init__(self, email: str = CROSSREF_EMAIL):
+    def __init__(self, email: str = CROSSREF_EMAIL, proxy_manager: Optional[ProxyManager] = None):
         """
         Initialize the Crossref searcher.
         
         Args:
             email (str): Email to use for Crossref API.
+            proxy_manager (Optional[ProxyManager]): Proxy pool to route requests through.
         """
         self.email = email
+        self.proxy_manager = proxy_manager
         self.headers = DEFAULT_HEADERS.copy()
         self.headers['User-Agent'] += f" (mailto:{email})"
 
@@ -103,8 +106,8 @@ class CrossrefSearcher:
         # Perform the search
         async with aiohttp.ClientSession() as session:
             try:
-                async with session.get(
-                    self.BASE_URL,
+                async with leased_request(
+                    session, 'GET', self.BASE_URL, self.proxy_manager,
                     params=params,
                     headers=self.headers
                 ) as response:
@@ -234,8 +237,8 @@ class CrossrefSearcher:
             Optional[Dict[str, Any]]: Paper metadata or None if not found.
         """
         async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{self.BASE_URL}/{doi}",
+            async with leased_request(
+                session, 'GET', f"{self.BASE_URL}/{doi}", self.proxy_manager,
                 params={'mailto': self.email},
                 headers=self.headers
             ) as response:
@@ -8,6 +8,7 @@ from typing import List, Dict, Any, Optional
 import logging
 from ..config import DEFAULT_HEADERS, SERPER_API_KEY
 from ..utils.doi_validator import normalize_doi, extract_doi_from_url
+from ..utils.proxy_manager import ProxyManager, leased_request
 import re
 
 logger = logging.getLogger(__name__)
@@ -15,13 +16,15 @@ logger = logging.getLogger(__name__)
 class GoogleScholarSearcher:
     BASE_URL = "https://google.serper.dev/scholar"
     
-    def __init__(self, api_key: str = SERPER_API_KEY):
+    def __init__(self, api_key: str = SERPER_API_KEY, proxy_manager: Optional[ProxyManager] = None):
         """
         Initialize the Google Scholar searcher.
         
         Args:
             api_key (str): API key for Serper.dev.
+            proxy_manager (Optional[ProxyManager]): Proxy pool to route requests through.
         """
+        self.proxy_manager = proxy_manager
         self.headers = DEFAULT_HEADERS.copy()
         self.headers['X-API-KEY'] = api_key
         self.headers['Content-Type'] = 'application/json'
@@ -103,8 +106,8 @@ class GoogleScholarSearcher:
         
         async with aiohttp.ClientSession() as session:
             try:
-                async with session.post(
-                    self.BASE_URL,
+                async with leased_request(
+                    session, 'POST', self.BASE_URL, self.proxy_manager,
                     headers=self.headers,
                     data=payload
                 ) as response:
@@ -11,21 +11,24 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 from ..config import PUBMED_TOOL, PUBMED_EMAIL, DEFAULT_HEADERS
 from ..utils.doi_validator import normalize_doi
+from ..utils.proxy_manager import ProxyManager, leased_request
 
 logger = logging.getLogger(__name__)
 
 class PubMedSearcher:
     BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
     
-    def __init__(self, tool: str = PUBMED_TOOL, email: str = PUBMED_EMAIL):
+    def __init__(self, tool: str = PUBMED_TOOL, email: str = PUBMED_EMAIL, proxy_manager: Optional[ProxyManager] = None):
         """
         Initialize the PubMed searcher.
         
         Args:
             tool (str): Tool name for PubMed API.
             email (str): Email for PubMed API.
+            proxy_manager (Optional[ProxyManager]): Proxy pool to route requests through.
         """
         self.tool = tool
+        self.proxy_manager = proxy_manager
         self.email = email
         self.headers = DEFAULT_HEADERS.copy()
 
@@ -114,8 +117,8 @@ class PubMedSearcher:
                 
                 logger.info(f"Sending ESearch request to PubMed: {esearch_url}")
                 
-                async with session.get(
-                    esearch_url,
+                async with leased_request(
+                    session, 'GET', esearch_url, self.proxy_manager,
                     params=esearch_params,
                     headers=self.headers
                 ) as response:
@@ -172,8 +175,8 @@ class PubMedSearcher:
                 
                 logger.info(f"Sending EFetch request to PubMed: {efetch_url}")
                 
-                async with session.get(
-                    efetch_url,
+                async with leased_request(
+                    session, 'GET', efetch_url, self.proxy_manager,
                     params=efetch_params,
                     headers=self.headers
                 ) as efetch_response:
@@ -536,8 +539,8 @@ class PubMedSearcher:
                     'email': self.email
                 }
                 
-                async with session.get(
-                    efetch_url,
+                async with leased_request(
+                    session, 'GET', efetch_url, self.proxy_manager,
                     params=efetch_params,
                     headers=self.headers
                 ) as response:
@@ -8,6 +8,7 @@ import logging
 import httpx
 from datetime import datetime
 from ..config import SEMANTIC_SCHOLAR_API_KEY
+from ..utils.proxy_manager import ProxyManager, proxy_lease
 
 logger = logging.getLogger(__name__)
 
@@ -32,10 +33,18 @@ class SemanticScholarSearcher:
         "publicationDate"
     ]
 
-    def __init__(self, api_key: Optional[str] = SEMANTIC_SCHOLAR_API_KEY):
+    def __init__(self, api_key: Optional[str] = SEMANTIC_SCHOLAR_API_KEY, proxy_manager: Optional[ProxyManager] = None):
         """Initialize the Semantic Scholar searcher."""
         self.api_key = api_key
         self.headers = {"x-api-key": api_key} if api_key else {}
+        self.proxy_manager = proxy_manager
+
+    @staticmethod
+    def _proxy_mounts(proxy_url: Optional[str]) -> Optional[Dict[str, httpx.AsyncHTTPTransport]]:
+        """Build httpx transport mounts that route all traffic through a proxy."""
+        if not proxy_url:
+            return None
+        return {"all://": httpx.AsyncHTTPTransport(proxy=proxy_url)}
 
     async def search(
         self,
@@ -98,7 +107,8 @@ class SemanticScholarSearcher:
         all_raw_data = []  # Store all raw responses
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with proxy_lease(self.proxy_manager) as lease, \
+                    httpx.AsyncClient(mounts=self._proxy_mounts(lease.url)) as client:
                 while offset < limit:
                     # Construct search URL with fields
                     url = f"{self.BASE_URL}/paper/search"
@@ -112,7 +122,12 @@ class SemanticScholarSearcher:
                     logger.info(f"Sending request to Semantic Scholar API: {url} with offset={offset}, limit={page_size}")
                     
                     # Make API request
-                    response = await client.get(url, params=params, headers=self.headers)
+                    try:
+                        response = await client.get(url, params=params, headers=self.headers)
+                    except httpx.TransportError:
+                        lease.mark_failed()
+                        raise
+                    lease.mark_response(response.status_code)
                     
                     if response.status_code != 200:
                         logger.error(f"Error searching Semantic Scholar: {response.status_code} - {response.text}")
@@ -2,11 +2,21 @@
 from .bs_downloader import BSDownloader
 from .proxy_manager import ProxyManager
 from .doi_validator import is_valid_doi, normalize_doi, extract_doi
+from .pdf_link_extractor import PDFLinkExtractor, find_pdf_link_in_html
+from .pdf_validator import PDFValidationResult, validate_pdf_bytes
+from .oa_prefetch import SemanticScholarBatchClient, LocalBatchLookup, prefetch_open_access
 
 __all__ = [
     'BSDownloader',
     'ProxyManager',
     'is_valid_doi',
     'normalize_doi',
-    'extract_doi'
+    'extract_doi',
+    'PDFLinkExtractor',
+    'find_pdf_link_in_html',
+    'PDFValidationResult',
+    'validate_pdf_bytes',
+    'SemanticScholarBatchClient',
+    'LocalBatchLookup',
+    'prefetch_open_access'
 ] 
\ No newline at end of file
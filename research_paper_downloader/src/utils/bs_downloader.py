@@ -1,15 +1,17 @@
 """
-Utility for downloading PDFs from various sources using BeautifulSoup.
+Utility for downloading PDFs from various sources, finding links on landing pages with a streaming HTML parser.
 """
 
 import os
+import codecs
 import logging
 import aiohttp
 import asyncio
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any
-from bs4 import BeautifulSoup
-import re
-from urllib.parse import urljoin, urlparse
+from .pdf_link_extractor import PDFLinkExtractor
+from .proxy_manager import ProxyManager, leased_request
+from .pdf_validator import validate_pdf_bytes
 
 # Configure logging
 logging.basicConfig(
@@ -18,18 +20,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Landing pages are read in chunks and abandoned after this many bytes
+LANDING_PAGE_CHUNK_SIZE = 16 * 1024
+MAX_LANDING_PAGE_BYTES = 512 * 1024
+
 class BSDownloader:
     """
-    A utility class for downloading PDFs from various sources using BeautifulSoup.
+    A utility class for downloading PDFs from various sources, scanning landing pages
+    for PDF links with PDFLinkExtractor.
     """
     
-    def __init__(self, headers: Dict[str, str] = None):
+    def __init__(self, headers: Dict[str, str] = None, proxy_manager: Optional[ProxyManager] = None):
         """
         Initialize the BSDownloader.
         
         Args:
             headers (Dict[str, str], optional): HTTP headers to use for requests.
+            proxy_manager (ProxyManager, optional): Proxy pool to route requests through.
         """
+        self.proxy_manager = proxy_manager
+        # Semantic Scholar records prefetched in bulk, keyed by lowercased DOI
+        self.s2_records: Dict[str, Dict[str, Any]] = {}
         self.headers = headers or {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -38,6 +49,15 @@ class BSDownloader:
             'Upgrade-Insecure-Requests': '1',
         }
     
+    def seed_semantic_scholar_records(self, records: Dict[str, Dict[str, Any]]):
+        """
+        Provide Semantic Scholar records fetched in bulk so DOI downloads skip per-paper lookups.
+        
+        Args:
+            records (Dict[str, Dict[str, Any]]): Batch endpoint records keyed by DOI.
+        """
+        self.s2_records.update({doi.strip().lower(): record for doi, record in records.items()})
+    
     async def download_from_url(self, url: str, output_path: str) -> bool:
         """
         Download a PDF from a direct URL.
@@ -54,7 +74,7 @@ class BSDownloader:
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             
             async with aiohttp.ClientSession(headers=self.headers) as session:
-                async with session.get(url, allow_redirects=True) as response:
+                async with self._get(session, url, allow_redirects=True) as response:
                     if response.status != 200:
                         logger.error(f"Failed to download from {url}: HTTP {response.status}")
                         return False
@@ -77,16 +97,40 @@ class BSDownloader:
                         logger.error(f"URL {url} does not contain a valid PDF (Content-Type: {content_type})")
                         return False
                     
+                    # Reject truncated or corrupt files now so the caller can try another source
+                    validation = await asyncio.to_thread(validate_pdf_bytes, content)
+                    if not validation.valid:
+                        logger.error(f"Rejected PDF from {url}: {validation.reason}")
+                        return False
+                    if not validation.has_text_layer:
+                        logger.warning(f"PDF from {url} has no text layer in its first pages (scanned?)")
+                    content = validation.content
+                    
                     # Download the file
                     with open(output_path, 'wb') as f:
                         f.write(content)
                     
-                    logger.info(f"Successfully downloaded PDF to {output_path}")
+                    logger.info(f"Successfully downloaded PDF to {output_path} ({validation.page_count} pages"
+                                f"{', repaired' if validation.repaired else ''})")
                     return True
         except Exception as e:
             logger.error(f"Error downloading from {url}: {str(e)}")
             return False
     
+    @asynccontextmanager
+    async def _get(self, session: aiohttp.ClientSession, url: str, **kwargs):
+        """Issue a GET through a leased proxy and report the outcome to the proxy pool."""
+        async with leased_request(session, 'GET', url, self.proxy_manager, **kwargs) as response:
+            yield response
+    
+    @staticmethod
+    def _html_decoder(charset: Optional[str]):
+        """Get an incremental decoder for a landing page, falling back to UTF-8."""
+        try:
+            return codecs.getincrementaldecoder(charset or 'utf-8')(errors='replace')
+        except LookupError:
+            return codecs.getincrementaldecoder('utf-8')(errors='replace')
+    
     async def find_pdf_link_from_page(self, url: str) -> Optional[str]:
         """
         Find a PDF link on a webpage.
@@ -99,118 +143,29 @@ class BSDownloader:
         """
         try:
             async with aiohttp.ClientSession(headers=self.headers) as session:
-                async with session.get(url, allow_redirects=True) as response:
+                async with self._get(session, url, allow_redirects=True) as response:
                     if response.status != 200:
                         logger.error(f"Failed to access {url}: HTTP {response.status}")
                         return None
                     
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Look for PDF links with different strategies
-                    
-                    # 1. Look for meta tags with PDF links (highest priority)
-                    meta_links = soup.find_all('meta', attrs={'name': ['citation_pdf_url', 'citation_fulltext_html_url', 'citation_fulltext_world_readable']})
-                    
-                    # 2. Look for links with PDF in the href
-                    pdf_links = soup.find_all('a', href=lambda href: href and (
-                        href.lower().endswith('.pdf') or 
-                        '/pdf/' in href.lower() or 
-                        'pdf' in href.lower() or
-                        'fulltext' in href.lower()
-                    ))
-                    
-                    # 3. Look for links with PDF-related text
-                    pdf_text_links = soup.find_all('a', text=lambda text: text and (
-                        'pdf' in text.lower() or 
-                        'download' in text.lower() or 
-                        'full text' in text.lower() or
-                        'full article' in text.lower() or
-                        'article pdf' in text.lower() or
-                        'download article' in text.lower()
-                    ))
-                    
-                    # 4. Publisher-specific patterns
-                    publisher_patterns = {
-                        'sciencedirect.com': {
-                            'selector': 'a.pdf-download-btn-link, a.download-link, a.download-pdf-link',
-                            'attribute': 'href'
-                        },
-                        'springer.com': {
-                            'selector': 'a.download-article, a.download-pdf, a.c-pdf-download__link',
-                            'attribute': 'href'
-                        },
-                        'ieee.org': {
-                            'selector': 'a.doc-actions-link, a.stats-document-lh-action-downloadPdf_2, a[data-action="download"]',
-                            'attribute': 'href'
-                        },
-                        'wiley.com': {
-                            'selector': 'a.article-pdf-download, a.pdf-download, a[title*="PDF"]',
-                            'attribute': 'href'
-                        },
-                        'pubmed.ncbi.nlm.nih.gov': {
-                            'selector': 'a.link-item.pmc-link, a.link-item.bookshelf-link',
-                            'attribute': 'href'
-                        },
-                        'semanticscholar.org': {
-                            'selector': 'a[data-selenium-selector="paper-link"], a.download-button',
-                            'attribute': 'href'
-                        }
-                    }
+                    # Stream only the head of the page through the incremental parser
+                    page_url = str(response.url)
+                    extractor = PDFLinkExtractor(page_url)
+                    decoder = self._html_decoder(response.charset)
+                    bytes_read = 0
+                    async for chunk in response.content.iter_chunked(LANDING_PAGE_CHUNK_SIZE):
+                        bytes_read += len(chunk)
+                        extractor.feed(decoder.decode(chunk))
+                        if extractor.done or bytes_read >= MAX_LANDING_PAGE_BYTES:
+                            break
+                    if not extractor.done:
+                        extractor.feed(decoder.decode(b'', final=True))
+                        extractor.close()
                     
-                    # Combine all potential links
-                    all_links = []
-                    
-                    # Add links from meta tags (highest priority)
-                    for meta in meta_links:
-                        content = meta.get('content')
-                        if content:
-                            all_links.append(urljoin(url, content))
-                    
-                    # Add links from publisher-specific patterns
-                    for domain, pattern in publisher_patterns.items():
-                        if domain in url:
-                            publisher_links = soup.select(pattern['selector'])
-                            for link in publisher_links:
-                                href = link.get(pattern['attribute'])
-                                if href:
-                                    all_links.append(urljoin(url, href))
-                    
-                    # Add links from href attributes
-                    for link in pdf_links:
-                        href = link.get('href')
-                        if href:
-                            all_links.append(urljoin(url, href))
-                    
-                    # Add links from text links
-                    for link in pdf_text_links:
-                        href = link.get('href')
-                        if href:
-                            all_links.append(urljoin(url, href))
-                    
-                    # Filter and prioritize links
-                    pdf_urls = []
-                    seen_urls = set()
-                    
-                    for link in all_links:
-                        # Skip duplicate URLs
-                        if link in seen_urls:
-                            continue
-                        seen_urls.add(link)
-                        
-                        # Prioritize direct PDF links
-                        if link.lower().endswith('.pdf'):
-                            pdf_urls.insert(0, link)
-                        # Prioritize links with /pdf/ in the path
-                        elif '/pdf/' in link.lower():
-                            pdf_urls.insert(len(pdf_urls) // 2, link)
-                        else:
-                            pdf_urls.append(link)
-                    
-                    # Return the first PDF link found
-                    if pdf_urls:
-                        logger.info(f"Found PDF link: {pdf_urls[0]}")
-                        return pdf_urls[0]
+                    pdf_url = extractor.best_link()
+                    if pdf_url:
+                        logger.info(f"Found PDF link: {pdf_url} (read {bytes_read} bytes of {page_url})")
+                        return pdf_url
                     
                     logger.warning(f"No PDF links found on {url}")
                     return None
@@ -244,7 +199,7 @@ class BSDownloader:
         try:
             # First, follow the DOI to the publisher's page
             async with aiohttp.ClientSession(headers=self.headers) as session:
-                async with session.get(doi_url, allow_redirects=True) as response:
+                async with self._get(session, doi_url, allow_redirects=True) as response:
                     if response.status != 200:
                         logger.error(f"Failed to resolve DOI {doi}: HTTP {response.status}")
                     else:
@@ -270,7 +225,7 @@ class BSDownloader:
             logger.info(f"Trying Unpaywall for DOI: {doi}")
             unpaywall_url = f"https://api.unpaywall.org/v2/{doi}?email=anonymous@example.com"
             async with aiohttp.ClientSession(headers=self.headers) as session:
-                async with session.get(unpaywall_url) as response:
+                async with self._get(session, unpaywall_url) as response:
                     if response.status == 200:
                         data = await response.json()
                         if data.get('is_oa') and data.get('best_oa_location') and data['best_oa_location'].get('url_for_pdf'):
@@ -308,17 +263,25 @@ class BSDownloader:
         # 2.3 Try Semantic Scholar
         try:
             logger.info(f"Trying Semantic Scholar for DOI: {doi}")
-            s2_url = f"https://api.semanticscholar.org/v1/paper/{doi}"
-            async with aiohttp.ClientSession(headers=self.headers) as session:
-                async with session.get(s2_url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('url'):
-                            pdf_url = await self.find_pdf_link_from_page(data['url'])
-                            if pdf_url:
-                                success = await self.download_from_url(pdf_url, output_path)
-                                if success:
-                                    return True
+            if doi in self.s2_records:
+                # Already looked up in bulk by the open-access prefetch
+                data = self.s2_records[doi]
+                open_access = (data.get('openAccessPdf') or {}).get('url')
+                if open_access and await self.download_from_url(open_access, output_path):
+                    return True
+            else:
+                data = None
+                s2_url = f"https://api.semanticscholar.org/v1/paper/{doi}"
+                async with aiohttp.ClientSession(headers=self.headers) as session:
+                    async with self._get(session, s2_url) as response:
+                        if response.status == 200:
+                            data = await response.json()
+            if data and data.get('url'):
+                pdf_url = await self.find_pdf_link_from_page(data['url'])
+                if pdf_url:
+                    success = await self.download_from_url(pdf_url, output_path)
+                    if success:
+                        return True
         except Exception as e:
             logger.error(f"Error using Semantic Scholar for DOI {doi}: {str(e)}")
         
@@ -0,0 +1,183 @@
+"""
+Bulk open-access PDF lookup for a whole set of candidate papers.
+
+Instead of asking Semantic Scholar about one DOI at a time while downloading,
+all candidates are resolved up front through the batch paper endpoint, which
+accepts up to 500 identifiers per request.
+"""
+
+import asyncio
+import logging
+import aiohttp
+from typing import List, Dict, Any, Optional, Iterable
+from ..config import SEMANTIC_SCHOLAR_API_KEY
+from .doi_validator import normalize_doi
+from .proxy_manager import ProxyManager, leased_request
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+S2_BATCH_URL = "https://api.semanticscholar.org/graph/v1/paper/batch"
+S2_BATCH_FIELDS = "openAccessPdf,isOpenAccess,url,externalIds"
+S2_BATCH_SIZE = 500  # API limit per request
+S2_BATCH_RETRIES = 3
+
+# Sources whose papers are resolved in bulk before downloading
+PREFETCH_SOURCES = ('semantic_scholar', 'crossref')
+
+def paper_lookup_id(paper: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the identifier used to look a paper up in the Semantic Scholar batch endpoint.
+
+    Args:
+        paper (Dict[str, Any]): Paper data from the search results.
+
+    Returns:
+        Optional[str]: Semantic Scholar paper ID, ``DOI:...`` or ``PMID:...``, or None.
+    """
+    s2_data = (paper.get('source_specific') or {}).get('semantic_scholar') or {}
+    if s2_data.get('paper_id'):
+        return s2_data['paper_id']
+    doi = normalize_doi(paper.get('doi'))
+    if doi:
+        return f"DOI:{doi.lower()}"
+    if paper.get('pmid'):
+        return f"PMID:{paper['pmid']}"
+    return None
+
+class SemanticScholarBatchClient:
+    """
+    Client for the Semantic Scholar batch paper lookup endpoint.
+    """
+
+    def __init__(self, api_key: Optional[str] = SEMANTIC_SCHOLAR_API_KEY, proxy_manager: Optional[ProxyManager] = None):
+        """
+        Initialize the client.
+
+        Args:
+            api_key (str, optional): Semantic Scholar API key.
+            proxy_manager (ProxyManager, optional): Proxy pool to route requests through.
+        """
+        self.headers = {"x-api-key": api_key} if api_key else {}
+        self.proxy_manager = proxy_manager
+
+    async def lookup(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Look up a batch of papers.
+
+        Args:
+            ids (List[str]): Up to S2_BATCH_SIZE paper identifiers.
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: One record per identifier, None where the paper was not found.
+        """
+        async with aiohttp.ClientSession(headers=self.headers) as session:
+            for attempt in range(S2_BATCH_RETRIES):
+                async with leased_request(session, 'POST', S2_BATCH_URL, self.proxy_manager,
+                                          params={"fields": S2_BATCH_FIELDS}, json={"ids": ids}) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    if response.status != 429:
+                        logger.error(f"Semantic Scholar batch lookup failed: HTTP {response.status}")
+                        break
+                # Rate limited, back off before trying again
+                await asyncio.sleep(2 ** attempt)
+        return [None] * len(ids)
+
+class LocalBatchLookup:
+    """
+    Offline stand-in for SemanticScholarBatchClient, backed by a dictionary of records.
+    """
+
+    def __init__(self, records: Dict[str, Dict[str, Any]]):
+        """
+        Initialize the lookup.
+
+        Args:
+            records (Dict[str, Dict[str, Any]]): Batch endpoint records keyed by lookup identifier.
+        """
+        self.records = records
+        self.calls = 0
+
+    async def lookup(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Look up a batch of papers.
+
+        Args:
+            ids (List[str]): Paper identifiers.
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: One record per identifier, None where the paper is unknown.
+        """
+        self.calls += 1
+        return [self.records.get(paper_id) for paper_id in ids]
+
+def _batches(items: List[str], size: int) -> Iterable[List[str]]:
+    """Split a list into consecutive batches."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+async def prefetch_open_access(
+    papers: List[Dict[str, Any]],
+    client=None,
+    proxy_manager: Optional[ProxyManager] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fill in ``open_access_pdf`` for Semantic Scholar and Crossref papers in bulk.
+
+    Papers are updated in place. The returned records can be handed to
+    ``BSDownloader.seed_semantic_scholar_records`` so DOI downloads skip their
+    own Semantic Scholar lookups.
+
+    Args:
+        papers (List[Dict[str, Any]]): Candidate papers.
+        client (optional): Object with an async ``lookup(ids)`` method. Defaults to SemanticScholarBatchClient.
+        proxy_manager (ProxyManager, optional): Proxy pool for the default client.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Batch endpoint records keyed by lowercased DOI.
+    """
+    # Group papers by lookup identifier; duplicates share one lookup
+    pending: Dict[str, List[Dict[str, Any]]] = {}
+    for paper in papers:
+        if paper.get('fetched_source') not in PREFETCH_SOURCES:
+            continue
+        paper_id = paper_lookup_id(paper)
+        if paper_id:
+            pending.setdefault(paper_id, []).append(paper)
+
+    if not pending:
+        return {}
+
+    client = client or SemanticScholarBatchClient(proxy_manager=proxy_manager)
+    ids = list(pending)
+    records_by_doi = {}
+    filled = 0
+
+    for batch in _batches(ids, S2_BATCH_SIZE):
+        try:
+            records = await client.lookup(batch)
+        except Exception as e:
+            logger.error(f"Error in Semantic Scholar batch lookup: {str(e)}")
+            continue
+
+        for paper_id, record in zip(batch, records):
+            if not record:
+                continue
+            open_access = (record.get('openAccessPdf') or {}).get('url')
+            doi = (record.get('externalIds') or {}).get('DOI')
+
+            for paper in pending[paper_id]:
+                if open_access and not paper.get('open_access_pdf'):
+                    paper['open_access_pdf'] = open_access
+                    filled += 1
+                if record.get('isOpenAccess'):
+                    paper['is_open_access'] = True
+                doi = doi or paper.get('doi')
+
+            if doi:
+                records_by_doi[doi.strip().lower()] = record
+
+    logger.info(f"Open-access prefetch: {len(ids)} papers looked up in {(len(ids) - 1) // S2_BATCH_SIZE + 1} "
+                f"request(s), {filled} open-access PDF links found")
+    return records_by_doi
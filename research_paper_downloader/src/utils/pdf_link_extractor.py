@@ -0,0 +1,204 @@
+"""
+Streaming extractor for PDF links on publisher landing pages.
+"""
+
+import heapq
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+# Meta tags that point at the full text; citation_pdf_url ends the scan
+PDF_META_NAMES = ('citation_pdf_url', 'citation_fulltext_html_url', 'citation_fulltext_world_readable')
+
+# Link text that suggests a PDF download
+PDF_LINK_TEXT = ('pdf', 'download', 'full text', 'full article', 'article pdf', 'download article')
+
+# Publisher-specific link selectors
+PUBLISHER_SELECTORS = {
+    'sciencedirect.com': 'a.pdf-download-btn-link, a.download-link, a.download-pdf-link',
+    'springer.com': 'a.download-article, a.download-pdf, a.c-pdf-download__link',
+    'ieee.org': 'a.doc-actions-link, a.stats-document-lh-action-downloadPdf_2, a[data-action="download"]',
+    'wiley.com': 'a.article-pdf-download, a.pdf-download, a[title*="PDF"]',
+    'pubmed.ncbi.nlm.nih.gov': 'a.link-item.pmc-link, a.link-item.bookshelf-link',
+    'semanticscholar.org': 'a[data-selenium-selector="paper-link"], a.download-button',
+}
+
+# Candidate sources, best first
+SOURCE_META = 0
+SOURCE_PUBLISHER = 1
+SOURCE_HREF = 2
+SOURCE_TEXT = 3
+
+_SELECTOR_PATTERN = re.compile(r'^a((?:\.[\w-]+)*)((?:\[[\w-]+(?:[*^$]?="[^"]*")?\])*)$')
+_ATTRIBUTE_PATTERN = re.compile(r'\[([\w-]+)(?:([*^$]?=)"([^"]*)")?\]')
+
+
+def _parse_selector(selector: str) -> Optional[Tuple[frozenset, List[Tuple[str, Optional[str], str]]]]:
+    """
+    Parse a simple ``a.class[attr="value"]`` CSS selector.
+
+    Args:
+        selector (str): Selector to parse.
+
+    Returns:
+        Optional[Tuple]: Required classes and attribute conditions, or None if unsupported.
+    """
+    match = _SELECTOR_PATTERN.match(selector.strip())
+    if not match:
+        return None
+    classes = frozenset(c for c in match.group(1).split('.') if c)
+    conditions = [(name, op or None, value) for name, op, value in _ATTRIBUTE_PATTERN.findall(match.group(2))]
+    return classes, conditions
+
+
+def _selector_matches(selector, attrs: Dict[str, str]) -> bool:
+    """Check whether an <a> tag's attributes satisfy a parsed selector."""
+    classes, conditions = selector
+    if classes and not classes.issubset(attrs.get('class', '').split()):
+        return False
+    for name, op, value in conditions:
+        actual = attrs.get(name)
+        if actual is None:
+            return False
+        if op == '=' and actual != value:
+            return False
+        if op == '*=' and value not in actual:
+            return False
+        if op == '^=' and not actual.startswith(value):
+            return False
+        if op == '$=' and not actual.endswith(value):
+            return False
+    return True
+
+
+def _publisher_selectors(url: str) -> list:
+    """Get the parsed publisher selectors that apply to a page URL."""
+    selectors = []
+    for domain, selector_group in PUBLISHER_SELECTORS.items():
+        if domain in url:
+            for selector in selector_group.split(','):
+                parsed = _parse_selector(selector)
+                if parsed:
+                    selectors.append(parsed)
+    return selectors
+
+
+class PDFLinkExtractor(HTMLParser):
+    """
+    Incremental HTML parser that ranks candidate PDF links with a heap.
+
+    Feed it the page body piece by piece and stop as soon as ``done`` is set,
+    which happens when a ``citation_pdf_url`` meta tag is seen.
+    """
+
+    def __init__(self, base_url: str):
+        """
+        Initialize the extractor.
+
+        Args:
+            base_url (str): URL of the page, used to resolve relative links and pick publisher selectors.
+        """
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.done = False
+        self.citation_pdf_url: Optional[str] = None
+        self._selectors = _publisher_selectors(base_url)
+        self._heap: List[Tuple[int, int, int, str]] = []
+        self._best_rank: Dict[str, Tuple[int, int]] = {}
+        self._seq = 0
+        self._anchor_href: Optional[str] = None
+        self._anchor_text: List[str] = []
+
+    def _add_candidate(self, href: str, source: int):
+        """Resolve a link and push it onto the candidate heap."""
+        href = href.strip()
+        if not href or href.startswith(('javascript:', 'mailto:', '#')):
+            return
+        link = urljoin(self.base_url, href)
+        lowered = link.lower()
+
+        # Direct PDF links first, then links with /pdf/ in the path
+        if lowered.endswith('.pdf'):
+            shape = 0
+        elif '/pdf/' in lowered:
+            shape = 1
+        else:
+            shape = 2
+
+        rank = (shape, source)
+        previous = self._best_rank.get(link)
+        if previous is not None and previous <= rank:
+            return
+        self._best_rank[link] = rank
+        heapq.heappush(self._heap, (shape, source, self._seq, link))
+        self._seq += 1
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'meta':
+            attributes = {k: v for k, v in attrs if v is not None}
+            name = attributes.get('name', '').lower()
+            content = attributes.get('content')
+            if name == 'citation_pdf_url' and content and content.strip():
+                # The publisher's own PDF pointer beats anything else on the page
+                self.citation_pdf_url = urljoin(self.base_url, content.strip())
+                self.done = True
+            elif name in PDF_META_NAMES and content:
+                self._add_candidate(content, SOURCE_META)
+        elif tag == 'a':
+            attributes = {k: v for k, v in attrs if v is not None}
+            href = attributes.get('href')
+            self._anchor_href = href
+            self._anchor_text = []
+            if not href:
+                return
+            if any(_selector_matches(selector, attributes) for selector in self._selectors):
+                self._add_candidate(href, SOURCE_PUBLISHER)
+            lowered = href.lower()
+            if 'pdf' in lowered or 'fulltext' in lowered:
+                self._add_candidate(href, SOURCE_HREF)
+
+    def handle_data(self, data):
+        if self._anchor_href is not None and not self.done:
+            self._anchor_text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag != 'a' or self._anchor_href is None:
+            return
+        if not self.done:
+            text = ''.join(self._anchor_text).lower()
+            if any(phrase in text for phrase in PDF_LINK_TEXT):
+                self._add_candidate(self._anchor_href, SOURCE_TEXT)
+        self._anchor_href = None
+        self._anchor_text = []
+
+    def best_link(self) -> Optional[str]:
+        """
+        Get the highest-ranked candidate link.
+
+        Returns:
+            Optional[str]: Best PDF link found so far, or None.
+        """
+        if self.citation_pdf_url:
+            return self.citation_pdf_url
+        return self._heap[0][3] if self._heap else None
+
+
+def find_pdf_link_in_html(html: str, base_url: str) -> Optional[str]:
+    """
+    Find the best PDF link in an already downloaded HTML page.
+
+    Args:
+        html (str): Page HTML.
+        base_url (str): URL of the page.
+
+    Returns:
+        Optional[str]: URL of the PDF if found, None otherwise.
+    """
+    extractor = PDFLinkExtractor(base_url)
+    extractor.feed(html)
+    if not extractor.done:
+        extractor.close()
+    return extractor.best_link()
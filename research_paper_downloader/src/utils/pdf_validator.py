@@ -0,0 +1,178 @@
+"""
+Download-time validation and repair of PDF files.
+
+Truncated or corrupt downloads are caught here, while the resolver can still
+try another source, instead of failing later inside a PDF processing worker.
+"""
+
+import re
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # Structural checks only
+    fitz = None
+
+logger = logging.getLogger(__name__)
+
+# Pages sampled when looking for a text layer
+TEXT_LAYER_SAMPLE_PAGES = 3
+MIN_TEXT_LAYER_CHARS = 50
+
+# The header may be preceded by junk, but only within the first kilobyte
+HEADER_SEARCH_BYTES = 1024
+TRAILER_SEARCH_BYTES = 2048
+
+TRUNCATED_REASON = "missing %%EOF marker (truncated download?)"
+
+# Page counts declared by page tree nodes; the root node's is the largest
+PAGE_TREE_COUNT_PATTERN = re.compile(rb'/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b')
+
+# PyMuPDF is not thread-safe, and downloads validate from several threads at once
+_FITZ_LOCK = threading.Lock()
+
+@dataclass
+class PDFValidationResult:
+    """Outcome of validating a downloaded PDF."""
+    valid: bool
+    reason: Optional[str] = None
+    page_count: int = 0
+    encrypted: bool = False
+    has_text_layer: bool = False
+    repaired: bool = False
+    content: bytes = b''
+
+def _trailer_problem(content: bytes) -> Optional[str]:
+    """
+    Check the end of the file for the markers a complete PDF ends with.
+
+    Args:
+        content (bytes): PDF bytes.
+
+    Returns:
+        Optional[str]: Description of the problem, or None if the trailer looks intact.
+    """
+    tail = content[-TRAILER_SEARCH_BYTES:]
+    if b'%%EOF' not in tail:
+        return TRUNCATED_REASON
+    if b'startxref' not in tail:
+        return "missing startxref pointer"
+    return None
+
+def _declared_page_count(content: bytes) -> int:
+    """
+    Read the page count the file's page tree declares, without parsing the document.
+
+    Args:
+        content (bytes): PDF bytes.
+
+    Returns:
+        int: Largest /Count of an uncompressed /Pages node, or 0 if none is found.
+    """
+    counts = [int(first or second) for first, second in PAGE_TREE_COUNT_PATTERN.findall(content)]
+    return max(counts, default=0)
+
+def validate_pdf_bytes(content: bytes) -> PDFValidationResult:
+    """
+    Validate downloaded PDF bytes, repairing a broken cross-reference table if possible.
+
+    Checks the header, opens the document, verifies the page count and that
+    the first and last pages load, reads the encryption flag and samples the
+    first pages for a text layer. Files whose xref had to be rebuilt are
+    rewritten so downstream processing gets a clean file, unless the repair
+    lost pages the page tree declares. Truncated files (no %%EOF) are
+    rejected outright: repair would silently drop their missing pages.
+
+    Safe to call from several threads: the PyMuPDF part runs under a
+    module-level lock, since PyMuPDF is not thread-safe. Validation takes
+    milliseconds next to the download itself, so a lock is cheaper than
+    shipping the bytes to another process.
+
+    Args:
+        content (bytes): Downloaded file contents.
+
+    Returns:
+        PDFValidationResult: Validation outcome; ``content`` holds the bytes to save.
+    """
+    if b'%PDF-' not in content[:HEADER_SEARCH_BYTES]:
+        return PDFValidationResult(False, reason="missing %PDF- header")
+
+    trailer_problem = _trailer_problem(content)
+    if trailer_problem == TRUNCATED_REASON:
+        return PDFValidationResult(False, reason=trailer_problem)
+
+    if fitz is None:
+        # Without PyMuPDF all we can do is reject files with a damaged trailer
+        if trailer_problem:
+            return PDFValidationResult(False, reason=trailer_problem)
+        return PDFValidationResult(True, content=content)
+
+    with _FITZ_LOCK:
+        return _inspect_document(content, trailer_problem)
+
+def _inspect_document(content: bytes, trailer_problem: Optional[str]) -> PDFValidationResult:
+    """
+    Open the PDF with PyMuPDF and check its pages, encryption and text layer; call under _FITZ_LOCK.
+
+    Args:
+        content (bytes): PDF bytes with a valid header and an %%EOF marker.
+        trailer_problem (str, optional): Problem found in the trailer, repaired here if possible.
+
+    Returns:
+        PDFValidationResult: Validation outcome; ``content`` holds the bytes to save.
+    """
+    try:
+        doc = fitz.open(stream=content, filetype="pdf")
+    except Exception as e:
+        return PDFValidationResult(False, reason=f"unreadable PDF: {str(e)}")
+
+    try:
+        encrypted = bool(doc.is_encrypted)
+        if doc.needs_pass:
+            return PDFValidationResult(False, reason="password protected", encrypted=True)
+
+        page_count = doc.page_count
+        if page_count == 0:
+            return PDFValidationResult(False, reason="no pages", encrypted=encrypted)
+
+        # A damaged page tree shows up when loading pages, not when opening the file
+        try:
+            doc.load_page(0)
+            doc.load_page(page_count - 1)
+        except Exception as e:
+            return PDFValidationResult(False, reason=f"broken page tree: {str(e)}", page_count=page_count)
+
+        text_chars = 0
+        for page_number in range(min(TEXT_LAYER_SAMPLE_PAGES, page_count)):
+            text_chars += len(doc[page_number].get_text().strip())
+            if text_chars >= MIN_TEXT_LAYER_CHARS:
+                break
+        has_text_layer = text_chars >= MIN_TEXT_LAYER_CHARS
+
+        repaired = bool(doc.is_repaired) or trailer_problem is not None
+        if repaired:
+            # Repair keeps only the pages it can find; reject the file if some are missing
+            declared = _declared_page_count(content)
+            if declared > page_count:
+                return PDFValidationResult(False, reason=f"repair recovered {page_count} of {declared} pages",
+                                           page_count=page_count)
+            try:
+                # Writing the document out rebuilds the xref table from scratch
+                content = doc.tobytes(garbage=3, deflate=True)
+            except Exception as e:
+                return PDFValidationResult(False, reason=f"unrepairable xref: {str(e)}", page_count=page_count)
+            logger.info(f"Rebuilt damaged PDF structure ({trailer_problem or 'xref repaired on open'})")
+
+        return PDFValidationResult(
+            True,
+            page_count=page_count,
+            encrypted=encrypted,
+            has_text_layer=has_text_layer,
+            repaired=repaired,
+            content=content
+        )
+    finally:
+        doc.close()
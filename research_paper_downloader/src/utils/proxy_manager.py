@@ -1,124 +1,270 @@
 """
 Utility for managing and rotating proxies.
+
+Each proxy carries an exponentially weighted moving average (EWMA) of its
+latency and success rate. Requests pick proxies at random weighted by
+success rate over latency, failing proxies are quarantined, and a background
+task revalidates quarantined proxies so they can rejoin the pool.
 """
 
 import asyncio
 import aiohttp
 import random
-from typing import List, Optional, Dict
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import List, Optional, Dict, AsyncIterator
 import logging
-from ..config import ProxyConfig, PROXY_TIMEOUT
+from ..config import (
+    ProxyConfig, PROXY_TIMEOUT, PROXY_LIST, PROXY_EWMA_ALPHA,
+    PROXY_QUARANTINE_FAILURES, PROXY_MIN_SUCCESS_RATE, PROXY_MAX_LATENCY,
+    PROXY_REVALIDATE_INTERVAL
+)
 
 logger = logging.getLogger(__name__)
 
+# Errors that count against a proxy's health when raised before the response headers arrive
+PROXY_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, OSError)
+
+# Errors while reading the body that still point at the proxy: a cut-off or dropped connection
+PROXY_BODY_ERRORS = (aiohttp.ClientPayloadError, aiohttp.ServerDisconnectedError)
+
+# HTTP statuses that point at the proxy rather than the target site
+PROXY_ERROR_STATUSES = {407, 502, 503, 504}
+
+@dataclass
+class ProxyHealth:
+    """Running health statistics for a single proxy."""
+    proxy: ProxyConfig
+    latency: float = PROXY_TIMEOUT / 2
+    success_rate: float = 1.0
+    consecutive_failures: int = 0
+    in_flight: int = 0
+    quarantined: bool = False
+
+    @property
+    def weight(self) -> float:
+        """Selection weight: reliable, fast and idle proxies are preferred."""
+        return max(self.success_rate, 0.01) / max(self.latency, 0.05) / (1 + self.in_flight)
+
 class ProxyManager:
-    def __init__(self, proxies: Optional[List[ProxyConfig]] = None):
+    def __init__(
+        self,
+        proxies: Optional[List[ProxyConfig]] = None,
+        alpha: float = PROXY_EWMA_ALPHA,
+        quarantine_failures: int = PROXY_QUARANTINE_FAILURES,
+        revalidate_interval: float = PROXY_REVALIDATE_INTERVAL
+    ):
         """
         Initialize the proxy manager.
-        
+
         Args:
             proxies (Optional[List[ProxyConfig]]): List of proxy configurations.
+            alpha (float): Weight of the newest sample in the EWMA statistics.
+            quarantine_failures (int): Consecutive failures before a proxy is quarantined.
+            revalidate_interval (float): Seconds between background revalidation passes.
         """
         self.proxies = proxies or []
-        self.working_proxies: List[ProxyConfig] = []
-        self.failed_proxies: List[ProxyConfig] = []
-        self._current_index = 0
+        self.alpha = alpha
+        self.quarantine_failures = quarantine_failures
+        self.revalidate_interval = revalidate_interval
+        self._health: Dict[str, ProxyHealth] = {p.proxy_str: ProxyHealth(p) for p in self.proxies}
+        self._revalidation_task: Optional[asyncio.Task] = None
+
+    @property
+    def working_proxies(self) -> List[ProxyConfig]:
+        """Proxies currently eligible for selection."""
+        return [h.proxy for h in self._health.values() if not h.quarantined]
+
+    @property
+    def failed_proxies(self) -> List[ProxyConfig]:
+        """Proxies currently in quarantine."""
+        return [h.proxy for h in self._health.values() if h.quarantined]
+
+    def health(self, proxy_str: str) -> Optional[ProxyHealth]:
+        """
+        Get the health statistics for a proxy.
+
+        Args:
+            proxy_str (str): The proxy string.
+
+        Returns:
+            Optional[ProxyHealth]: Health statistics, or None for an unknown proxy.
+        """
+        return self._health.get(proxy_str)
 
     async def validate_proxy(self, proxy: ProxyConfig) -> bool:
         """
-        Validate a proxy by testing its connection.
-        
+        Validate a proxy by testing its connection and recording its latency.
+
         Args:
             proxy (ProxyConfig): The proxy configuration to validate.
-            
+
         Returns:
             bool: True if the proxy is working, False otherwise.
         """
+        start = time.monotonic()
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.get(
                     'https://httpbin.org/ip',
                     proxy=proxy.http,
-                    timeout=PROXY_TIMEOUT
+                    timeout=aiohttp.ClientTimeout(total=PROXY_TIMEOUT)
                 ) as response:
                     if response.status == 200:
+                        self.record_success(proxy.proxy_str, time.monotonic() - start)
                         return True
         except Exception as e:
             logger.debug(f"Proxy validation failed for {proxy.proxy_str}: {str(e)}")
+        self.record_failure(proxy.proxy_str)
         return False
 
     async def validate_all_proxies(self):
-        """Validate all proxies and update the working/failed lists."""
+        """Validate all proxies and update their health statistics."""
         tasks = [self.validate_proxy(proxy) for proxy in self.proxies]
         results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        self.working_proxies = []
-        self.failed_proxies = []
-        
+
         for proxy, is_valid in zip(self.proxies, results):
             if isinstance(is_valid, bool) and is_valid:
-                self.working_proxies.append(proxy)
+                self.mark_proxy_working(proxy.proxy_str)
             else:
-                self.failed_proxies.append(proxy)
+                self.mark_proxy_failed(proxy.proxy_str)
+
+        logger.info(f"Proxy validation: {self.working_count} working, {self.failed_count} quarantined")
+
+    def record_success(self, proxy_str: str, latency: float):
+        """
+        Record a successful request through a proxy.
+
+        Args:
+            proxy_str (str): The proxy string.
+            latency (float): Time to response headers in seconds.
+        """
+        health = self._health.get(proxy_str)
+        if not health:
+            return
+        health.latency += self.alpha * (latency - health.latency)
+        health.success_rate += self.alpha * (1.0 - health.success_rate)
+        health.consecutive_failures = 0
+        if health.latency > PROXY_MAX_LATENCY:
+            self.mark_proxy_failed(proxy_str)
+
+    def record_failure(self, proxy_str: str):
+        """
+        Record a failed request through a proxy, quarantining it if it keeps failing.
+
+        Args:
+            proxy_str (str): The proxy string.
+        """
+        health = self._health.get(proxy_str)
+        if not health:
+            return
+        health.success_rate -= self.alpha * health.success_rate
+        health.consecutive_failures += 1
+        if (health.consecutive_failures >= self.quarantine_failures
+                or health.success_rate < PROXY_MIN_SUCCESS_RATE):
+            self.mark_proxy_failed(proxy_str)
+
+    def select_proxy(self) -> Optional[ProxyConfig]:
+        """
+        Pick a working proxy, weighted by success rate, latency and current load.
+
+        Returns:
+            Optional[ProxyConfig]: Selected proxy or None if no working proxies.
+        """
+        candidates = [h for h in self._health.values() if not h.quarantined]
+        if not candidates:
+            return None
+        health = random.choices(candidates, weights=[h.weight for h in candidates])[0]
+        return health.proxy
 
     def get_next_proxy(self) -> Optional[Dict[str, str]]:
         """
-        Get the next working proxy in rotation.
-        
+        Get the next working proxy, chosen by health-weighted selection.
+
         Returns:
             Optional[Dict[str, str]]: Proxy configuration dictionary or None if no working proxies.
         """
-        if not self.working_proxies:
-            return None
-            
-        proxy = self.working_proxies[self._current_index]
-        self._current_index = (self._current_index + 1) % len(self.working_proxies)
-        return proxy.as_dict()
+        proxy = self.select_proxy()
+        return proxy.as_dict() if proxy else None
 
     def get_random_proxy(self) -> Optional[Dict[str, str]]:
         """
         Get a random working proxy.
-        
+
         Returns:
             Optional[Dict[str, str]]: Random proxy configuration dictionary or None if no working proxies.
         """
-        if not self.working_proxies:
+        working = self.working_proxies
+        if not working:
             return None
-            
-        proxy = random.choice(self.working_proxies)
+
+        proxy = random.choice(working)
         return proxy.as_dict()
 
     def mark_proxy_failed(self, proxy_str: str):
         """
-        Mark a proxy as failed and remove it from the working proxies list.
-        
+        Move a proxy into quarantine.
+
         Args:
             proxy_str (str): The proxy string to mark as failed.
         """
-        for proxy in self.working_proxies[:]:
-            if proxy.proxy_str == proxy_str:
-                self.working_proxies.remove(proxy)
-                self.failed_proxies.append(proxy)
-                break
+        health = self._health.get(proxy_str)
+        if health and not health.quarantined:
+            health.quarantined = True
+            logger.info(f"Quarantined proxy {proxy_str} "
+                        f"(latency {health.latency:.2f}s, success rate {health.success_rate:.2f})")
 
     def mark_proxy_working(self, proxy_str: str):
         """
-        Mark a proxy as working and move it to the working proxies list.
-        
+        Release a proxy from quarantine with a fresh failure count.
+
         Args:
             proxy_str (str): The proxy string to mark as working.
         """
-        for proxy in self.failed_proxies[:]:
-            if proxy.proxy_str == proxy_str:
-                self.failed_proxies.remove(proxy)
-                if proxy not in self.working_proxies:
-                    self.working_proxies.append(proxy)
-                break
+        health = self._health.get(proxy_str)
+        if health and health.quarantined:
+            health.quarantined = False
+            health.consecutive_failures = 0
+            health.success_rate = max(health.success_rate, PROXY_MIN_SUCCESS_RATE)
+
+    async def revalidate_quarantined(self):
+        """Revalidate every quarantined proxy once and release the ones that respond."""
+        quarantined = self.failed_proxies
+        if not quarantined:
+            return
+        results = await asyncio.gather(*(self.validate_proxy(p) for p in quarantined), return_exceptions=True)
+        for proxy, is_valid in zip(quarantined, results):
+            health = self._health[proxy.proxy_str]
+            if is_valid is True and health.latency <= PROXY_MAX_LATENCY:
+                self.mark_proxy_working(proxy.proxy_str)
+                logger.info(f"Proxy {proxy.proxy_str} passed revalidation and rejoined the pool")
+
+    async def _revalidation_loop(self):
+        """Periodically revalidate quarantined proxies until cancelled."""
+        while True:
+            await asyncio.sleep(self.revalidate_interval)
+            try:
+                await self.revalidate_quarantined()
+            except Exception as e:
+                logger.debug(f"Proxy revalidation pass failed: {str(e)}")
+
+    def start_revalidation(self):
+        """Start background revalidation of quarantined proxies on the running event loop."""
+        if self._revalidation_task and not self._revalidation_task.done():
+            return
+        self._revalidation_task = asyncio.get_running_loop().create_task(self._revalidation_loop())
+
+    def stop_revalidation(self):
+        """Stop background revalidation."""
+        if self._revalidation_task:
+            self._revalidation_task.cancel()
+            self._revalidation_task = None
 
     @property
     def has_working_proxies(self) -> bool:
         """Check if there are any working proxies available."""
-        return len(self.working_proxies) > 0
+        return any(not h.quarantined for h in self._health.values())
 
     def __len__(self) -> int:
         """Get the total number of proxies."""
@@ -127,9 +273,138 @@ class ProxyManager:
     @property
     def working_count(self) -> int:
         """Get the number of working proxies."""
-        return len(self.working_proxies)
+        return sum(1 for h in self._health.values() if not h.quarantined)
 
     @property
     def failed_count(self) -> int:
         """Get the number of failed proxies."""
-        return len(self.failed_proxies) 
\ No newline at end of file
+        return sum(1 for h in self._health.values() if h.quarantined)
+
+class ProxyLease:
+    """A single request's use of a proxy, reporting its outcome back to the manager."""
+
+    def __init__(self, manager: Optional[ProxyManager], proxy: Optional[ProxyConfig]):
+        self.manager = manager
+        self.proxy = proxy
+        self.url = proxy.http if proxy else None
+        self.started = time.monotonic()
+        self.latency: Optional[float] = None
+        self.failed = False
+
+    def mark_response(self, status: Optional[int] = None):
+        """
+        Record that response headers arrived.
+
+        Args:
+            status (Optional[int]): HTTP status of the response.
+        """
+        if self.latency is None:
+            self.latency = time.monotonic() - self.started
+        if status in PROXY_ERROR_STATUSES:
+            self.failed = True
+
+    def mark_failed(self):
+        """Record that the request failed because of the proxy."""
+        self.failed = True
+
+def _is_proxy_fault(error: BaseException, lease: ProxyLease) -> bool:
+    """
+    Decide whether an error raised during a leased request should count against the proxy.
+
+    Errors about the target site's response (``ClientResponseError`` and its
+    subclasses, such as ``ContentTypeError`` from ``response.json()``) do not,
+    except a refused proxy CONNECT. After the headers arrived only a broken
+    body transfer does; the caller's own timeouts and parsing errors do not.
+
+    Args:
+        error (BaseException): Error raised inside the lease.
+        lease (ProxyLease): The lease it was raised in.
+
+    Returns:
+        bool: Whether to record a failure for the proxy.
+    """
+    if isinstance(error, aiohttp.ClientResponseError) and not isinstance(error, aiohttp.ClientHttpProxyError):
+        return False
+    if lease.latency is None:
+        return isinstance(error, PROXY_ERRORS)
+    return isinstance(error, PROXY_BODY_ERRORS)
+
+@asynccontextmanager
+async def proxy_lease(manager: Optional[ProxyManager]) -> AsyncIterator[ProxyLease]:
+    """
+    Lease a proxy for one request and feed the outcome back into its health.
+
+    With no manager, or no healthy proxy, the lease has ``url`` None and the
+    request goes direct rather than waiting on a bad proxy. Callers report
+    the arrival of response headers with ``mark_response`` so latency is
+    measured to first byte rather than including the body download, and so
+    errors raised after it are only charged to the proxy when the body
+    transfer broke (see _is_proxy_fault).
+
+    Args:
+        manager (Optional[ProxyManager]): Proxy manager to lease from.
+
+    Yields:
+        ProxyLease: Lease whose ``url`` is passed as the request's proxy.
+    """
+    proxy = manager.select_proxy() if manager else None
+    lease = ProxyLease(manager, proxy)
+    if not proxy:
+        yield lease
+        return
+
+    health = manager.health(proxy.proxy_str)
+    health.in_flight += 1
+    try:
+        yield lease
+    except PROXY_ERRORS as e:
+        if _is_proxy_fault(e, lease):
+            lease.failed = True
+        raise
+    finally:
+        health.in_flight -= 1
+        if lease.failed:
+            manager.record_failure(proxy.proxy_str)
+        elif lease.latency is not None:
+            manager.record_success(proxy.proxy_str, lease.latency)
+
+@asynccontextmanager
+async def leased_request(
+    session: aiohttp.ClientSession,
+    method: str,
+    url: str,
+    manager: Optional[ProxyManager],
+    **kwargs
+) -> AsyncIterator[aiohttp.ClientResponse]:
+    """
+    Send an aiohttp request through a leased proxy.
+
+    Args:
+        session (aiohttp.ClientSession): Session to send the request with.
+        method (str): HTTP method.
+        url (str): Request URL.
+        manager (Optional[ProxyManager]): Proxy manager to lease from.
+        **kwargs: Additional arguments for ``session.request``.
+
+    Yields:
+        aiohttp.ClientResponse: The response.
+    """
+    async with proxy_lease(manager) as lease:
+        async with session.request(method, url, proxy=lease.url, **kwargs) as response:
+            lease.mark_response(response.status)
+            yield response
+
+def create_proxy_manager(proxy_list: Optional[List[str]] = None) -> Optional[ProxyManager]:
+    """
+    Create a proxy manager from proxy strings.
+
+    Args:
+        proxy_list (Optional[List[str]]): Proxy strings such as ``host:port``. Defaults to PROXY_LIST.
+
+    Returns:
+        Optional[ProxyManager]: Proxy manager, or None if no proxies are configured.
+    """
+    proxy_list = PROXY_LIST if proxy_list is None else proxy_list
+    if not proxy_list:
+        return None
+    return ProxyManager([ProxyConfig(p) for p in proxy_list])
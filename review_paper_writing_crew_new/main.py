@@ -10,6 +10,9 @@ from crewai import Crew, Agent, Task, Process
 # Disable CrewAI emojis to prevent Unicode encoding issues on Windows
 os.environ["CREWAI_DISABLE_EMOJI"] = "true"
 
+# The retriever reads chunk texts from the chunk store module at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # Import our custom agents
 from agents.manager_agent import create_manager_agent
 from agents.researcher_agent import create_researcher_agent
@@ -26,6 +29,7 @@ def parse_arguments():
     parser.add_argument('--output', type=str, default='review_paper.md', help='Output filename')
     parser.add_argument('--namespace', type=str, default=None, help='Pinecone namespace (UUID will be generated if not provided)')
     parser.add_argument('--index-name', type=str, default="deepresearchreviewbot", help='Pinecone index name')
+    parser.add_argument('--chunk-store', type=str, default=None, help='Path to the chunk store holding the indexed chunk texts')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging for the retriever')
     return parser.parse_args()
 
@@ -43,10 +47,11 @@ def main():
     
     # Initialize the retriever tool
     # The PineconeRetriever has been simplified to use a more straightforward filtering approach
-    # It supports filtering by local_id, section_range, and min_score without requiring a search_type
+    # It supports filtering by local_id, section, section_range, and min_score without requiring a search_type
     retriever = PineconeRetriever(
         namespace=namespace,
         index_name=args.index_name,
+        chunk_store_path=args.chunk_store,
         debug=True
     )
     
@@ -5,19 +5,34 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional, Union, Tuple
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-from pinecone import Pinecone
 from openai import OpenAI
+from chunk_store import ChunkStore
+from vector_store import get_vector_store
+from embedding_profile import embed_texts
+from bm25_index import BM25Index, bm25_index_path, reciprocal_rank_fusion
+
+# Candidates taken from each ranking before fusing, per requested result
+CANDIDATE_MULTIPLIER = 4
+MIN_CANDIDATES = 20
 
 class PineconeRetrieverInput(BaseModel):
     """Schema for PineconeRetriever tool inputs."""
     query: str = Field(description="The search query text")
     local_id: Optional[str] = Field(default=None, description="Document ID to search within a specific document")
+    section: Optional[Union[str, List[str]]] = Field(
+        default=None,
+        description="Section(s) to search in: abstract, introduction, methods, results, discussion, conclusion, references, other"
+    )
     section_range: Optional[List[float]] = Field(
         default=None,
         description="Start and end percentages for section search as [start, end], e.g. [0.0, 0.15] for first 15%"
     )
     min_score: float = Field(default=0.0, description="Minimum relevance score threshold (0.0 to 1.0)")
     top_k: int = Field(default=5, description="Number of results to return")
+    mode: str = Field(
+        default="hybrid",
+        description="hybrid (default) ranks by both exact keywords and meaning; dense ranks by meaning only"
+    )
 
 class PineconeRetriever(BaseTool):
     """Tool for retrieving information from Pinecone vector database using chunk-based schema."""
@@ -29,6 +44,10 @@ class PineconeRetriever(BaseTool):
     To use this tool, provide:
     - query: Your search query text (required)
     - local_id: (optional) Document ID to search within a specific research paper
+    - section: (optional) Section name, or list of names, detected from the paper's headings:
+      abstract, introduction, methods, results, discussion, conclusion, references, other
+      Prefer this over section_range. Chunks of papers without detected headings are
+      tagged "unknown", so fall back to section_range if a section search finds nothing.
     - section_range: (optional) Provide start and end percentages as a list
       For example: [0.0, 0.15] for first 15%, [0.85, 1.0] for last 15%
       Common sections (but you can adjust percentages based on the paper structure):
@@ -39,28 +58,37 @@ class PineconeRetriever(BaseTool):
       - Conclusion: typically last 10-20%
     - min_score: (optional) Minimum relevance score (0.0 to 1.0), default: 0.0
     - top_k: (optional) Number of results to return, default: 5
+    - mode: (optional) "hybrid" (default) matches exact terms, acronyms and author names as
+      well as meaning, so include the specific terms you are looking for in the query;
+      "dense" matches by meaning only
     """
     
     args_schema: type[BaseModel] = PineconeRetrieverInput
     
-    def __init__(self, namespace: str, index_name: str = "deepresearchreviewbot", debug: bool = True):
-        """Initialize the PineconeRetriever tool."""
+    def __init__(self, namespace: str, index_name: str = "deepresearchreviewbot", chunk_store_path: Optional[str] = None, debug: bool = True):
+        """Initialize the PineconeRetriever tool.
+        
+        Args:
+            namespace (str): Pinecone namespace to search
+            index_name (str): Pinecone index name
+            chunk_store_path (str, optional): Chunk store holding the texts and document metadata of the indexed chunks
+            debug (bool): Whether to write debug logs
+        """
         super().__init__()
         self._namespace = namespace
         self._index_name = index_name
+        self._chunk_store_path = chunk_store_path
         self._debug = debug
         self._debug_file = self._setup_debug_file()
         
-        # Initialize Pinecone and OpenAI clients
-        pinecone_api_key = os.getenv("PINECONE_API_KEY")
+        # Initialize the vector store (Pinecone unless VECTOR_STORE_BACKEND=local) and OpenAI client
         openai_api_key = os.getenv("OPENAI_API_KEY")
         
-        if not pinecone_api_key or not openai_api_key:
-            raise ValueError("PINECONE_API_KEY or OPENAI_API_KEY not found in environment variables")
+        if not openai_api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-        self._pc = Pinecone(api_key=pinecone_api_key)
         self._openai_client = OpenAI(api_key=openai_api_key)
-        self._index = self._pc.Index(self._index_name)
+        self._index = get_vector_store(self._index_name)
         
         self._log_debug("Initialized PineconeRetriever")
 
@@ -114,9 +142,11 @@ class PineconeRetriever(BaseTool):
                 result = self._run(
                     query=tool_input.get("query"),
                     local_id=tool_input.get("local_id"),
+                    section=tool_input.get("section"),
                     section_range=tool_input.get("section_range"),
                     min_score=tool_input.get("min_score", 0.0),
-                    top_k=tool_input.get("top_k", 5)
+                    top_k=tool_input.get("top_k", 5),
+                    mode=tool_input.get("mode", "hybrid")
                 )
             
             self._log_debug("Tool execution completed successfully")
@@ -131,19 +161,17 @@ class PineconeRetriever(BaseTool):
         self,
         query: str,
         local_id: Optional[str] = None,
+        section: Optional[Union[str, List[str]]] = None,
         section_range: Optional[List[float]] = None,
         min_score: float = 0.0,
-        top_k: int = 5
+        top_k: int = 5,
+        mode: str = "hybrid"
     ) -> str:
         """Internal method to run the tool with parsed parameters."""
         try:
             self._log_debug("Getting query embedding", {"query": query})
-            # Get query embedding from OpenAI
-            response = self._openai_client.embeddings.create(
-                model="text-embedding-3-large",
-                input=[query]
-            )
-            query_embedding = response.data[0].embedding
+            # Get query embedding from OpenAI, with the same profile the documents were embedded with
+            query_embedding = embed_texts(self._openai_client, [query])[0]
             
             # Build filter dictionary
             filter_dict = {}
@@ -157,6 +185,15 @@ class PineconeRetriever(BaseTool):
             if local_id:
                 filter_conditions.append({"local_id": local_id})
             
+            # Add section filter if specified, using the section tag stored with each chunk
+            if section:
+                sections = [section] if isinstance(section, str) else list(section)
+                sections = [name.strip().lower() for name in sections if name]
+                if len(sections) == 1:
+                    filter_conditions.append({"section": sections[0]})
+                elif sections:
+                    filter_conditions.append({"section": {"$in": sections}})
+            
             # Add section range filter if specified
             if section_range and len(section_range) == 2:
                 # Query to get a sample document to determine total chunks
@@ -179,22 +216,29 @@ class PineconeRetriever(BaseTool):
             if filter_conditions:
                 filter_dict = {"$and": filter_conditions}
             
+            # Hybrid mode fuses a deeper dense ranking with the keyword ranking
+            keyword_index = self._keyword_index_path() if mode != "dense" else None
+            candidates = max(top_k * CANDIDATE_MULTIPLIER, MIN_CANDIDATES) if keyword_index else top_k
+            
             self._log_debug("Querying Pinecone", {
                 "namespace": self._namespace,
-                "top_k": top_k,
-                "filter": filter_dict
+                "top_k": candidates,
+                "filter": filter_dict,
+                "mode": "hybrid" if keyword_index else "dense"
             })
             
             # Query the Pinecone index
             results = self._index.query(
                 namespace=self._namespace,
                 vector=query_embedding,
-                top_k=top_k,
+                top_k=candidates,
                 filter=filter_dict if filter_dict else None,
-                include_values=True,
                 include_metadata=True
             )
             
+            if keyword_index:
+                results = self._fuse_keyword_results(query, results, keyword_index, candidates, top_k, filter_dict or None)
+            
             self._log_debug("Query completed", {"num_results": len(results.get('matches', []))})
             
             # Format and return the results
@@ -205,9 +249,58 @@ class PineconeRetriever(BaseTool):
             self._log_debug("Query failed", {"error": error_msg})
             return error_msg
     
+    def _keyword_index_path(self) -> Optional[str]:
+        """Get the session's BM25 index, kept next to the chunk store, if it exists."""
+        if not self._chunk_store_path:
+            return None
+        path = bm25_index_path(os.path.dirname(self._chunk_store_path))
+        return path if os.path.exists(path) else None
+    
+    def _fuse_keyword_results(
+        self,
+        query: str,
+        results: Dict[str, Any],
+        keyword_index: str,
+        candidates: int,
+        top_k: int,
+        filter_dict: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Fuse the dense matches with a BM25 ranking of the same filtered chunks by reciprocal rank fusion."""
+        with BM25Index(keyword_index, readonly=True) as bm25_index:
+            keyword_matches = bm25_index.search(query, candidates, filter_dict)
+        
+        dense = {match['id']: match for match in results.get('matches', [])}
+        keyword = {vid: (score, metadata) for vid, score, metadata in keyword_matches}
+        fused = reciprocal_rank_fusion([list(dense), list(keyword)])[:top_k]
+        
+        matches = []
+        for vid, _ in fused:
+            match = dense.get(vid)
+            matches.append({
+                'id': vid,
+                'score': match['score'] if match else 0.0,
+                'metadata': match['metadata'] if match else keyword[vid][1],
+                'keyword_score': keyword[vid][0] if vid in keyword else None
+            })
+        self._log_debug("Fused keyword results", {
+            "dense": len(dense), "keyword": len(keyword), "both": len(dense.keys() & keyword.keys())
+        })
+        return {'matches': matches}
+    
+    def _fetch_chunks(self, vector_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up the texts and document metadata of matched vectors in the chunk store."""
+        if not self._chunk_store_path or not os.path.exists(self._chunk_store_path):
+            return {}
+        # Opened per query, as the crew may call the tool from several threads
+        with ChunkStore(self._chunk_store_path, readonly=True) as chunk_store:
+            return chunk_store.get(vector_ids)
+    
     def _format_results(self, results: Dict[str, Any], max_snippet_length: int = 300) -> str:
         """Format Pinecone query results for display using our schema fields.
         
+        Chunk texts and document fields are read from the chunk store; vectors
+        indexed before it existed still carry them in their metadata.
+        
         Args:
             results (Dict[str, Any]): The query results from Pinecone
             max_snippet_length (int): Maximum length for text snippets
@@ -218,24 +311,30 @@ class PineconeRetriever(BaseTool):
         if not results or not results.get('matches'):
             return "No results found."
         
+        stored = self._fetch_chunks([match['id'] for match in results['matches']])
+        self._log_debug("Fetched chunks from store", {"found": len(stored), "matches": len(results['matches'])})
+        
         formatted = []
         for i, match in enumerate(results['matches']):
             similarity_score = match['score']  # Pinecone's similarity score
-            metadata = match['metadata']
+            chunk = stored.get(match['id'], {})
+            metadata = {**match['metadata'], **chunk.get('metadata', {})}
             
             # Extract all metadata fields
             local_id = metadata.get('local_id', 'Unknown')
             chunk_id = metadata.get('chunk_id', '?')
             total_chunks = metadata.get('total_chunks', '?')
+            section = metadata.get('section', 'unknown')
             citation = metadata.get('citation', 'No citation available')
             relevance_score = metadata.get('score', 0.0)  # Custom relevance score
-            text = metadata.get('text', '')
+            text = chunk.get('text', metadata.get('text', ''))
             
             # Format the result entry
             result = [
                 f"Result {i+1}:",
-                f"Document local id and chunk numers are: {local_id} (Chunk {chunk_id} of {total_chunks})",
-                f"Relevance: {relevance_score:.3f} | Similarity: {similarity_score:.3f}",
+                f"Document local id and chunk numers are: {local_id} (Chunk {chunk_id} of {total_chunks}, section: {section})",
+                f"Relevance: {relevance_score:.3f} | Similarity: {similarity_score:.3f}"
+                + (f" | Keyword match: {match['keyword_score']:.2f}" if match.get('keyword_score') else ""),
                 f"Source and citation/reference to be used in the review paper: {citation}, tracking this is prederred",
                 "\nContent:",
                 "=" * 10
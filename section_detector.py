@@ -0,0 +1,168 @@
+"""
+Detection of the standard sections of a research paper in extracted PDF text.
+
+Headings are found from PyMuPDF span data: a line whose text names a standard
+section (optionally numbered, e.g. "2. Materials and Methods") counts as a
+heading when it is set larger than the page's body text, in bold, in capitals
+or with a section number. The processed JSON stores the character offset where
+each section starts, so chunks can be tagged with the section they fall in.
+"""
+
+import re
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+# Section names used in metadata and retriever filters
+SECTIONS = ("abstract", "introduction", "methods", "results", "discussion", "conclusion", "references", "other")
+
+# Text before the first detected heading, and documents without any headings
+FRONT_MATTER = "front_matter"
+UNKNOWN_SECTION = "unknown"
+
+SECTION_PATTERNS = [
+    (name, re.compile(pattern)) for name, pattern in (
+        ("abstract", r"abstract"),
+        ("introduction", r"introduction|background|introduction and background"),
+        ("methods", r"(?:(?:materials?|patients|subjects|data) and )?methods?|methodology|"
+                    r"experimental(?: section| procedures?| setup| design)?|study design"),
+        ("results", r"results?|findings|results and discussion"),
+        ("discussion", r"discussion|general discussion"),
+        ("conclusion", r"conclusions?|concluding remarks|conclusions? and (?:future work|outlook)"),
+        ("references", r"references|bibliography|literature cited|works cited"),
+        ("other", r"acknowledge?ments?|funding|appendix(?: [a-z0-9])?|supplementary (?:materials?|information)|"
+                  r"conflicts? of interest|declaration of competing interest|author contributions|"
+                  r"data availability(?: statement)?"),
+    )
+]
+
+# Section numbering such as "2", "2.1", "II" or "A", followed by "." or ")"
+NUMBERING_PATTERN = re.compile(r'^\s*((?:\d+(?:\.\d+)*|[IVX]+|[A-H])[.)]?)\s+')
+
+# Headings are short
+MAX_HEADING_CHARS = 60
+
+# Points a heading must be larger than the body text, when not otherwise marked
+HEADING_SIZE_DELTA = 1.0
+
+BOLD_FLAG = 16
+
+def match_section(line: str) -> Optional[Tuple[str, bool]]:
+    """
+    Check whether a line of text names a standard section.
+
+    Args:
+        line (str): Line of text
+
+    Returns:
+        Optional[Tuple[str, bool]]: Section name and whether the line is numbered, or None
+    """
+    line = line.strip()
+    if not line or len(line) > MAX_HEADING_CHARS:
+        return None
+    numbering = NUMBERING_PATTERN.match(line)
+    title = line[numbering.end():] if numbering else line
+    title = ' '.join(title.lower().rstrip(':.').split())
+    for name, pattern in SECTION_PATTERNS:
+        if pattern.fullmatch(title):
+            return name, numbering is not None
+    return None
+
+def page_headings(page, text: str) -> List[Tuple[str, str]]:
+    """
+    Find section headings on a page.
+
+    The plain text is checked first; span data is only read for pages with a
+    line naming a section.
+
+    Args:
+        page: fitz page
+        text (str): The page's plain text
+
+    Returns:
+        List[Tuple[str, str]]: Section name and heading line, in reading order
+    """
+    if not any(match_section(line) for line in text.split('\n')):
+        return []
+
+    lines = []
+    sizes = Counter()
+    for block in page.get_text("dict").get('blocks', []):
+        for line in block.get('lines', []):
+            spans = [span for span in line.get('spans', []) if span['text'].strip()]
+            if not spans:
+                continue
+            for span in spans:
+                sizes[round(span['size'], 1)] += len(span['text'])
+            lines.append(spans)
+    if not sizes:
+        return []
+    body_size = sizes.most_common(1)[0][0]
+
+    headings = []
+    for spans in lines:
+        line_text = ''.join(span['text'] for span in spans).strip()
+        match = match_section(line_text)
+        if not match:
+            continue
+        name, numbered = match
+        size = max(span['size'] for span in spans)
+        bold = all(span['flags'] & BOLD_FLAG or 'bold' in span.get('font', '').lower() for span in spans)
+        if numbered or bold or line_text.isupper() or size >= body_size + HEADING_SIZE_DELTA:
+            headings.append((name, line_text))
+    return headings
+
+def locate_sections(page_texts: List[str], headings: List[List[Tuple[str, str]]], delimiter: str) -> List[Dict[str, Any]]:
+    """
+    Turn per-page headings into section offsets in the joined page content.
+
+    Consecutive headings naming the same section (e.g. "Results" followed by
+    "Results and Discussion") are merged into one section.
+
+    Args:
+        page_texts (List[str]): Final text of each page
+        headings (List[List[Tuple[str, str]]]): Headings found on each page, from page_headings
+        delimiter (str): Separator the page texts are joined with
+
+    Returns:
+        List[Dict[str, Any]]: Sections with 'name', 'title', 'page' (1-based), 'start' and 'end' offsets
+    """
+    sections = []
+    page_start = 0
+    for page_number, (text, page_heads) in enumerate(zip(page_texts, headings), 1):
+        search_from = 0
+        for name, title in page_heads:
+            # Headings are located in the final text, which may have lost lines to normalization
+            position = text.find(title, search_from)
+            if position < 0:
+                position = search_from
+            else:
+                search_from = position + len(title)
+            if sections and sections[-1]['name'] == name:
+                continue
+            sections.append({'name': name, 'title': title, 'page': page_number, 'start': page_start + position})
+        page_start += len(text) + len(delimiter)
+
+    content_length = max(0, page_start - len(delimiter))
+    for section, following in zip(sections, sections[1:] + [None]):
+        section['end'] = following['start'] if following else content_length
+    return sections
+
+def section_at(sections: List[Dict[str, Any]], offset: int) -> str:
+    """
+    Get the name of the section containing a character offset.
+
+    Args:
+        sections (List[Dict[str, Any]]): Sections from the processed document's metadata
+        offset (int): Character offset in the page content
+
+    Returns:
+        str: Section name, FRONT_MATTER before the first heading or UNKNOWN_SECTION if none were found
+    """
+    if not sections:
+        return UNKNOWN_SECTION
+    name = FRONT_MATTER
+    for section in sections:
+        if section['start'] > offset:
+            break
+        name = section['name']
+    return name
@@ -0,0 +1,190 @@
+"""
+Normalization of extracted page text before it is saved, chunked and embedded.
+
+Running headers and footers, page numbers, license and download notices, and
+words hyphenated across line breaks show up on every page of a paper. They add
+nothing to retrieval but cost chunks, embedding tokens and index space, so they
+are stripped here once per document.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Tuple, Optional
+
+# Lines at the top and bottom of each page that may be running headers or footers
+EDGE_LINES = 3
+
+# A line is a running header/footer if it recurs on this share of pages...
+REPEAT_FRACTION = 0.5
+# ...and on at least this many pages
+MIN_REPEAT_PAGES = 3
+
+# Longer lines are body text, not headers or footers
+MAX_BOILERPLATE_LINE = 200
+
+# Rough characters per token, for reporting savings
+CHARS_PER_TOKEN = 4
+
+# Front matter is numbered in lowercase roman numerals; uppercase ones ("I", "IV") are section numbers
+PAGE_NUMBER_PATTERN = re.compile(
+    r'^\s*(?:(?i:page)\s*)?(?:\d{1,5}|(?=[ivx])x{0,3}(?:ix|iv|v?i{0,3}))(?:\s*(?:(?i:of)|/)\s*\d{1,5})?\s*$'
+)
+
+# Whole-line notices, anchored so body sentences mentioning a license are kept
+BOILERPLATE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'^\s*(?:©|\(c\)|copyright\b)',
+        r'\ball rights reserved\.?\s*$',
+        r'^\s*creative commons\b',
+        r'^\s*(?:this (?:\w+ ){1,4})?(?:licen[sc]ed|distributed) under\b',
+        r'^\s*downloaded from\b',
+        r'\bterms and conditions\b.*\bhttps?://',
+        r'^\s*(?:for personal use only|this article is protected by copyright)',
+    )
+]
+
+# A hyphen at a line end followed by a lowercase continuation; a broken word only if
+# the joined word appears elsewhere in the document, otherwise a compound like "self-supervised"
+HYPHENATION_PATTERN = re.compile(r'\b(\w+)-\n[ \t]*([a-z]\w*)')
+
+WORD_PATTERN = re.compile(r'\w+')
+
+@dataclass
+class NormalizationStats:
+    """What normalization removed from a document."""
+    chars_before: int = 0
+    chars_after: int = 0
+    repeated_lines_removed: int = 0
+    page_numbers_removed: int = 0
+    boilerplate_lines_removed: int = 0
+    hyphenations_joined: int = 0
+
+    @property
+    def chars_saved(self) -> int:
+        return self.chars_before - self.chars_after
+
+    @property
+    def estimated_tokens_saved(self) -> int:
+        return self.chars_saved // CHARS_PER_TOKEN
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Stats as a JSON-serializable dictionary, including the derived savings."""
+        stats = asdict(self)
+        stats['chars_saved'] = self.chars_saved
+        stats['estimated_tokens_saved'] = self.estimated_tokens_saved
+        return stats
+
+def _line_key(line: str) -> str:
+    """Key under which a line is compared across pages; digits are masked so 'Page 3' matches 'Page 4'."""
+    return re.sub(r'\d+', '#', ' '.join(line.split()).lower())
+
+def _edge_line_indexes(lines: List[str]) -> List[int]:
+    """
+    Find the indexes of the first and last EDGE_LINES non-empty lines of a page.
+
+    Appended table markdown (lines starting with '|') is not part of the page
+    layout, so it is ignored when looking for the bottom of the page.
+    """
+    content = [i for i, line in enumerate(lines) if line.strip() and not line.lstrip().startswith('|')]
+    return sorted(set(content[:EDGE_LINES] + content[-EDGE_LINES:]))
+
+def find_repeated_lines(page_texts: List[str]) -> set:
+    """
+    Find the line keys of running headers and footers.
+
+    Args:
+        page_texts (List[str]): Text of each page
+
+    Returns:
+        set: Keys (see _line_key) of lines recurring at the page edges
+    """
+    if len(page_texts) < MIN_REPEAT_PAGES:
+        return set()
+
+    counts = Counter()
+    for text in page_texts:
+        lines = text.split('\n')
+        keys = {_line_key(lines[i]) for i in _edge_line_indexes(lines) if len(lines[i]) <= MAX_BOILERPLATE_LINE}
+        counts.update(keys)
+
+    threshold = max(MIN_REPEAT_PAGES, len(page_texts) * REPEAT_FRACTION)
+    return {key for key, count in counts.items() if key and count >= threshold}
+
+def _is_boilerplate(line: str) -> bool:
+    """Check whether a line is a license, copyright or download notice (only meaningful for edge lines)."""
+    return len(line) <= MAX_BOILERPLATE_LINE and any(pattern.search(line) for pattern in BOILERPLATE_PATTERNS)
+
+def build_vocabulary(page_texts: List[str]) -> set:
+    """
+    Collect the lowercased words of a document, for telling broken words from hyphenated compounds.
+
+    Args:
+        page_texts (List[str]): Text of each page
+
+    Returns:
+        set: Words appearing in the document
+    """
+    vocabulary = set()
+    for text in page_texts:
+        vocabulary.update(WORD_PATTERN.findall(text.lower()))
+    return vocabulary
+
+def normalize_page(text: str, repeated: set, stats: NormalizationStats, vocabulary: Optional[set] = None) -> str:
+    """
+    Strip headers, footers, page numbers and boilerplate from one page and dehyphenate it.
+
+    Args:
+        text (str): Page text
+        repeated (set): Line keys from find_repeated_lines
+        stats (NormalizationStats): Counters to update
+        vocabulary (set, optional): Words from build_vocabulary, defaults to the words of this page
+
+    Returns:
+        str: Normalized page text
+    """
+    lines = text.split('\n')
+    edges = set(_edge_line_indexes(lines))
+    kept = []
+    for i, line in enumerate(lines):
+        if i in edges and _line_key(line) in repeated:
+            stats.repeated_lines_removed += 1
+        elif i in edges and PAGE_NUMBER_PATTERN.match(line):
+            stats.page_numbers_removed += 1
+        elif i in edges and _is_boilerplate(line):
+            stats.boilerplate_lines_removed += 1
+        else:
+            kept.append(line)
+
+    text = '\n'.join(kept)
+    if vocabulary is None:
+        vocabulary = build_vocabulary([text])
+
+    def dehyphenate(match) -> str:
+        head, tail = match.groups()
+        if (head + tail).lower() in vocabulary:
+            stats.hyphenations_joined += 1
+            return head + tail
+        return f"{head}-{tail}"
+
+    text = HYPHENATION_PATTERN.sub(dehyphenate, text)
+
+    # Removed lines leave runs of blank lines behind
+    return re.sub(r'\n{3,}', '\n\n', text).strip('\n')
+
+def normalize_pages(page_texts: List[str]) -> Tuple[List[str], NormalizationStats]:
+    """
+    Normalize all pages of a document.
+
+    Args:
+        page_texts (List[str]): Text of each page, in order
+
+    Returns:
+        Tuple[List[str], NormalizationStats]: Normalized page texts and what was removed
+    """
+    stats = NormalizationStats(chars_before=sum(len(text) for text in page_texts))
+    repeated = find_repeated_lines(page_texts)
+    vocabulary = build_vocabulary(page_texts)
+    normalized = [normalize_page(text, repeated, stats, vocabulary) for text in page_texts]
+    stats.chars_after = sum(len(text) for text in normalized)
+    return normalized, stats
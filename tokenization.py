@@ -0,0 +1,84 @@
+"""
+Token counting for chunk sizing and embedding request packing.
+
+Chunks are sized in tokens of the embedding model's encoding rather than in
+characters, so a chunk of dense tables or formulas does not run far over the
+intended size. The encoder is loaded once per process. Without tiktoken,
+tokens are estimated at CHARS_PER_TOKEN characters each.
+"""
+
+from functools import lru_cache
+from typing import List, Iterable, Iterator, Callable, TypeVar
+
+try:
+    import tiktoken
+except ImportError:  # Character-based estimate only
+    tiktoken = None
+
+# Encoding used by the text-embedding-3 models
+ENCODING_NAME = "cl100k_base"
+
+# Characters per token when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# Per-request budget for embedding calls; the API allows 300,000 tokens and 2,048 inputs
+EMBEDDING_BATCH_TOKENS = 60000
+EMBEDDING_BATCH_ITEMS = 1000
+
+T = TypeVar('T')
+
+@lru_cache(maxsize=None)
+def get_encoder():
+    """Get this process's tokenizer, or None if tiktoken is not installed."""
+    if tiktoken is None:
+        return None
+    return tiktoken.get_encoding(ENCODING_NAME)
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text.
+
+    Args:
+        text (str): Text to count
+
+    Returns:
+        int: Number of tokens, estimated from the length if tiktoken is not installed
+    """
+    encoder = get_encoder()
+    if encoder is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoder.encode(text, disallowed_special=()))
+
+def iter_token_batches(
+    items: Iterable[T],
+    token_count: Callable[[T], int],
+    max_tokens: int = EMBEDDING_BATCH_TOKENS,
+    max_items: int = EMBEDDING_BATCH_ITEMS
+) -> Iterator[List[T]]:
+    """
+    Pack a stream of items into batches within a token and item budget.
+
+    Items keep their order. An item larger than the token budget on its own
+    is sent as a batch by itself.
+
+    Args:
+        items (Iterable[T]): Items to pack; consumed lazily
+        token_count (Callable[[T], int]): Tokens of an item
+        max_tokens (int): Maximum tokens per batch
+        max_items (int): Maximum items per batch
+
+    Returns:
+        Iterator[List[T]]: Batches of items
+    """
+    batch = []
+    batch_tokens = 0
+    for item in items:
+        tokens = token_count(item)
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_items):
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        yield batch
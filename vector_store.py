@@ -0,0 +1,493 @@
+"""
+Vector store backends behind one interface: the hosted Pinecone index, or a local embedded index.
+
+The local backend keeps vectors in a SQLite database, one row per vector and
+namespace, and searches a namespace in process: brute force with numpy for
+small namespaces, and an HNSW graph (when hnswlib is installed) for large
+ones. Vectors can be stored quantized to int8 or sign bits (see
+embedding_profile.py). It supports the same metadata filters the retriever
+sends to Pinecone, so sessions can be indexed and searched offline or in CI.
+
+The backend is chosen with the VECTOR_STORE_BACKEND environment variable,
+"pinecone" (the default) or "local".
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # Brute force only
+    hnswlib = None
+
+from embedding_profile import EMBEDDING_DIMENSIONS, EMBEDDING_QUANTIZATION, QUANTIZATIONS, profile_index_name
+
+INDEX_NAME = "deepresearchreviewbot"
+
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone").lower()
+
+# Folder holding the local indexes
+LOCAL_STORE_DIR = os.getenv(
+    "LOCAL_VECTOR_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "vector_index")
+)
+
+# Namespaces with at least this many vectors are searched with HNSW when hnswlib is installed
+HNSW_MIN_VECTORS = 20000
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 128
+
+# Largest int8 code; each int8 vector is scaled so its largest component maps to it
+INT8_MAX = 127
+
+# Seconds a writer waits for another process's write to finish
+BUSY_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS namespaces (
+    namespace TEXT PRIMARY KEY,
+    dimension INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    quantization TEXT NOT NULL DEFAULT 'none'
+);
+CREATE TABLE IF NOT EXISTS vectors (
+    namespace TEXT NOT NULL,
+    id TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (namespace, id)
+) WITHOUT ROWID;
+"""
+
+def _compare(operator: str, value: Any, operand: Any) -> bool:
+    """Apply one filter operator to a metadata value."""
+    if operator == '$eq':
+        return value == operand
+    if operator == '$ne':
+        return value != operand
+    if operator == '$in':
+        return value in operand
+    if operator == '$nin':
+        return value not in operand
+    if operator == '$exists':
+        return (value is not None) == bool(operand)
+    if operator in ('$gt', '$gte', '$lt', '$lte'):
+        if value is None or isinstance(value, bool) != isinstance(operand, bool):
+            return False
+        try:
+            if operator == '$gt':
+                return value > operand
+            if operator == '$gte':
+                return value >= operand
+            if operator == '$lt':
+                return value < operand
+            return value <= operand
+        except TypeError:
+            return False
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """
+    Check whether a vector's metadata matches a Pinecone-style filter.
+
+    Supports $and, $or, implicit equality and the $eq, $ne, $gt, $gte, $lt,
+    $lte, $in, $nin and $exists operators.
+
+    Args:
+        metadata (Dict[str, Any]): Vector metadata
+        filter (Dict[str, Any], optional): Filter; None or empty matches everything
+
+    Returns:
+        bool: Whether the metadata matches
+    """
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        if key == '$and':
+            if not all(matches_filter(metadata, part) for part in condition):
+                return False
+        elif key == '$or':
+            if not any(matches_filter(metadata, part) for part in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            if not all(_compare(operator, value, operand) for operator, operand in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+class VectorStore(ABC):
+    """
+    Interface shared by the vector store backends, following the Pinecone index API.
+    """
+
+    @abstractmethod
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str):
+        """
+        Add or replace vectors.
+
+        Args:
+            vectors (List[Dict[str, Any]]): Vectors with 'id', 'values' and 'metadata'
+            namespace (str): Namespace to upsert into
+        """
+
+    @abstractmethod
+    def query(
+        self,
+        namespace: str,
+        vector: List[float],
+        top_k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        include_values: bool = False,
+        include_metadata: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Find the vectors most similar to a query vector.
+
+        Args:
+            namespace (str): Namespace to search
+            vector (List[float]): Query vector
+            top_k (int): Number of matches to return
+            filter (Dict[str, Any], optional): Metadata filter
+            include_values (bool): Return the matched vectors' values
+            include_metadata (bool): Return the matched vectors' metadata
+
+        Returns:
+            Dict[str, Any]: Response with 'matches', each with 'id', 'score' and 'metadata'
+        """
+
+    @abstractmethod
+    def describe_index_stats(self) -> Dict[str, Any]:
+        """
+        Count the vectors in each namespace.
+
+        Returns:
+            Dict[str, Any]: Stats with 'namespaces' mapping each namespace to its 'vector_count'
+        """
+
+    @abstractmethod
+    def delete_namespace(self, namespace: str):
+        """Remove every vector in a namespace."""
+
+class PineconeVectorStore(VectorStore):
+    """
+    The hosted Pinecone index.
+    """
+
+    def __init__(self, index_name: str = INDEX_NAME):
+        """
+        Connect to a Pinecone index.
+
+        Args:
+            index_name (str): Pinecone index name
+        """
+        pinecone_api_key = os.getenv("PINECONE_API_KEY")
+        if not pinecone_api_key:
+            raise ValueError("PINECONE_API_KEY not found in environment variables")
+
+        from pinecone import Pinecone
+        self._index = Pinecone(api_key=pinecone_api_key).Index(index_name)
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str):
+        self._index.upsert(vectors=vectors, namespace=namespace)
+
+    def query(self, namespace, vector, top_k, filter=None, include_values=False, include_metadata=True):
+        return self._index.query(
+            namespace=namespace,
+            vector=vector,
+            top_k=top_k,
+            filter=filter,
+            include_values=include_values,
+            include_metadata=include_metadata
+        )
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        return self._index.describe_index_stats()
+
+    def delete_namespace(self, namespace: str):
+        self._index.delete(delete_all=True, namespace=namespace)
+
+def encode_vectors(matrix: np.ndarray, quantization: str) -> List[bytes]:
+    """
+    Encode unit-length vectors for storage.
+
+    Args:
+        matrix (np.ndarray): Unit-length vectors, one per row
+        quantization (str): "none" (float32), "int8" (a float32 scale, then one byte per
+            dimension) or "binary" (one sign bit per dimension)
+
+    Returns:
+        List[bytes]: One encoded vector per row
+    """
+    if quantization == "int8":
+        peaks = np.abs(matrix).max(axis=1, keepdims=True)
+        scales = (INT8_MAX / np.where(peaks == 0, 1, peaks)).astype(np.float32)
+        codes = np.clip(np.rint(matrix * scales), -INT8_MAX, INT8_MAX).astype(np.int8)
+        return [scale.tobytes() + code.tobytes() for scale, code in zip(scales, codes)]
+    if quantization == "binary":
+        return [bits.tobytes() for bits in np.packbits(matrix > 0, axis=1)]
+    return [row.tobytes() for row in matrix.astype(np.float32)]
+
+class _LoadedNamespace:
+    """A namespace's vectors held in memory, in their stored encoding, for searching."""
+
+    def __init__(self, version: int, dimension: int, quantization: str, ids: List[str],
+                 metadata: List[Dict[str, Any]], blobs: List[bytes]):
+        self.version = version
+        self.dimension = dimension
+        self.quantization = quantization
+        self.ids = ids
+        self.metadata = metadata
+        self.hnsw = None
+        self.scales = None
+        if not blobs:
+            self.matrix = np.zeros((0, dimension), dtype=np.float32)
+        elif quantization == "int8":
+            raw = np.frombuffer(b''.join(blobs), dtype=np.uint8).reshape(len(blobs), -1)
+            self.scales = raw[:, :4].copy().view(np.float32).ravel()
+            self.matrix = raw[:, 4:].copy().view(np.int8)
+        elif quantization == "binary":
+            self.matrix = np.frombuffer(b''.join(blobs), dtype=np.uint8).reshape(len(blobs), -1)
+        else:
+            self.matrix = np.frombuffer(b''.join(blobs), dtype=np.float32).reshape(len(blobs), dimension)
+
+    def similarities(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every vector to a unit-length query, computed on the stored encoding."""
+        if self.quantization == "int8":
+            return (self.matrix @ query) / self.scales
+        if self.quantization == "binary":
+            # Each stored vector is the signs of the original, scaled to unit length
+            bits = np.unpackbits(self.matrix, axis=1, count=self.dimension)
+            return (bits @ (2 * query) - query.sum()) / np.sqrt(self.dimension)
+        return self.matrix @ query
+
+    def vectors(self, positions=None) -> np.ndarray:
+        """Decode stored vectors to float32, all of them or those at some positions."""
+        matrix = self.matrix if positions is None else self.matrix[positions]
+        if self.quantization == "int8":
+            scales = self.scales if positions is None else self.scales[positions]
+            return matrix.astype(np.float32) / scales[:, None]
+        if self.quantization == "binary":
+            bits = np.unpackbits(matrix, axis=1, count=self.dimension).astype(np.float32)
+            return (2 * bits - 1) / np.sqrt(self.dimension)
+        return matrix
+
+class LocalVectorStore(VectorStore):
+    """
+    Embedded vector index persisted to SQLite and searched in process.
+
+    Similarity is cosine, as in the hosted index. Vectors are normalized and
+    stored as float32, or quantized to int8 or sign bits to cut storage and
+    memory at some cost in recall. Each namespace keeps the quantization it
+    was created with. Namespaces are loaded into memory on their first query
+    and reloaded only after they change.
+    """
+
+    def __init__(self, index_name: str = INDEX_NAME, directory: str = LOCAL_STORE_DIR,
+                 quantization: str = EMBEDDING_QUANTIZATION):
+        """
+        Open (creating if needed) a local index.
+
+        Args:
+            index_name (str): Index name, used as the database file name
+            directory (str): Folder holding the local indexes
+            quantization (str): Encoding of new namespaces: "none", "int8" or "binary"
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}, expected one of {', '.join(QUANTIZATIONS)}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.index_name = index_name
+        self.quantization = quantization
+        self.path = os.path.join(directory, f"{index_name}.sqlite")
+        # Tools may query from several threads; the lock serializes use of the connection
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(namespaces)")}
+        if 'quantization' not in columns:
+            # Indexes created before quantization hold float32 vectors
+            self._conn.execute("ALTER TABLE namespaces ADD COLUMN quantization TEXT NOT NULL DEFAULT 'none'")
+        self._loaded: Dict[str, _LoadedNamespace] = {}
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str):
+        if not vectors:
+            return
+        dimension = len(vectors[0]['values'])
+        for vector in vectors:
+            if len(vector['values']) != dimension:
+                raise ValueError(f"Vector {vector['id']} has dimension {len(vector['values'])}, expected {dimension}")
+        matrix = np.asarray([vector['values'] for vector in vectors], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT dimension, quantization FROM namespaces WHERE namespace = ?", (namespace,)
+            ).fetchone()
+            if row and row[0] != dimension:
+                raise ValueError(f"Namespace {namespace} holds vectors of dimension {row[0]}, not {dimension}")
+            quantization = row[1] if row else self.quantization
+            rows = [(namespace, str(vector['id']), json.dumps(vector.get('metadata') or {}, ensure_ascii=False), blob)
+                    for vector, blob in zip(vectors, encode_vectors(matrix, quantization))]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (namespace, id, metadata, vector) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT INTO namespaces (namespace, dimension, version, quantization) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(namespace) DO UPDATE SET version = version + 1",
+                (namespace, dimension, quantization)
+            )
+
+    def _load(self, namespace: str) -> Optional[_LoadedNamespace]:
+        """Get a namespace's vectors in memory, reloading them if the namespace changed since."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, dimension, quantization FROM namespaces WHERE namespace = ?", (namespace,)
+            ).fetchone()
+            if row is None:
+                self._loaded.pop(namespace, None)
+                return None
+            loaded = self._loaded.get(namespace)
+            if loaded is not None and loaded.version == row[0]:
+                return loaded
+
+            rows = self._conn.execute(
+                "SELECT id, metadata, vector FROM vectors WHERE namespace = ? ORDER BY id", (namespace,)
+            ).fetchall()
+        version, dimension, quantization = row
+        loaded = _LoadedNamespace(version, dimension, quantization,
+                                  [vector_id for vector_id, _, _ in rows],
+                                  [json.loads(meta) for _, meta, _ in rows],
+                                  [blob for _, _, blob in rows])
+        self._loaded[namespace] = loaded
+        return loaded
+
+    def _hnsw_path(self, namespace: str, version: int) -> str:
+        """Get the path of the saved HNSW graph for a version of a namespace."""
+        return os.path.join(self.directory, f"{self.index_name}.{namespace}.v{version}.hnsw")
+
+    def _get_hnsw(self, namespace: str, loaded: _LoadedNamespace):
+        """Get the HNSW graph of a loaded namespace, loading or building it on first use."""
+        if loaded.hnsw is not None:
+            return loaded.hnsw
+        count, dimension = len(loaded.ids), loaded.dimension
+        graph = hnswlib.Index(space='ip', dim=dimension)
+        path = self._hnsw_path(namespace, loaded.version)
+        if os.path.exists(path):
+            graph.load_index(path, max_elements=count)
+        else:
+            graph.init_index(max_elements=count, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+            graph.add_items(loaded.vectors(), np.arange(count))
+            # Graphs of older versions of the namespace are stale
+            prefix = f"{self.index_name}.{namespace}.v"
+            for name in os.listdir(self.directory):
+                if name.startswith(prefix) and name.endswith(".hnsw"):
+                    os.remove(os.path.join(self.directory, name))
+            graph.save_index(path)
+        graph.set_ef(HNSW_EF_SEARCH)
+        loaded.hnsw = graph
+        return graph
+
+    def query(self, namespace, vector, top_k, filter=None, include_values=False, include_metadata=True):
+        response = {'matches': [], 'namespace': namespace}
+        loaded = self._load(namespace)
+        if loaded is None or not loaded.ids or top_k <= 0:
+            return response
+
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+
+        allowed = None
+        if filter:
+            allowed = np.fromiter((matches_filter(meta, filter) for meta in loaded.metadata),
+                                  dtype=bool, count=len(loaded.ids))
+            if not allowed.any():
+                return response
+        candidates = len(loaded.ids) if allowed is None else int(allowed.sum())
+        k = min(top_k, candidates)
+
+        positions = scores = None
+        # Selective filters leave few candidates, which brute force searches faster and exactly
+        if hnswlib is not None and loaded.quantization != "binary" and candidates >= HNSW_MIN_VECTORS:
+            graph = self._get_hnsw(namespace, loaded)
+            allowed_filter = None if allowed is None else (lambda label: bool(allowed[label]))
+            try:
+                labels, distances = graph.knn_query(query, k=k, filter=allowed_filter)
+                positions = labels[0].tolist()
+                scores = (1 - distances[0]).tolist()
+            except RuntimeError:
+                # The graph search found fewer than k matches for the filter
+                pass
+        if positions is None:
+            similarities = loaded.similarities(query)
+            if allowed is not None:
+                similarities = np.where(allowed, similarities, -np.inf)
+            positions = np.argpartition(-similarities, k - 1)[:k]
+            positions = positions[np.argsort(-similarities[positions])].tolist()
+            scores = similarities[positions].tolist()
+
+        for position, score in zip(positions, scores):
+            match = {'id': loaded.ids[position], 'score': float(score)}
+            if include_metadata:
+                match['metadata'] = loaded.metadata[position]
+            if include_values:
+                match['values'] = loaded.vectors([position])[0].tolist()
+            response['matches'].append(match)
+        return response
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT namespace, COUNT(*) FROM vectors GROUP BY namespace").fetchall()
+        namespaces = {namespace: {'vector_count': count} for namespace, count in rows}
+        return {'namespaces': namespaces, 'total_vector_count': sum(count for _, count in rows)}
+
+    def delete_namespace(self, namespace: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM vectors WHERE namespace = ?", (namespace,))
+            self._conn.execute("DELETE FROM namespaces WHERE namespace = ?", (namespace,))
+        self._loaded.pop(namespace, None)
+
+# Open stores by (backend, index name), so a local namespace stays loaded across queries
+_stores: Dict[Tuple[str, str], VectorStore] = {}
+_stores_lock = threading.Lock()
+
+def get_vector_store(index_name: str = INDEX_NAME, backend: Optional[str] = None,
+                     dimensions: int = EMBEDDING_DIMENSIONS) -> VectorStore:
+    """
+    Get the configured vector store for the embedding profile, opening it on first use.
+
+    Stores are shared across calls in the process, so the local backend loads
+    each namespace (and its HNSW graph) once rather than on every query.
+
+    Args:
+        index_name (str): Index name of the full-dimension profile
+        backend (str, optional): "pinecone" or "local", defaults to VECTOR_STORE_BACKEND
+        dimensions (int): Embedding dimensions; reduced profiles use their own index
+
+    Returns:
+        VectorStore: The vector store
+    """
+    backend = (backend or VECTOR_STORE_BACKEND).lower()
+    index_name = profile_index_name(index_name, dimensions)
+    if backend not in ("local", "pinecone"):
+        raise ValueError(f"Unknown vector store backend: {backend}")
+    with _stores_lock:
+        key = (backend, index_name)
+        if key not in _stores:
+            _stores[key] = LocalVectorStore(index_name) if backend == "local" else PineconeVectorStore(index_name)
+        return _stores[key]